@@ -0,0 +1,70 @@
+"""Micro-benchmark: intent lookup cost vs. number of learned phrases.
+
+Compares the compiled IntentIndex against the old linear scan over
+``learned_commands``. Run from the repository root:
+
+    python benchmarks/bench_intent_index.py
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ego_intents import build_intent_index  # noqa: E402
+
+SIZES = [10, 100, 1_000, 10_000, 100_000]
+WORDS = ("open play start stop turn on off the lights music kitchen bedroom radio "
+         "volume up down my favourite playlist timer alarm set check email news "
+         "garage door fan heater living room office tv channel next previous").split()
+QUERIES = [
+    "what's the weather in London",
+    "who is Albert Einstein",
+    "please play my favourite playlist",
+    "open the pod bay doors hal",
+    "what time is it",
+]
+
+
+def make_phrases(n, rng):
+    phrases = {}
+    while len(phrases) < n:
+        phrase = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 6)))
+        phrases[phrase] = {"intent": f"custom_{len(phrases)}", "target": None}
+    return phrases
+
+
+def linear_scan(learned_commands, user_input):
+    for phrase, action in learned_commands.items():
+        if phrase.lower() in user_input.lower():
+            return action
+    return None
+
+
+def time_per_call(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for q in QUERIES:
+            fn(q)
+    return (time.perf_counter() - start) / (repeat * len(QUERIES))
+
+
+def main():
+    rng = random.Random(0)
+    print(f"{'phrases':>8} {'build ms':>10} {'index us':>10} {'fuzzy us':>10} {'scan us':>10}")
+    for n in SIZES:
+        learned = make_phrases(n, rng)
+        t0 = time.perf_counter()
+        index = build_intent_index(learned, fuzzy=False)
+        build_ms = (time.perf_counter() - t0) * 1000
+        fuzzy_index = build_intent_index(learned, fuzzy=True)
+        exact = time_per_call(index.match, 2000)
+        fuzzy = time_per_call(fuzzy_index.match, 200)
+        scan = time_per_call(lambda q: linear_scan(learned, q), max(1, 20_000 // n))
+        print(f"{n:>8} {build_ms:>10.1f} {exact * 1e6:>10.2f} {fuzzy * 1e6:>10.2f} {scan * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
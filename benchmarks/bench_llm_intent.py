@@ -0,0 +1,91 @@
+"""Benchmark: GPT-2 intent extraction with and without the cached prefix.
+
+"before" encodes the whole few-shot prompt and runs ``generate`` for the full
+token budget on every call; "after" reuses the cached prefix, encodes only
+the user line and stops at the closing brace. Run from the repository root:
+
+    python benchmarks/bench_llm_intent.py [--model gpt2] [--repeat 5]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch  # noqa: E402
+from transformers import AutoModelForCausalLM, AutoTokenizer  # noqa: E402
+
+from ego_llm import IntentLLM, MAX_NEW_TOKENS, build_prompt, parse_intent  # noqa: E402
+
+UTTERANCES = [
+    "Open Spotify",
+    "Search for cheap flights to Rome",
+    "Play some relaxing music",
+    "Turn the volume down",
+    "Remind me to call mom",
+    "What's the capital of France?",
+]
+
+
+def uncached_extract(model, tokenizer, device, user_input):
+    inputs = tokenizer(build_prompt(user_input), return_tensors="pt").to(device)
+    with torch.no_grad():
+        outputs = model.generate(**inputs, max_new_tokens=MAX_NEW_TOKENS,
+                                 pad_token_id=tokenizer.eos_token_id)
+    generated = outputs[0][inputs.input_ids.shape[1]:]
+    return parse_intent(tokenizer.decode(generated, skip_special_tokens=True)), len(generated)
+
+
+def cached_extract(llm, user_input):
+    text, n = llm.generate(user_input)
+    return parse_intent(text), n
+
+
+def measure(fn, repeat):
+    latencies, tokens, results = [], [], []
+    for _ in range(repeat):
+        for text in UTTERANCES:
+            start = time.perf_counter()
+            intent, n = fn(text)
+            latencies.append((time.perf_counter() - start) * 1000)
+            tokens.append(n)
+            results.append(intent)
+    return latencies, tokens, results
+
+
+def report(name, latencies, tokens):
+    latencies = sorted(latencies)
+    p95 = latencies[int(0.95 * (len(latencies) - 1))]
+    print(f"{name:>8}: mean {statistics.mean(latencies):8.1f} ms   p95 {p95:8.1f} ms   "
+          f"tokens/request {statistics.mean(tokens):5.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="gpt2")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    model = AutoModelForCausalLM.from_pretrained(args.model).to(device).eval()
+    llm = IntentLLM(model, tokenizer, device)
+
+    # Warm both paths so one-off costs (prefix encode, vocab masks) aren't counted.
+    uncached_extract(model, tokenizer, device, UTTERANCES[0])
+    llm.generate(UTTERANCES[0])
+
+    before = measure(lambda t: uncached_extract(model, tokenizer, device, t), args.repeat)
+    after = measure(lambda t: cached_extract(llm, t), args.repeat)
+    report("before", before[0], before[1])
+    report("after", after[0], after[1])
+    print(f"speedup: {statistics.mean(before[0]) / statistics.mean(after[0]):.1f}x")
+    for text, a, b in zip(UTTERANCES, before[2], after[2]):
+        print(f"  {text!r}: before={a} after={b}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Benchmark: compare intent-model inference profiles on this host.
+
+Each profile is loaded in a fresh subprocess so resident memory isn't
+polluted by the others. Reports load time, resident memory, per-call latency
+and whether each profile's intents match fp32 on a fixed utterance set.
+Run from the repository root:
+
+    python benchmarks/bench_llm_profiles.py [--profiles fp32 int8 int8-1t] [--repeat 3]
+
+Exits non-zero if a profile's agreement with fp32 drops below --min-agreement.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+UTTERANCES = [
+    "Open Spotify",
+    "Open Visual Studio Code",
+    "Search for Python tutorials",
+    "Search for cheap flights to Rome",
+    "What time is it?",
+    "Play some relaxing music",
+    "Turn the volume down",
+    "Remind me to call mom",
+    "Take a screenshot",
+    "What's the capital of France?",
+]
+
+
+def run_child(profile, repeat, threads):
+    from ego_llm import load_intent_llm
+
+    llm = load_intent_llm(profile=profile, threads=threads)
+    latencies, intents = [], []
+    for i in range(repeat):
+        for text in UTTERANCES:
+            start = time.perf_counter()
+            intent = llm.extract(text)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if i == 0:
+                intents.append(intent)
+    latencies.sort()
+    print(json.dumps({
+        "profile": profile,
+        "load_time_s": llm.load_time,
+        "rss_mb": llm.rss_bytes / 2**20 if llm.rss_bytes else None,
+        "mean_ms": statistics.mean(latencies),
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))],
+        "intents": intents,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", nargs="+", default=["fp32", "int8", "int8-1t"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--min-agreement", type=float, default=0.9)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.repeat, args.threads)
+        return
+
+    profiles = args.profiles if "fp32" in args.profiles else ["fp32"] + args.profiles
+    results = {}
+    for profile in profiles:
+        cmd = [sys.executable, os.path.abspath(__file__), "--child", profile, "--repeat", str(args.repeat)]
+        if args.threads:
+            cmd += ["--threads", str(args.threads)]
+        out = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+        results[profile] = json.loads(out.strip().splitlines()[-1])
+
+    reference = results["fp32"]["intents"]
+    failed = False
+    print(f"{'profile':>8} {'load s':>8} {'rss MB':>8} {'mean ms':>8} {'p95 ms':>8} {'agree':>6}")
+    for profile, r in results.items():
+        agree = sum(a == b for a, b in zip(r["intents"], reference)) / len(reference)
+        failed |= agree < args.min_agreement
+        rss = f"{r['rss_mb']:.0f}" if r["rss_mb"] is not None else "n/a"
+        print(f"{profile:>8} {r['load_time_s']:>8.2f} {rss:>8} {r['mean_ms']:>8.1f} "
+              f"{r['p95_ms']:>8.1f} {agree:>6.0%}")
+        for text, got, want in zip(UTTERANCES, r["intents"], reference):
+            if got != want:
+                print(f"    {text!r}: {got} (fp32: {want})")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
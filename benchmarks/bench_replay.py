@@ -0,0 +1,448 @@
+"""Offline replay benchmark: recorded commands through STT, intent extraction and skills.
+
+Each case in the manifest (``benchmarks/replay/cases.jsonl``) names a WAV
+recording (16 kHz, 16-bit; stereo is downmixed) plus the transcript, intent
+and target it should produce:
+
+    {"wav": "weather_london.wav", "text": "what's the weather in london",
+     "intent": "get_weather", "target": "london"}
+
+By default the transcripts go straight to ``extract_intent``, the skill
+executor and ``speak()``. TTS goes to a silent sink and network skills get
+a local stub HTTP client, so the run needs no microphone, speaker, network
+or Vosk model. ``--speculate`` first feeds each transcript word by word to
+the speculator, ``--word-ms`` apart, the way Vosk's partial transcripts
+arrive while the user speaks, and reports the speculation hit rate.
+
+``--audio`` replays the recordings instead: each one is pushed through the
+AudioEngine ring buffer with ``feed()`` and transcribed by
+``recognize_speech_vosk`` (``--model``), and the real-time factor of STT
+and of the whole pipeline is reported. With ``--speculate`` the speculator
+then sees Vosk's own partials. ``--remote-stt MS`` races Vosk against a
+stub remote recognizer that answers with the expected transcript after MS
+milliseconds.
+
+The committed recordings are synthesized by ``--make-fixtures``: one
+speech-shaped voiced burst per word, so Vosk does real work on audio of a
+realistic length and the RTF and latencies are meaningful, but WER and
+accuracy only mean something once they are replaced by real recordings
+under the same names.
+
+Reports per-stage latency and intent accuracy. With ``--save-baseline``
+the results are stored; later runs compare against the baseline of the
+same mode and exit non-zero when a stage or the RTF got slower than
+``--threshold``, or accuracy or WER got worse:
+
+    python benchmarks/bench_replay.py --save-baseline
+    python benchmarks/bench_replay.py
+    python benchmarks/bench_replay.py --audio --model model
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import wave
+import zlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import ego_core  # noqa: E402
+from ego_cache import ResponseCache  # noqa: E402
+from ego_skills import SkillContext, SkillError, SkillTimeout, SkillCancelled  # noqa: E402
+from ego_speculate import STABLE_PARTIALS  # noqa: E402
+from ego_startup import startup  # noqa: E402
+from ego_stt import SpeechRace  # noqa: E402
+from ego_tts import TTSWorker  # noqa: E402
+from ego_vad import END_SILENCE_MS  # noqa: E402
+from ego_wake import WakeDetection  # noqa: E402
+
+REPLAY_DIR = os.path.join(ROOT, "benchmarks", "replay")
+SKILLS_DIR = os.path.join(ROOT, "skills")
+STAGES = ("stt", "extract_intent", "skill", "speak", "total")
+# Built-ins act on the desktop (or exit); skills that do are listed here too.
+# Their intent is scored but nothing is dispatched.
+NOT_DISPATCHED = {"open_app", "web_search", "screenshot", "exit", "open_website"}
+MIN_REGRESSION_MS = 0.5     # ignore slowdowns smaller than this (timer noise)
+
+# Synthesized fixtures
+SAMPLE_RATE = 16000
+LEAD_SECONDS = 0.2          # room noise before the first word
+GAP_SECONDS = 0.08          # pause between words
+NOISE_LEVEL = 30.0          # room noise, int16 RMS
+VOICE_PEAK = 8000.0         # loudest voiced sample
+# First two formants (Hz) of the vowel that shapes each word.
+VOWEL_FORMANTS = {"a": (730, 1090), "e": (530, 1840), "i": (270, 2290),
+                  "o": (570, 840), "u": (300, 870), "y": (270, 2290)}
+
+
+# === Stubs ===
+class NullSink:
+    """A pyttsx3 stand-in that accepts everything and plays nothing."""
+    def say(self, text):
+        pass
+
+    def runAndWait(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+class StubResponse:
+    def __init__(self, text="", payload=None):
+        self.text = text
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+
+class StubHttpClient:
+    """Canned answers for the network skills, with optional simulated latency."""
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.requests = 0
+
+    def get(self, url, **kwargs):
+        self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if "wttr.in" in url:
+            city = url.split("/")[-1].split("?")[0]
+            return StubResponse(text=f"{city}: +12°C")
+        if "wikipedia.org" in url:
+            topic = kwargs.get("params", {}).get("gsrsearch", "")
+            extract = f"{topic} is the subject of a stub article. It has two sentences."
+            return StubResponse(payload={"query": {"pages": {"1": {"extract": extract}}}})
+        if "newsapi.org" in url:
+            articles = [{"title": f"Headline {i}"} for i in range(5)]
+            return StubResponse(payload={"status": "ok", "articles": articles})
+        raise ConnectionError(f"no stub for {url}")
+
+    def get_json(self, url, **kwargs):
+        return self.get(url, **kwargs).json()
+
+
+class StubRemoteRecognizer:
+    """Stands in for Google: returns the case's expected transcript after a delay."""
+    def __init__(self, latency=0.0, confidence=0.9):
+        self.latency = latency
+        self.confidence = confidence
+        self.text = ""
+        self.calls = 0
+
+    def expect(self, text):
+        self.text = text
+
+    def __call__(self, pcm, samplerate):
+        self.calls += 1
+        time.sleep(self.latency)
+        return self.text, self.confidence
+
+
+# === Fixtures ===
+def load_cases(replay_dir):
+    path = os.path.join(replay_dir, "cases.jsonl")
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def read_wav(path, samplerate):
+    """Return ``(int16 mono PCM bytes, duration in seconds)``."""
+    import numpy as np
+
+    with wave.open(path, "rb") as f:
+        if f.getsampwidth() != 2:
+            raise ValueError(f"{path}: expected 16-bit samples")
+        if f.getframerate() != samplerate:
+            raise ValueError(f"{path}: expected {samplerate} Hz, got {f.getframerate()} Hz")
+        pcm = np.frombuffer(f.readframes(f.getnframes()), dtype="<i2")
+        channels = f.getnchannels()
+    if channels > 1:
+        pcm = pcm.reshape(-1, channels).mean(axis=1).astype("<i2")
+    return pcm.tobytes(), len(pcm) / samplerate
+
+
+def synthesize(text, samplerate=SAMPLE_RATE):
+    """A speech-shaped stand-in for a recording of ``text`` as int16 PCM.
+
+    Each word becomes a voiced burst (a falling 110-150 Hz pitch whose
+    harmonics are shaped by the formants of the word's first vowel) about
+    as long as the word takes to say, over a little room noise, followed by
+    enough silence for the endpointer to close the utterance. The same text
+    always gives the same samples.
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(zlib.crc32(text.encode("utf-8")))
+
+    def noise(seconds):
+        return rng.normal(0.0, NOISE_LEVEL, int(seconds * samplerate))
+
+    parts = [noise(LEAD_SECONDS)]
+    for word in text.split():
+        n = int(min(max(0.07 * len(word), 0.15), 0.45) * samplerate)
+        t = np.arange(n) / samplerate
+        f0 = rng.uniform(110.0, 150.0) * (1.0 - 0.15 * t / t[-1])
+        phase = 2 * np.pi * np.cumsum(f0) / samplerate
+        f1, f2 = VOWEL_FORMANTS[next((c for c in word if c in VOWEL_FORMANTS), "a")]
+        voiced = np.zeros(n)
+        for k in range(1, 30):
+            f = k * f0
+            gain = 1 / (1 + ((f - f1) / 90) ** 2) + 0.5 / (1 + ((f - f2) / 140) ** 2)
+            voiced += gain * np.sin(k * phase)
+        voiced *= np.hanning(n) * VOICE_PEAK / np.abs(voiced).max()
+        parts += [voiced + noise(n / samplerate), noise(GAP_SECONDS)]
+    parts.append(noise(END_SILENCE_MS / 1000 + 0.1))
+    return np.clip(np.concatenate(parts), -32768, 32767).astype("<i2").tobytes()
+
+
+def make_fixtures(cases, replay_dir, overwrite=False):
+    """Write a synthesized WAV for every case whose recording is missing."""
+    written = 0
+    for case in cases:
+        path = os.path.join(replay_dir, case["wav"])
+        if os.path.exists(path) and not overwrite:
+            continue
+        with wave.open(path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(SAMPLE_RATE)
+            f.writeframes(synthesize(case["text"]))
+        written += 1
+    return written
+
+
+def word_errors(reference, hypothesis):
+    """Word-level edit distance between two transcripts."""
+    ref, hyp = reference.lower().split(), hypothesis.lower().split()
+    row = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        prev, row[0] = row[0], i
+        for j, h in enumerate(hyp, 1):
+            prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev + (r != h))
+    return row[-1], len(ref)
+
+
+# === Replay ===
+def setup(args):
+    """Swap in the null TTS sink, the stub network and, with ``--audio``,
+    a device-less audio engine, which is returned."""
+    startup.register("tts", lambda: TTSWorker(NullSink))
+    http = StubHttpClient(args.network_latency / 1000)
+    cache = ResponseCache(path=None)
+    ego_core.skill_executor.make_context = lambda job: SkillContext(http=http, cache=cache,
+                                                                     cancel_event=job.cancel_event)
+    ego_core.load_skills(SKILLS_DIR)
+    remote = StubRemoteRecognizer(args.remote_stt / 1000) if args.remote_stt is not None else None
+    ego_core.speech_race = SpeechRace(remote=remote)
+    if args.llm:
+        ego_core.load_llm()
+    if not args.audio:
+        return None
+    try:
+        from ego_audio import AudioEngine
+        audio = AudioEngine(args.model, buffer_seconds=120)
+        audio.load_model()
+    except Exception as e:
+        sys.exit(f"Cannot load the Vosk model from {args.model!r} ({e})")
+    startup.register("audio", lambda: audio)
+    return audio
+
+
+def speak_partials(utterance, text, word_ms):
+    """Feed ``text`` to the speculator one word at a time, each partial
+    repeated as Vosk repeats an unchanged hypothesis."""
+    words = text.split()
+    for n in range(1, len(words)):
+        for _ in range(STABLE_PARTIALS):
+            ego_core.speculator.feed(utterance, " ".join(words[:n]))
+        time.sleep(word_ms / 1000)
+
+
+def replay_case(case, audio=None, replay_dir=REPLAY_DIR, speculate=False, word_ms=0.0):
+    timings = {}
+    utterance = ego_core.speculator.begin() if speculate else None
+    if audio is None:
+        text, duration = case["text"], None
+        if speculate:
+            speak_partials(utterance, text, word_ms)
+        start = time.perf_counter()
+    else:
+        pcm, duration = read_wav(os.path.join(replay_dir, case["wav"]), audio.samplerate)
+        cursor = audio.feed(pcm)
+        if ego_core.speech_race.remote is not None:
+            ego_core.speech_race.remote.expect(case["text"])
+        start = time.perf_counter()
+        text = ego_core.recognize_speech_vosk(detection=WakeDetection("replay", 1.0, 0.0, cursor, 0),
+                                              utterance=utterance)
+        timings["stt"] = time.perf_counter() - start
+
+    t = time.perf_counter()
+    intent_data = ego_core.extract_intent(text)
+    timings["extract_intent"] = time.perf_counter() - t
+    intent, target = intent_data.get("intent"), intent_data.get("target")
+
+    outcome = "not_dispatched"
+    if intent and intent not in NOT_DISPATCHED and ego_core.skill_registry.handles(intent):
+        t = time.perf_counter()
+        try:
+            result = ego_core.run_skill(intent, target, utterance)
+            outcome = "ok" if result else "unhandled"
+        except SkillError as e:
+            result, outcome = None, f"error: {e.__cause__}"
+        except (SkillTimeout, SkillCancelled) as e:
+            result, outcome = None, type(e).__name__
+        timings["skill"] = time.perf_counter() - t
+        if isinstance(result, str):
+            t = time.perf_counter()
+            ego_core.speak(result).wait()
+            timings["speak"] = time.perf_counter() - t
+    if utterance is not None:
+        ego_core.speculator.discard(utterance)
+    timings["total"] = time.perf_counter() - start
+
+    return {
+        "wav": case.get("wav"),
+        "text": text,
+        "duration": duration,
+        "intent": intent,
+        "target": target,
+        "intent_ok": intent == case.get("intent"),
+        "target_ok": (target or "").lower() == (case.get("target") or "").lower(),
+        "word_errors": word_errors(case["text"], text),
+        "outcome": outcome,
+        "timings": timings,
+    }
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def mode_name(audio, speculate):
+    return ("audio" if audio else "text") + ("-speculate" if speculate else "")
+
+
+def summarize(results, mode):
+    summary = {"mode": mode, "cases": len(results)}
+    for stage in STAGES:
+        values = sorted(r["timings"][stage] * 1000 for r in results if stage in r["timings"])
+        if values:
+            summary[f"{stage}_p50_ms"] = percentile(values, 0.50)
+            summary[f"{stage}_p95_ms"] = percentile(values, 0.95)
+    summary["intent_accuracy"] = sum(r["intent_ok"] for r in results) / len(results)
+    summary["target_accuracy"] = sum(r["target_ok"] for r in results) / len(results)
+    errors = sum(r["word_errors"][0] for r in results)
+    words = sum(r["word_errors"][1] for r in results)
+    summary["wer"] = errors / words if words else 0.0
+    audio_seconds = sum(r["duration"] or 0 for r in results)
+    if audio_seconds:
+        summary["rtf"] = sum(r["timings"]["stt"] for r in results) / audio_seconds
+        summary["pipeline_rtf"] = sum(r["timings"]["total"] for r in results) / audio_seconds
+    return summary
+
+
+def compare(summary, baseline, threshold):
+    """Regressions of ``summary`` against ``baseline`` as human-readable strings."""
+    if baseline.get("mode") != summary["mode"]:
+        return [f"baseline was recorded in {baseline.get('mode')} mode, this run is {summary['mode']}"]
+    regressions = []
+    for key, value in summary.items():
+        old = baseline.get(key)
+        if old is None or not isinstance(value, float):
+            continue
+        if key.endswith("_ms") and value > old * (1 + threshold) and value - old > MIN_REGRESSION_MS:
+            regressions.append(f"{key}: {old:.2f} -> {value:.2f} ms")
+        elif key.endswith("rtf") and value > old * (1 + threshold):
+            regressions.append(f"{key}: {old:.3f} -> {value:.3f}")
+        elif key.endswith("accuracy") and value < old:
+            regressions.append(f"{key}: {old:.1%} -> {value:.1%}")
+        elif key == "wer" and value > old:
+            regressions.append(f"wer: {old:.1%} -> {value:.1%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--replay-dir", default=REPLAY_DIR, help="directory holding cases.jsonl and the WAVs")
+    parser.add_argument("--make-fixtures", action="store_true",
+                        help="synthesize the recordings missing from the replay dir and exit")
+    parser.add_argument("--audio", action="store_true",
+                        help="replay the recordings through Vosk instead of the transcripts")
+    parser.add_argument("--model", default="model", help="Vosk model directory for --audio")
+    parser.add_argument("--remote-stt", type=float, metavar="MS",
+                        help="with --audio, race Vosk against a stub remote recognizer answering after MS ms")
+    parser.add_argument("--llm", action="store_true", help="load the LLM fallback for unmatched commands")
+    parser.add_argument("--speculate", action="store_true", help="start read-only skills from partial transcripts")
+    parser.add_argument("--word-ms", type=float, default=250.0,
+                        help="ms between partial transcripts with --speculate (text mode)")
+    parser.add_argument("--network-latency", type=float, default=0.0, help="simulated ms per stub HTTP request")
+    parser.add_argument("--baseline", help="baseline file (default: baseline-<mode>.json in the replay dir)")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="fail when a stage latency or real-time factor is this fraction above the baseline")
+    parser.add_argument("--verbose", action="store_true", help="print every case")
+    args = parser.parse_args()
+
+    cases = load_cases(args.replay_dir)
+    if args.make_fixtures:
+        print(f"{make_fixtures(cases, args.replay_dir)} recordings written to {args.replay_dir}")
+        return
+    audio = setup(args)
+    results = []
+    for case in cases:
+        if audio is not None and not os.path.exists(os.path.join(args.replay_dir, case["wav"])):
+            print(f"skipping {case['wav']}: recording not found (see --make-fixtures)")
+            continue
+        results.append(replay_case(case, audio, args.replay_dir, args.speculate, args.word_ms))
+        if args.verbose:
+            r = results[-1]
+            mark = "ok " if r["intent_ok"] else "BAD"
+            print(f"{mark} {r['text']!r:45} -> {r['intent']} ({r['target']}) {r['outcome']}")
+    if not results:
+        sys.exit("no cases could be replayed")
+
+    summary = summarize(results, mode_name(args.audio, args.speculate))
+    print(f"{summary['cases']} cases ({summary['mode']} mode)")
+    for stage in STAGES:
+        if f"{stage}_p50_ms" in summary:
+            print(f"  {stage:<16} p50 {summary[f'{stage}_p50_ms']:8.2f} ms   p95 {summary[f'{stage}_p95_ms']:8.2f} ms")
+    if "rtf" in summary:
+        print(f"  real-time factor  STT {summary['rtf']:.3f}   whole pipeline {summary['pipeline_rtf']:.3f}")
+    print(f"  intent accuracy {summary['intent_accuracy']:.1%}   target accuracy {summary['target_accuracy']:.1%}"
+          f"   WER {summary['wer']:.1%}")
+    if args.speculate:
+        spec = ego_core.speculator.stats()
+        hit_rate = f"{spec['hit_rate']:.0%}" if spec["hit_rate"] is not None else "n/a"
+        print(f"  speculation     {spec['speculations']} started, {spec['hits']} hits, {spec['misses']} misses "
+              f"(hit rate {hit_rate}), {spec['saved_ms_total']:.0f} ms saved")
+    if ego_core.speech_race.remote is not None:
+        race = ego_core.speech_race.stats()
+        print(f"  STT race        {race['races']} races, Vosk won {race['wins']['vosk']}, "
+              f"remote won {race['wins']['remote']}, remote late {race['remote_timeouts']}")
+
+    baseline_path = args.baseline or os.path.join(args.replay_dir, f"baseline-{summary['mode']}.json")
+    if args.save_baseline:
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        print(f"baseline saved to {baseline_path}")
+        return
+    if not os.path.exists(baseline_path):
+        print(f"no baseline at {baseline_path}; run with --save-baseline to create one")
+        return
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        regressions = compare(summary, json.load(f), args.threshold)
+    if regressions:
+        print("REGRESSIONS against baseline:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print("no regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
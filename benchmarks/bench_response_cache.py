@@ -0,0 +1,88 @@
+"""Benchmark: response cache against a local HTTP stand-in.
+
+Starts a deliberately slow HTTP server on localhost, then fetches through
+ResponseCache to show miss, hit and stale-while-revalidate latency and the
+number of requests that actually reached the server. Run from the
+repository root:
+
+    python benchmarks/bench_response_cache.py [--delay 0.3]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ego_cache import ResponseCache  # noqa: E402
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    delay = 0.3
+    hits = 0
+
+    def do_GET(self):
+        type(self).hits += 1
+        time.sleep(self.delay)
+        body = f"{self.path.strip('/')}: +21C ({type(self).hits})".encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    value = fn()
+    print(f"  {label:<28} {(time.perf_counter() - start) * 1000:8.1f} ms  -> {value}")
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--delay", type=float, default=0.3, help="server response delay in seconds")
+    args = parser.parse_args()
+
+    SlowHandler.delay = args.delay
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    def fetch(city):
+        with urllib.request.urlopen(f"{base}/{city}", timeout=5) as r:
+            return r.read().decode()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResponseCache(os.path.join(tmp, "cache.sqlite3"), max_entries=2)
+        cache.set_policy("weather", ttl=1.0, stale_ttl=10.0)
+        get = lambda city: cache.get_or_fetch("weather", city, lambda: fetch(city))  # noqa: E731
+
+        print("weather cache, ttl 1s, stale window 10s, 2 entries:")
+        timed("miss (london)", lambda: get("london"))
+        timed("fresh hit (london)", lambda: get("london"))
+        time.sleep(1.1)
+        timed("stale hit (london)", lambda: get("london"))
+        time.sleep(args.delay + 0.2)
+        timed("refreshed hit (london)", lambda: get("london"))
+        timed("miss (paris)", lambda: get("paris"))
+        timed("miss (tokyo), evicts LRU", lambda: get("tokyo"))
+
+        reopened = ResponseCache(cache.path, max_entries=2)
+        reopened.set_policy("weather", ttl=60, stale_ttl=60)
+        timed("reopened cache, disk hit", lambda: reopened.get_or_fetch("weather", "tokyo", lambda: fetch("tokyo")))
+
+        print(f"server requests: {SlowHandler.hits}")
+        print(f"stats: {cache.stats()}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Load generator for ego_server: how many concurrent sessions fit under a latency target.
+
+Opens N client sessions against a running server, each sending the replay
+commands (``benchmarks/replay/cases.jsonl``) in a loop with some think time
+between them, and measures the time from the end of each command to its
+reply. N doubles each step (1, 2, 4, ...) until the p95 latency passes
+``--target-p95`` or the server starts turning sessions away, then bisects
+between the last good and first bad step. With ``--audio`` the recordings
+are streamed as PCM instead of sending the transcripts as text (run
+``bench_replay.py --make-fixtures`` first if they are missing).
+
+    python ego_server.py &
+    python benchmarks/bench_server_load.py --target-p95 250
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_replay import REPLAY_DIR, load_cases, read_wav  # noqa: E402
+from ego_server import HOST, PORT, SAMPLE_RATE, TEXT, AUDIO, END, read_frame, write_frame  # noqa: E402
+
+AUDIO_CHUNK = 3200          # bytes per audio frame (100 ms at 16 kHz)
+
+
+class Rejected(Exception):
+    pass
+
+
+async def client(host, port, commands, until, think, latencies, errors):
+    """One session: send commands until ``until`` (loop time), recording reply latency."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        _, payload = await read_frame(reader)
+        hello = json.loads(payload)
+        if hello.get("type") == "error":
+            raise Rejected(hello["error"])
+        loop = asyncio.get_running_loop()
+        rng = random.Random()
+        while loop.time() < until:
+            kind, data = rng.choice(commands)
+            if kind == TEXT:
+                write_frame(writer, TEXT, data)
+            else:
+                for i in range(0, len(data), AUDIO_CHUNK):
+                    write_frame(writer, AUDIO, data[i:i + AUDIO_CHUNK])
+                write_frame(writer, END, b"")
+            await writer.drain()
+            sent = time.perf_counter()
+            _, payload = await read_frame(reader)
+            reply = json.loads(payload)
+            if reply.get("type") == "error":
+                errors.append(reply["error"])
+            else:
+                latencies.append((time.perf_counter() - sent) * 1000)
+            await asyncio.sleep(rng.uniform(0.5, 1.5) * think)
+    finally:
+        writer.close()
+
+
+async def run_step(args, commands, sessions):
+    latencies, errors = [], []
+    until = asyncio.get_running_loop().time() + args.duration
+    results = await asyncio.gather(*(client(args.host, args.port, commands, until, args.think,
+                                            latencies, errors) for _ in range(sessions)),
+                                   return_exceptions=True)
+    rejected = sum(isinstance(r, Rejected) for r in results)
+    failed = [r for r in results if isinstance(r, Exception) and not isinstance(r, Rejected)]
+    latencies.sort()
+    p = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] if latencies else float("inf")  # noqa: E731
+    return {"sessions": sessions, "replies": len(latencies), "p50_ms": p(0.50), "p95_ms": p(0.95),
+            "rejected": rejected, "errors": len(errors) + len(failed)}
+
+
+def load_commands(args):
+    cases = load_cases(args.replay_dir)
+    if not args.audio:
+        return [(TEXT, case["text"].encode("utf-8")) for case in cases]
+    commands = []
+    for case in cases:
+        path = os.path.join(args.replay_dir, case["wav"])
+        if os.path.exists(path):
+            pcm, _ = read_wav(path, SAMPLE_RATE)
+            commands.append((AUDIO, pcm))
+    if not commands:
+        sys.exit("no recordings found for --audio (see bench_replay.py --make-fixtures)")
+    return commands
+
+
+async def ramp(args, commands):
+    def ok(step):
+        return step["p95_ms"] <= args.target_p95 and not step["rejected"] and not step["errors"]
+
+    def show(step):
+        mark = "ok " if ok(step) else "over"
+        print(f"  {step['sessions']:>5} sessions  {step['replies']:>6} replies  p50 {step['p50_ms']:8.1f} ms  "
+              f"p95 {step['p95_ms']:8.1f} ms  rejected {step['rejected']}  errors {step['errors']}  {mark}")
+
+    good, bad, n = 0, None, 1
+    while n <= args.max_sessions:
+        step = await run_step(args, commands, n)
+        show(step)
+        if not ok(step):
+            bad = n
+            break
+        good, n = n, n * 2
+    while bad is not None and bad - good > 1:
+        n = (good + bad) // 2
+        step = await run_step(args, commands, n)
+        show(step)
+        if ok(step):
+            good = n
+        else:
+            bad = n
+    return good
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--replay-dir", default=REPLAY_DIR, help="directory holding cases.jsonl and the WAVs")
+    parser.add_argument("--audio", action="store_true", help="stream the recordings instead of sending text")
+    parser.add_argument("--target-p95", type=float, default=300.0, help="p95 reply latency budget in ms")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per load step")
+    parser.add_argument("--think", type=float, default=1.0, help="mean seconds between a session's commands")
+    parser.add_argument("--max-sessions", type=int, default=256, help="stop ramping here")
+    args = parser.parse_args()
+
+    commands = load_commands(args)
+    print(f"Ramping sessions against {args.host}:{args.port} (p95 target {args.target_p95:.0f} ms, "
+          f"{'audio' if args.audio else 'text'} commands)")
+    best = asyncio.run(ramp(args, commands))
+    print(f"max sessions with p95 <= {args.target_p95:.0f} ms: {best}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+# ego_audio.py
+#
+# Long-lived audio engine: the Vosk model is loaded once, a single input
+# stream feeds a bounded ring buffer, and recognizers are reset between
+# utterances instead of being rebuilt. sounddevice is only imported when a
+# live stream is opened, so recordings can be replayed on machines without
+# audio devices.
+
+import collections
+import threading
+import time
+
+from vosk import Model, KaldiRecognizer
+
+from ego_vad import VoiceActivityDetector
+
+SAMPLE_RATE = 16000
+BLOCK_SIZE = 4000          # 250 ms of int16 mono audio per frame
+BUFFER_SECONDS = 10        # how much audio the ring buffer keeps
+
+
+def find_input_device():
+    """Pick an input device, preferring anything that looks like a real microphone."""
+    import sounddevice as sd
+    devices = sd.query_devices()
+    input_devices = [d for d in devices if d['max_input_channels'] > 0]
+    if not input_devices:
+        raise ValueError("No input audio devices found.")
+    for d in input_devices:
+        if 'microphone' in d['name'].lower() or 'headset' in d['name'].lower():
+            print(f"Using device: {d['name']}")
+            return d['index']
+    return input_devices[0]['index']  # Fallback to the first one
+
+
+class AudioEngine:
+    """One model, one input stream, many readers.
+
+    Frames captured by the stream callback are appended to a ring buffer and
+    numbered with an ever-increasing sequence number. Readers keep their own
+    cursor into that sequence, so several consumers (wake word spotter,
+    command recognizer) can share the same stream without stealing frames
+    from each other.
+    """
+
+    def __init__(self, model_path="model", samplerate=SAMPLE_RATE,
+                 blocksize=BLOCK_SIZE, buffer_seconds=BUFFER_SECONDS):
+        self.model_path = model_path
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        maxlen = max(1, int(buffer_seconds * samplerate / blocksize))
+        self._frames = collections.deque(maxlen=maxlen)
+        self._times = collections.deque(maxlen=maxlen)
+        self._activity = collections.deque(maxlen=maxlen)
+        self.vad = VoiceActivityDetector(samplerate)
+        self._next_seq = 0
+        self._cond = threading.Condition()
+        self._recognizers = {}
+        self._stream = None
+        self._closed = False
+        self.model = None
+        self.device_index = None
+        self.overruns = 0
+
+    # --- lifecycle ---
+    def load_model(self):
+        if self.model is None:
+            self.model = Model(self.model_path)
+        return self.model
+
+    def start(self):
+        if self._stream is not None:
+            return
+        import sounddevice as sd
+        self._closed = False
+        self.load_model()
+        if self.device_index is None:
+            self.device_index = find_input_device()
+        self._stream = sd.RawInputStream(samplerate=self.samplerate, blocksize=self.blocksize,
+                                         dtype='int16', channels=1, callback=self._callback,
+                                         device=self.device_index)
+        self._stream.start()
+
+    def stop(self):
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def running(self):
+        return self._stream is not None
+
+    def _callback(self, indata, frames, time_info, status):
+        if status:
+            print(status, flush=True)
+        self.push(bytes(indata))
+
+    def push(self, data):
+        """Append one frame of int16 PCM to the ring buffer.
+
+        The VAD runs here, on every captured frame, so its noise floor is
+        always current by the time anyone starts listening.
+        """
+        mask = self.vad.analyse(data)
+        with self._cond:
+            self._frames.append(data)
+            self._times.append(time.monotonic())
+            self._activity.append(mask)
+            self._next_seq += 1
+            self._cond.notify_all()
+
+    def feed(self, pcm):
+        """Replay a whole recording (int16 mono PCM at ``samplerate``) through
+        the buffer without a live stream. Readers drain it and then see the
+        end of input instead of waiting for more. Returns the cursor of its
+        first frame."""
+        with self._cond:
+            self._closed = False
+            start = self._next_seq
+        step = self.blocksize * 2
+        for i in range(0, len(pcm), step):
+            self.push(pcm[i:i + step])
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        return start
+
+    # --- readers ---
+    def cursor(self):
+        """Sequence number of the next frame to be captured."""
+        with self._cond:
+            return self._next_seq
+
+    def frame_time(self, seq):
+        """Monotonic time at which frame ``seq`` finished capturing, or None if dropped."""
+        with self._cond:
+            oldest = self._next_seq - len(self._times)
+            if oldest <= seq < self._next_seq:
+                return self._times[seq - oldest]
+            return None
+
+    def activity(self, seq):
+        """VAD speech mask (one bool per subframe) for frame ``seq``, or None if dropped."""
+        with self._cond:
+            oldest = self._next_seq - len(self._activity)
+            if oldest <= seq < self._next_seq:
+                return self._activity[seq - oldest]
+            return None
+
+    def read(self, cursor, timeout=None):
+        """Return ``(frame, next_cursor)`` for the frame at ``cursor``.
+
+        Blocks until the frame is available. If the reader fell so far behind
+        that the frame was already dropped from the ring buffer, it skips to
+        the oldest frame still held. Returns ``(None, cursor)`` on timeout.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._next_seq > cursor or self._closed,
+                                       timeout=timeout):
+                return None, cursor
+            if self._next_seq <= cursor:
+                return None, cursor  # stream stopped
+            oldest = self._next_seq - len(self._frames)
+            if cursor < oldest:
+                self.overruns += 1
+                cursor = oldest
+            return self._frames[cursor - oldest], cursor + 1
+
+    def recognizer(self, name="command", grammar=None):
+        """Return a cached KaldiRecognizer, reset and ready for a new utterance."""
+        rec = self._recognizers.get(name)
+        if rec is None:
+            model = self.load_model()
+            if grammar is not None:
+                rec = KaldiRecognizer(model, self.samplerate, grammar)
+            else:
+                rec = KaldiRecognizer(model, self.samplerate)
+            self._recognizers[name] = rec
+        else:
+            rec.Reset()
+        return rec
+
+
+# === Shared engine ===
+_engine = None
+_engine_lock = threading.Lock()
+_engine_error = None
+
+
+def get_audio_engine(model_path="model"):
+    """Return the process-wide audio engine, starting it on first use.
+
+    Returns None if the model or the input device cannot be opened; the
+    failure is remembered so callers in a loop don't retry every time.
+    """
+    global _engine, _engine_error
+    with _engine_lock:
+        if _engine is not None:
+            return _engine
+        if _engine_error is not None:
+            return None
+        engine = AudioEngine(model_path)
+        try:
+            engine.start()
+        except Exception as e:
+            print(f"Could not start audio engine from {model_path}: {e}")
+            _engine_error = e
+            return None
+        _engine = engine
+        return _engine
@@ -0,0 +1,222 @@
+# ego_batch.py
+#
+# Batch transcription and intent labelling of recorded commands. WAV or raw
+# PCM files are memory-mapped and streamed through Vosk in chunks on a pool
+# of worker processes, each of which loads the model once. Every transcript
+# also goes through extract_intent, and results are appended to a JSONL file
+# as they finish, so an interrupted run picks up where it stopped.
+#
+#     python ego_batch.py recordings/ -o labels.jsonl -j 8
+
+import argparse
+import json
+import mmap
+import multiprocessing
+import os
+import struct
+import sys
+import time
+
+AUDIO_EXTENSIONS = (".wav", ".pcm", ".raw")
+CHUNK_MS = 500              # audio fed to Vosk per AcceptWaveform call
+PCM_RATE = 16000            # sample rate assumed for headerless .pcm/.raw files
+PROGRESS_EVERY = 100        # files between progress lines
+
+
+# === Input ===
+def find_audio_files(paths):
+    """Every audio file under ``paths`` (files or directories), sorted."""
+    found = []
+    for path in paths:
+        if os.path.isfile(path):
+            found.append(os.path.abspath(path))
+            continue
+        for root, _, files in os.walk(path):
+            for name in files:
+                if name.lower().endswith(AUDIO_EXTENSIONS):
+                    found.append(os.path.abspath(os.path.join(root, name)))
+    return sorted(found)
+
+
+def wav_data(buf):
+    """Locate the PCM payload of a RIFF/WAVE file held in ``buf``.
+
+    Returns ``(data memoryview, samplerate, channels, sample width)`` without
+    copying the samples.
+    """
+    if buf[:4] != b"RIFF" or buf[8:12] != b"WAVE":
+        raise ValueError("not a RIFF/WAVE file")
+    pos, fmt = 12, None
+    while pos + 8 <= len(buf):
+        chunk_id, size = buf[pos:pos + 4], struct.unpack_from("<I", buf, pos + 4)[0]
+        body = pos + 8
+        if chunk_id == b"fmt ":
+            audio_format, channels, rate, _, _, bits = struct.unpack_from("<HHIIHH", buf, body)
+            if audio_format != 1:
+                raise ValueError(f"unsupported WAV encoding {audio_format} (PCM only)")
+            fmt = (rate, channels, bits // 8)
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("data chunk before fmt chunk")
+            end = min(body + size, len(buf))
+            return (memoryview(buf)[body:end],) + fmt
+        pos = body + size + (size & 1)
+    raise ValueError("no data chunk")
+
+
+# === Worker process ===
+_model = None
+_recognizers = {}           # samplerate -> KaldiRecognizer
+_extract_intent = None
+
+
+def _init_worker(model_path, load_llm):
+    """Runs once in each worker: load the Vosk model and the intent tiers."""
+    global _model
+    from vosk import Model, SetLogLevel
+    SetLogLevel(-1)
+    _model = Model(model_path)
+    _init_intents(load_llm)
+
+
+def _init_intents(load_llm):
+    """Use the full extract_intent with the LLM, or only the rules and the
+    classifier without it, so nothing on the extract path loads the model."""
+    global _extract_intent
+    import ego_core
+    if load_llm:
+        ego_core.load_llm()
+        _extract_intent = ego_core.extract_intent
+        return
+
+    def extract_without_llm(text):
+        match, _ = ego_core.match_intent(text)
+        return match or {"intent": None, "target": None}
+
+    _extract_intent = extract_without_llm
+
+
+def _recognizer(samplerate):
+    from vosk import KaldiRecognizer
+    rec = _recognizers.get(samplerate)
+    if rec is None:
+        rec = _recognizers[samplerate] = KaldiRecognizer(_model, samplerate)
+    else:
+        rec.Reset()
+    return rec
+
+
+def transcribe(path, pcm_rate=PCM_RATE, chunk_ms=CHUNK_MS):
+    """Transcribe and label one file. Errors are reported in the record."""
+    start = time.perf_counter()
+    record = {"path": path}
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if path.lower().endswith(".wav"):
+                data, rate, channels, width = wav_data(mm)
+            else:
+                data, rate, channels, width = memoryview(mm), pcm_rate, 1, 2
+            try:
+                if channels != 1 or width != 2:
+                    raise ValueError(f"expected 16-bit mono, got {channels} channel(s) of {width * 8}-bit")
+                record["duration_s"] = len(data) / (rate * 2)
+                rec = _recognizer(rate)
+                step = rate * 2 * chunk_ms // 1000
+                parts = []
+                for i in range(0, len(data), step):
+                    if rec.AcceptWaveform(bytes(data[i:i + step])):
+                        parts.append(json.loads(rec.Result()).get("text", ""))
+                parts.append(json.loads(rec.FinalResult()).get("text", ""))
+            finally:
+                data.release()  # the mmap can't close while a view is alive
+        text = " ".join(p for p in parts if p)
+        record["text"] = text
+        intent = _extract_intent(text) if text else {"intent": None, "target": None}
+        record["intent"] = intent.get("intent")
+        record["target"] = intent.get("target")
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["processing_s"] = time.perf_counter() - start
+    return record
+
+
+def _transcribe_job(job):
+    return transcribe(*job)
+
+
+# === Output / resume ===
+def completed_paths(output, retry_errors=False):
+    """Paths already in ``output`` (minus failed ones if ``retry_errors``). A
+    line cut short by an interruption is truncated away so new results start
+    on a clean line."""
+    done = set()
+    if not os.path.exists(output):
+        return done
+    with open(output, "rb+") as f:
+        good_end = 0
+        for line in f:
+            try:
+                record = json.loads(line)
+                if not (retry_errors and "error" in record):
+                    done.add(record["path"])
+            except (ValueError, KeyError):
+                break
+            good_end += len(line)
+        f.truncate(good_end)
+    return done
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcribe and intent-label recorded commands in bulk.")
+    parser.add_argument("inputs", nargs="+", help="WAV/PCM files or directories to search")
+    parser.add_argument("-o", "--output", default="batch_results.jsonl", help="JSONL file results are appended to")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--model", default="model", help="Vosk model directory")
+    parser.add_argument("--pcm-rate", type=int, default=PCM_RATE, help="sample rate of headerless .pcm/.raw files")
+    parser.add_argument("--chunk-ms", type=int, default=CHUNK_MS, help="audio per Vosk call")
+    parser.add_argument("--llm", action="store_true", help="load the LLM fallback in every worker (memory heavy)")
+    parser.add_argument("--restart", action="store_true", help="ignore existing results and start over")
+    parser.add_argument("--retry-errors", action="store_true", help="reprocess files whose earlier attempt failed")
+    args = parser.parse_args()
+
+    files = find_audio_files(args.inputs)
+    if args.restart and os.path.exists(args.output):
+        os.remove(args.output)
+    done = completed_paths(args.output, args.retry_errors)
+    todo = [p for p in files if p not in done]
+    print(f"{len(files)} files, {len(files) - len(todo)} already done, {len(todo)} to go, "
+          f"{args.jobs} workers", file=sys.stderr)
+    if not todo:
+        return
+
+    # Largest files first so one long recording doesn't finish the run alone.
+    todo.sort(key=os.path.getsize, reverse=True)
+    jobs = [(p, args.pcm_rate, args.chunk_ms) for p in todo]
+    start = time.perf_counter()
+    processed = errors = 0
+    audio_s = busy_s = 0.0
+    with open(args.output, "a", encoding="utf-8") as out, \
+            multiprocessing.Pool(args.jobs, initializer=_init_worker, initargs=(args.model, args.llm)) as pool:
+        for record in pool.imap_unordered(_transcribe_job, jobs):
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            processed += 1
+            errors += "error" in record
+            audio_s += record.get("duration_s", 0.0)
+            busy_s += record["processing_s"]
+            if processed % PROGRESS_EVERY == 0:
+                elapsed = time.perf_counter() - start
+                print(f"  {processed}/{len(todo)} files, {processed / elapsed:.1f} files/s", file=sys.stderr)
+
+    elapsed = time.perf_counter() - start
+    print(f"{processed} files in {elapsed:.1f} s: {processed / elapsed:.2f} files/s, {errors} errors",
+          file=sys.stderr)
+    if audio_s:
+        # Per-worker RTF is CPU time per second of audio; throughput is how
+        # many seconds of audio the whole pool gets through per wall second.
+        print(f"  {audio_s:.0f} s of audio, per-worker RTF {busy_s / audio_s:.3f}, "
+              f"throughput {audio_s / elapsed:.1f}x real time", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
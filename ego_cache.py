@@ -0,0 +1,203 @@
+# ego_cache.py
+#
+# Shared response cache for network skills: an in-memory LRU in front of a
+# small SQLite file, per-namespace TTLs, stale-while-revalidate and optional
+# prefetch of the most frequently asked queries.
+
+import collections
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+CACHE_FILE = "response_cache.sqlite3"
+MAX_ENTRIES = 512
+DEFAULT_TTL = 300           # seconds an entry is fresh
+DEFAULT_STALE_TTL = 3600    # further seconds a stale entry may still be served
+
+
+class CacheEntry:
+    __slots__ = ("value", "stored_at")
+
+    def __init__(self, value, stored_at):
+        self.value = value
+        self.stored_at = stored_at
+
+
+class ResponseCache:
+    def __init__(self, path=CACHE_FILE, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._memory = collections.OrderedDict()     # (namespace, key) -> CacheEntry
+        self._policies = {}                          # namespace -> (ttl, stale_ttl)
+        self._fetchers = {}                          # (namespace, key) -> last fetch callable
+        self._requests = collections.Counter()       # (namespace, key) -> times asked
+        self._refreshing = set()
+        self._lock = threading.RLock()
+        self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ego-cache")
+        self._db = None
+        self._prefetch_thread = None
+        self.counters = collections.Counter()
+        self.timings = collections.defaultdict(float)  # total seconds per outcome
+
+    # --- storage ---
+    def _conn(self):
+        if self._db is None and self.path:
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS responses (namespace TEXT, key TEXT, "
+                             "value TEXT, stored_at REAL, accessed_at REAL, "
+                             "PRIMARY KEY (namespace, key))")
+        return self._db
+
+    def _load(self, ident):
+        db = self._conn()
+        if db is None:
+            return None
+        row = db.execute("SELECT value, stored_at FROM responses WHERE namespace=? AND key=?",
+                         ident).fetchone()
+        if row is None:
+            return None
+        db.execute("UPDATE responses SET accessed_at=? WHERE namespace=? AND key=?",
+                   (time.time(),) + ident)
+        db.commit()
+        return CacheEntry(json.loads(row[0]), row[1])
+
+    def _store(self, ident, entry):
+        self._remember(ident, entry)
+        db = self._conn()
+        if db is None:
+            return
+        db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                   ident + (json.dumps(entry.value), entry.stored_at, time.time()))
+        db.execute("DELETE FROM responses WHERE rowid IN (SELECT rowid FROM responses "
+                   "ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+        db.commit()
+
+    def _remember(self, ident, entry):
+        self._memory[ident] = entry
+        self._memory.move_to_end(ident)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def _lookup(self, ident):
+        entry = self._memory.get(ident)
+        if entry is not None:
+            self._memory.move_to_end(ident)
+            return entry
+        entry = self._load(ident)
+        if entry is not None:
+            self._remember(ident, entry)
+        return entry
+
+    # --- policy ---
+    def set_policy(self, namespace, ttl=DEFAULT_TTL, stale_ttl=DEFAULT_STALE_TTL):
+        self._policies[namespace] = (ttl, stale_ttl)
+
+    def policy(self, namespace):
+        return self._policies.get(namespace, (DEFAULT_TTL, DEFAULT_STALE_TTL))
+
+    # --- main entry point ---
+    def get_or_fetch(self, namespace, key, fetch, ttl=None, stale_ttl=None):
+        """Return the cached value for ``(namespace, key)``, calling ``fetch()``
+        on a miss.
+
+        A fresh entry is returned as is. A stale one (past its TTL but within
+        the stale window) is returned immediately while ``fetch`` refreshes it
+        in the background. Exceptions from ``fetch`` are not cached. Passing
+        ``ttl``/``stale_ttl`` sets the namespace's policy.
+        """
+        start = time.perf_counter()
+        if ttl is not None:
+            self.set_policy(namespace, ttl, DEFAULT_STALE_TTL if stale_ttl is None else stale_ttl)
+        ident = (namespace, str(key))
+        ttl, stale_ttl = self.policy(namespace)
+        with self._lock:
+            self._requests[ident] += 1
+            self._fetchers[ident] = fetch
+            entry = self._lookup(ident)
+        if entry is not None:
+            age = time.time() - entry.stored_at
+            if age < ttl:
+                self._count("hits", start)
+                return entry.value
+            if age < ttl + stale_ttl:
+                self._refresh_async(ident, fetch)
+                self._count("stale_hits", start)
+                return entry.value
+        value = self._fetch(ident, fetch)
+        self._count("misses", start)
+        return value
+
+    def _fetch(self, ident, fetch):
+        try:
+            value = fetch()
+        except Exception:
+            self.counters["errors"] += 1
+            raise
+        with self._lock:
+            self._store(ident, CacheEntry(value, time.time()))
+        return value
+
+    def _refresh_async(self, ident, fetch):
+        with self._lock:
+            if ident in self._refreshing:
+                return
+            self._refreshing.add(ident)
+
+        def refresh():
+            try:
+                self._fetch(ident, fetch)
+                self.counters["refreshes"] += 1
+            except Exception as e:
+                print(f"Background refresh of {ident[0]}:{ident[1]} failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(ident)
+
+        self._refresher.submit(refresh)
+
+    def _count(self, outcome, start):
+        self.counters[outcome] += 1
+        self.timings[outcome] += time.perf_counter() - start
+
+    # --- prefetch ---
+    def prefetch(self, top_k=5):
+        """Refresh the ``top_k`` most requested entries that are no longer fresh."""
+        now = time.time()
+        with self._lock:
+            usual = [ident for ident, _ in self._requests.most_common(top_k)]
+            due = []
+            for ident in usual:
+                entry = self._memory.get(ident)
+                ttl, _ = self.policy(ident[0])
+                if entry is None or now - entry.stored_at >= ttl * 0.9:
+                    due.append((ident, self._fetchers[ident]))
+        for ident, fetch in due:
+            self.counters["prefetches"] += 1
+            self._refresh_async(ident, fetch)
+
+    def start_prefetch(self, interval=60, top_k=5):
+        """Run prefetch() every ``interval`` seconds on a daemon thread."""
+        if self._prefetch_thread is not None:
+            return
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                self.prefetch(top_k)
+
+        self._prefetch_thread = threading.Thread(target=loop, name="ego-cache-prefetch", daemon=True)
+        self._prefetch_thread.start()
+
+    def stats(self):
+        stats = dict(self.counters)
+        for outcome in ("hits", "stale_hits", "misses"):
+            n = self.counters[outcome]
+            stats[f"{outcome}_mean_ms"] = self.timings[outcome] / n * 1000 if n else None
+        stats["entries"] = len(self._memory)
+        return stats
+
+
+response_cache = ResponseCache()
@@ -1,35 +1,49 @@
 # assistant_core.py
+#
+# Heavy components (TTS, LLM, Vosk audio, skills) are not loaded at import
+# time. They are registered with the startup orchestrator at the bottom of
+# this file and built on background threads by start(), or on first use.
 
 import os
-import socket
-import pyttsx3
-import re
-import speech_recognition as sr
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 # from sentence_transformers import SentenceTransformer, util  # Removed
-from transformers import AutoModelForCausalLM, AutoTokenizer
-import torch
 import json
-import queue
-import sounddevice as sd
-from vosk import Model, KaldiRecognizer
-import importlib.util
-import glob
+from collections import Counter
+from ego_cache import response_cache
+from ego_intents import build_intent_index, build_intent_classifier
+from ego_metrics import MetricsSampler
+from ego_skills import SkillRegistry, SkillContext, SkillExecutor, SkillError, SkillTimeout, SkillCancelled
+from ego_speculate import Speculator
+from ego_stt import ConnectivityMonitor, GoogleRecognizer, SpeechRace, vosk_result
+from ego_events import bus
+from ego_startup import startup
+from ego_trace import tracer
+from ego_phrases import PhraseAudioCache
+from ego_tts import TTSWorker
+from ego_vad import Endpointer, END_SILENCE_MS, START_TIMEOUT_MS, MAX_SPEECH_MS
+from ego_wake import WakeWordSpotter
 import sys
-try:
-    from ego_gui import set_gui_state
-except ImportError:
-    def set_gui_state(state):
-        pass  # fallback if GUI is not running
 
-try:
-    import pyautogui
-except ImportError:
-    pyautogui = None
+# === Events ===
+# State transitions and pipeline events (wake, transcript, intent, skill) are
+# published on the event bus; the GUI subscribes instead of polling.
+def set_gui_state(state):
+    bus.set_state(state)
+
+def get_pyautogui():
+    try:
+        import pyautogui
+        return pyautogui
+    except ImportError:
+        return None
 
 # === Text-to-Speech ===
 def init_tts():
     try:
+        import pyttsx3
         # Try to initialize with a specific driver if needed
         try:
             if sys.platform == "win32":
@@ -69,45 +83,92 @@ def init_tts():
         print(f"Failed to initialize TTS engine: {e}")
         return None
 
-engine = init_tts()
-if engine is None:
-    print("Warning: Could not initialize TTS engine. Speech output will be disabled.")
-    # Create a dummy engine that does nothing
-    class DummyEngine:
-        def say(self, *args, **kwargs):
-            print("[TTS Disabled]", *args)
-        def runAndWait(self):
-            pass
-        def setProperty(self, *args, **kwargs):
-            pass
-    engine = DummyEngine()
+# Create a dummy engine that does nothing
+class DummyEngine:
+    def say(self, *args, **kwargs):
+        print("[TTS Disabled]", *args)
+    def runAndWait(self):
+        pass
+    def stop(self):
+        pass
+    def setProperty(self, *args, **kwargs):
+        pass
+
+engine = None
+tts_worker = None
+
+def _init_tts_or_dummy():
+    global engine
+    tts = init_tts()
+    if tts is None:
+        print("Warning: Could not initialize TTS engine. Speech output will be disabled.")
+        tts = DummyEngine()
+    engine = tts
+    return engine
+
+def load_tts():
+    # The worker thread builds and owns the engine; speak() only queues text.
+    global tts_worker
+    tts_worker = TTSWorker(_init_tts_or_dummy,
+                           on_start=lambda: set_gui_state('speaking'),
+                           on_idle=lambda: set_gui_state('idle'),
+                           phrases=PhraseAudioCache())
+    tts_worker.wait_ready()
+    return tts_worker
 
 def speak(text):
-    set_gui_state('speaking')
+    """Queue ``text`` and return immediately with a SpeechHandle. Sentences are
+    spoken as they come; call ``.wait()`` on the handle when what follows
+    must not overlap the speech (e.g. listening for an answer)."""
     print(f"[EGO]: {text}")
-    engine.say(text)
-    engine.runAndWait()
-    set_gui_state('idle')
+    span = tracer.span("speak", chars=len(text))
+    handle = startup.result("tts").say(text)
+    if span:
+        def spoken(handle):
+            ttfa = handle.time_to_first_audio
+            span.set(first_audio_ms=ttfa * 1000 if ttfa is not None else None, cancelled=handle.cancelled)
+            span.finish()
+        handle.add_done_callback(spoken)
+    return handle
+
+def stop_speaking():
+    """Barge-in: cut the current response short and drop anything queued."""
+    if tts_worker is not None and tts_worker.busy():
+        tts_worker.cancel_all()
+
+def tts_stats():
+    return tts_worker.stats() if tts_worker else None
+
+# === Connectivity ===
+# Probed on a background thread; has_internet() just reads the cached state.
+connectivity = ConnectivityMonitor()
 
-# === Internet Check ===
 def has_internet():
-    try:
-        socket.create_connection(("8.8.8.8", 53), timeout=3)
-        return True
-    except:
-        return False
+    return connectivity.is_online()
 
 # === LLM Setup ===
 MODEL_NAME = "gpt2"  # You can change to another open model if needed
-try:
-    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-    model = AutoModelForCausalLM.from_pretrained(MODEL_NAME)
-    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-    model = model.to(device)
-except Exception as e:
-    print("[EGO]: Failed to load LLM model:", e)
-    tokenizer = None
-    model = None
+# Inference profile for the intent model (see ego_llm.INFERENCE_PROFILES);
+# "int8" is usually the better pick on CPU-only hosts.
+LLM_PROFILE = os.environ.get("EGO_LLM_PROFILE", "fp32")
+LLM_THREADS = int(os.environ.get("EGO_LLM_THREADS", "0")) or None
+tokenizer = None
+model = None
+device = None
+intent_llm = None
+
+def load_llm():
+    global intent_llm, tokenizer, model, device
+    try:
+        from ego_llm import load_intent_llm
+        llm = load_intent_llm(MODEL_NAME, LLM_PROFILE, LLM_THREADS)
+    except Exception as e:
+        print("[EGO]: Failed to load LLM model:", e)
+        raise
+    tokenizer, model, device = llm.tokenizer, llm.model, llm.device
+    intent_llm = llm
+    print(f"[EGO]: Loaded {MODEL_NAME} ({LLM_PROFILE}) in {llm.load_time:.1f}s")
+    return llm
 
 # === Command Learning Storage ===
 LEARNED_COMMANDS_FILE = "learned_commands.json"
@@ -120,62 +181,144 @@ def save_learned_commands(cmds):
     with open(LEARNED_COMMANDS_FILE, "w") as f:
         json.dump(cmds, f)
 learned_commands = load_learned_commands()
+intent_index = build_intent_index(learned_commands)
+intent_classifier = build_intent_classifier(learned_commands)
 
 # === LLM Intent Extraction ===
+# Classifier answers at or above this confidence skip the LLM.
+INTENT_CONFIDENCE_THRESHOLD = 0.7
+# How many utterances each tier resolved: rules, classifier, llm, unresolved
+intent_counts = Counter()
+
+def intent_stats():
+    total = sum(intent_counts.values())
+    return {
+        "counts": dict(intent_counts),
+        "llm_rate": intent_counts["llm"] / total if total else 0.0,
+        "rules": intent_index.stats(),
+        "classifier": intent_classifier.stats(),
+        "llm": intent_llm.stats() if intent_llm else None,
+    }
+
+def _resolved(source, intent_data):
+    intent_counts[source] += 1
+    tracer.current().set(path=source)
+    bus.publish("intent", source=source, intent=intent_data.get("intent"), target=intent_data.get("target"))
+    return intent_data
+
+def match_intent(user_input):
+    """The cheap tiers only: ``(intent dict, "rules" or "classifier")``, or
+    ``(None, None)`` when the LLM would be needed."""
+    # Learned commands and keyword intents, matched in one pass
+    match = intent_index.match(user_input)
+    if match:
+        return match, "rules"
+    # Nearest-neighbour classifier over example utterances
+    match, _ = intent_classifier.classify(user_input, INTENT_CONFIDENCE_THRESHOLD)
+    if match:
+        return match, "classifier"
+    return None, None
+
+@tracer.traced("extract_intent")
 def extract_intent(user_input):
-    # Check learned commands first
-    for phrase, action in learned_commands.items():
-        if phrase.lower() in user_input.lower():
-            return action
-    # Simple keyword mapping for skills
-    if "weather" in user_input.lower():
-        return {"intent": "get_weather", "target": user_input.split("in")[-1].strip() if "in" in user_input else None}
-    if "wikipedia" in user_input.lower() or "who is" in user_input.lower() or "what is" in user_input.lower():
-        topic = user_input.replace("wikipedia", "").replace("who is", "").replace("what is", "").strip()
-        return {"intent": "get_wikipedia", "target": topic}
-    if not model or not tokenizer:
-        return {"intent": None, "target": None}
-    prompt = (
-        "Extract the intent and target from the following user command. "
-        "Reply in JSON with keys 'intent' and 'target'.\n"
-        f"User: {user_input}\n"
-        "Example 1: User: Open Spotify\n{'intent': 'open_app', 'target': 'Spotify'}\n"
-        "Example 2: User: Search for Python tutorials\n{'intent': 'web_search', 'target': 'Python tutorials'}\n"
-        "Example 3: User: What time is it?\n{'intent': 'get_time', 'target': null}\n"
-        "Now answer:\n"
-    )
+    match, source = match_intent(user_input)
+    if match:
+        return _resolved(source, match)
+    if intent_llm is None:
+        # Rules and the classifier keep working while the LLM loads in the background
+        if startup.loading("llm"):
+            print("[EGO]: Language model is still loading.")
+        return _resolved("unresolved", {"intent": None, "target": None})
     set_gui_state('processing')
-    inputs = tokenizer(prompt, return_tensors="pt").to(device)
-    outputs = model.generate(**inputs, max_new_tokens=60)
-    response = tokenizer.decode(outputs[0], skip_special_tokens=True)
+    intent = intent_llm.extract(user_input)
     set_gui_state('idle')
-    # Try to extract JSON from response
-    match = re.search(r'\{.*\}', response, re.DOTALL)
-    if match:
-        try:
-            return json.loads(match.group(0).replace("'", '"'))
-        except Exception:
-            pass
-    return {"intent": None, "target": None}
+    return _resolved("llm", intent or {"intent": None, "target": None})
 
 # === Skill/Plugin System ===
-skill_modules = []
+# Skills declare their intents in a module-level INTENTS tuple and are only
+# imported the first time one of those intents fires.
+skill_registry = SkillRegistry()
 
 def load_skills(skills_dir="skills"):
-    global skill_modules
-    skill_modules = []
-    for skill_path in glob.glob(os.path.join(skills_dir, "*.py")):
-        module_name = os.path.splitext(os.path.basename(skill_path))[0]
-        spec = importlib.util.spec_from_file_location(module_name, skill_path)
-        if spec and spec.loader:
-            mod = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(mod)
-            skill_modules.append(mod)
-
-load_skills()
+    global skill_registry
+    skill_registry = SkillRegistry(skills_dir).scan()
+    skill_registry.watch()
+    return skill_registry
 
 # === Execute Intent ===
-def perform_action(intent_data, user_text):
+# Skills run on a worker pool so slow network calls don't block the listener.
+SKILL_WORKERS = 4
+STILL_WORKING_AFTER = 0.5   # fraction of a skill's deadline before the interim reply
+_http_client = None
+_http_lock = threading.Lock()
+
+def get_http_client():
+    """The keep-alive HTTP client shared by every skill, created on first use."""
+    global _http_client
+    with _http_lock:
+        if _http_client is None:
+            from ego_http import HttpClient
+            _http_client = HttpClient()
+        return _http_client
+
+# CPU, memory, battery and top processes, sampled in the background so
+# system_info answers without waiting on psutil.
+metrics = MetricsSampler()
+
+def make_skill_context(job):
+    return SkillContext(http=get_http_client, cache=response_cache, cancel_event=job.cancel_event,
+                        metrics=metrics)
+
+skill_executor = SkillExecutor(max_workers=SKILL_WORKERS, make_context=make_skill_context)
+_current_job = None
+
+# Read-only skills may be started from Vosk's partial transcript while the
+# user is still speaking; run_skill() adopts the job if the final intent agrees.
+speculator = Speculator(match=match_intent,
+                        submit=lambda intent, target: skill_executor.submit(skill_registry, intent, target),
+                        can_speculate=lambda intent: skill_registry.can_speculate(intent))
+
+def preempt():
+    """Cancel the skill currently running, any speculation and stop talking,
+    e.g. because the wake word was heard again."""
+    stop_speaking()
+    speculator.discard_all()
+    _followup_cancel.set()
+    job = _current_job
+    if job is not None and not job.done():
+        print(f"Pre-empting skill for intent '{job.intent}'")
+        job.cancel()
+
+def run_skill(intent, target, utterance=None):
+    """Run the skill for ``intent`` and wait for its result, adopting the job
+    speculatively started for ``utterance`` if it matches. Returns None if
+    nothing handled it; raises SkillError, SkillTimeout or SkillCancelled."""
+    global _current_job
+    speculative = speculator.take(utterance, intent, target) if utterance is not None else None
+    job = _current_job = speculative or skill_executor.submit(skill_registry, intent, target)
+    bus.publish("skill_started", intent=intent)
+    span = tracer.span("skill", intent=intent, speculative=speculative is not None)
+    outcome = "error"
+    try:
+        _, result = skill_executor.wait(job, on_interim=lambda: speak("Still working on it..."),
+                                        interim_after=STILL_WORKING_AFTER)
+        if job.cancelled:
+            raise SkillCancelled(intent)
+        outcome = "ok" if result else "unhandled"
+        return result
+    except SkillTimeout:
+        outcome = "timeout"
+        raise
+    except SkillCancelled:
+        outcome = "cancelled"
+        raise
+    finally:
+        span.set(outcome=outcome)
+        span.finish()
+        bus.publish("skill_finished", intent=intent, outcome=outcome)
+
+@tracer.traced("perform_action")
+def perform_action(intent_data, user_text, utterance=None):
     intent = intent_data.get("intent")
     target = intent_data.get("target")
     
@@ -196,50 +339,60 @@ def perform_action(intent_data, user_text):
     elif intent == "get_time":
         speak(f"The time is {datetime.now().strftime('%H:%M')}")
         return
-    elif intent == "screenshot" and pyautogui:
-        pyautogui.screenshot('screenshot.png')
+    elif intent == "screenshot" and get_pyautogui():
+        get_pyautogui().screenshot('screenshot.png')
         speak("Screenshot saved.")
         return
     elif intent == "exit":
-        speak("Goodbye!")
+        speak("Goodbye!").wait(timeout=5)
         set_gui_state('idle')
         os._exit(0)
 
-    # If not a built-in command, try to find a skill to handle it
+    # If not a built-in command, dispatch to the skill registered for it
     if intent:
-        for mod in skill_modules:
-            if hasattr(mod, 'run'):
-                try:
-                    # Pass both intent and target to the skill's run function
-                    result = mod.run(intent, target)
-                    if result:
-                        # If the skill returns a string, speak it
-                        if isinstance(result, str):
-                            speak(result)
-                        # Otherwise, give a generic confirmation
-                        else:
-                            speak(f"Okay, I've handled that.")
-                        return # Exit after the first successful skill
-                except Exception as e:
-                    print(f"Error in skill {mod.__name__}: {e}")
-                    speak(f"I encountered an error trying to use the {mod.__name__} skill.")
-                    return
+        startup.result("skills")
+        try:
+            result = run_skill(intent, target, utterance)
+        except SkillError as e:
+            print(f"Error in skill {e.skill_name}: {e.__cause__}")
+            speak(f"I encountered an error trying to use the {e.skill_name} skill.")
+            return
+        except SkillTimeout:
+            speak("Sorry, that's taking too long. Please try again later.")
+            return
+        except SkillCancelled:
+            return # Pre-empted by a new command
+        if result:
+            # If the skill returns a string, speak it
+            if isinstance(result, str):
+                speak(result)
+            # Otherwise, give a generic confirmation
+            else:
+                speak(f"Okay, I've handled that.")
+            return
 
     # If no skill was found or the intent was None
     if intent:
         speak(f"I don't know how to handle the intent '{intent}'.")
     else:
         # Fallback to the learning mechanism if intent is None
-        speak("I didn't understand that. Would you like to teach me what to do?")
+        _followup_cancel.clear()
+        speak("I didn't understand that. Would you like to teach me what to do?").wait()
         try:
-            answer = recognize_speech_auto().lower()
-            if "yes" in answer:
-                speak("Please describe the action I should perform when you say this command.")
-                action_description = recognize_speech_auto()
+            answer = listen_followup()
+            if answer is None:
+                return # Pre-empted by the wake word
+            if "yes" in answer.lower():
+                speak("Please describe the action I should perform when you say this command.").wait()
+                action_description = listen_followup()
+                if action_description is None:
+                    return
                 # For simplicity, we'll create a custom intent and save it
                 # A more robust system would ask for a specific JSON structure
                 new_intent = f"custom_{user_text.lower().replace(' ', '_')}"
                 learned_commands[user_text] = {"intent": new_intent, "target": action_description}
+                intent_index.add(user_text, learned_commands[user_text])
+                intent_classifier.add_example(user_text, learned_commands[user_text])
                 save_learned_commands(learned_commands)
                 speak("I've learned a new command!")
             else:
@@ -249,9 +402,29 @@ def perform_action(intent_data, user_text):
             speak("Sorry, something went wrong while I was trying to learn.")
 
 # === Speech Recognition ===
-recognizer = sr.Recognizer()
+recognizer = None
+_ambient_calibrated = False
+# Command audio Vosk isn't confident about is also sent to Google; the
+# arbiter picks a result by confidence, within a deadline, and only while online.
+speech_race = SpeechRace(remote=GoogleRecognizer(), connectivity=connectivity)
 
+def get_recognizer():
+    global recognizer
+    if recognizer is None:
+        import speech_recognition as sr
+        recognizer = sr.Recognizer()
+        # Let the energy threshold keep adapting between calls instead of spending a
+        # full second recalibrating every time, and end phrases on a short pause.
+        recognizer.dynamic_energy_threshold = True
+        recognizer.pause_threshold = END_SILENCE_MS / 1000
+        recognizer.non_speaking_duration = min(recognizer.non_speaking_duration, recognizer.pause_threshold)
+    return recognizer
+
+@tracer.traced("stt", engine="google")
 def recognize_speech():
+    global _ambient_calibrated
+    import speech_recognition as sr
+    recognizer = get_recognizer()
     set_gui_state('listening')
     # Find a working microphone
     mic_index = None
@@ -276,8 +449,11 @@ def recognize_speech():
     with sr.Microphone(device_index=mic_index) as source:
         print("🎤 Listening for command...")
         try:
-            recognizer.adjust_for_ambient_noise(source)
-            audio = recognizer.listen(source, timeout=5, phrase_time_limit=5)
+            if not _ambient_calibrated:
+                recognizer.adjust_for_ambient_noise(source, duration=0.5)
+                _ambient_calibrated = True
+            audio = recognizer.listen(source, timeout=START_TIMEOUT_MS / 1000,
+                                      phrase_time_limit=MAX_SPEECH_MS / 1000)
             text = recognizer.recognize_google(audio)
         except sr.UnknownValueError:
             print("Google Speech Recognition could not understand audio")
@@ -291,62 +467,77 @@ def recognize_speech():
     set_gui_state('idle')
     return text
 
-def recognize_speech_vosk(model_path="model"):
-    """Listen to the microphone and return recognized text using Vosk."""
-    q = queue.Queue()
-
-    def callback(indata, frames, time, status):
-        if status:
-            print(status, flush=True)
-        q.put(bytes(indata))
+@tracer.traced("stt", engine="vosk")
+def recognize_speech_vosk(model_path="model", detection=None, utterance=None, name="command",
+                          cancel_event=None):
+    """Listen to the microphone and return recognized text using Vosk.
 
-    try:
-        model = Model(model_path)
-        recognizer = KaldiRecognizer(model, 16000)
-    except Exception as e:
-        print(f"Could not load Vosk model from {model_path}: {e}")
-        return ""
-
-    device_index = None
-    try:
-        devices = sd.query_devices()
-        input_devices = [d for d in devices if d['max_input_channels'] > 0]
-        if not input_devices:
-            raise ValueError("No input audio devices found.")
-        # Heuristic to find a real microphone
-        for i, d in enumerate(input_devices):
-            if 'microphone' in d['name'].lower() or 'headset' in d['name'].lower():
-                device_index = d['index']
-                print(f"Using device: {d['name']}")
-                break
-        if device_index is None:
-            device_index = input_devices[0]['index'] # Fallback to the first one
-    except Exception as e:
-        print(f"Could not find a suitable audio device for Vosk: {e}")
+    If ``detection`` is a WakeDetection, recognition starts from the audio
+    buffered right after the wake word instead of from "now". With an
+    ``utterance`` id from speculator.begin(), partial transcripts are handed
+    to the speculator so a likely skill can start before the user has
+    finished. When Vosk is unsure, the same audio is raced against the
+    remote recognizer (see ego_stt) if there is one.
+    ``name`` picks the engine's cached recognizer; each thread that listens
+    needs its own. Setting ``cancel_event`` stops listening and returns "".
+    """
+    audio = startup.result("audio") if model_path == "model" else load_audio(model_path)
+    if audio is None:
         return ""
 
+    recognizer = audio.recognizer(name)
+    recognizer.SetWords(True)   # per-word confidence for arbitration
     set_gui_state('listening')
     print("🎤 Listening for command (Vosk)...")
 
     try:
-        with sd.RawInputStream(samplerate=16000, blocksize=8000, dtype='int16',
-                               channels=1, callback=callback, device=device_index):
-            # Listen for a phrase. This is tricky without a proper VAD.
-            # We'll listen for a few seconds and see if we get a result.
-            start_time = datetime.now()
-            while (datetime.now() - start_time).total_seconds() < 7: # 7 second timeout
-                data = q.get()
-                if recognizer.AcceptWaveform(data):
-                    result = recognizer.Result()
-                    text = json.loads(result).get('text', '')
-                    if text:
-                        set_gui_state('idle')
-                        return text
-            # If no full result, get partial result
-            result = recognizer.FinalResult()
-            text = json.loads(result).get('text', '')
-            set_gui_state('idle')
-            return text
+        # Feed Vosk until either Kaldi finalizes a phrase or the VAD decides
+        # the speaker has stopped (or never started).
+        if detection is not None:
+            cursor, skip = detection.cursor, detection.offset
+        else:
+            cursor, skip = audio.cursor(), 0
+        # Audio buffered before now (the wake word's tail, the spoken ack) is
+        # still transcribed, but only speech from here on can start the
+        # end-of-utterance timer.
+        armed_at = audio.cursor()
+        endpointer = Endpointer(subframe_ms=audio.vad.subframe_ms)
+        captured = []
+        local = None
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                set_gui_state('idle')
+                return ""
+            data, next_cursor = audio.read(cursor, timeout=1.0)
+            if data is None:
+                break
+            mask = audio.activity(next_cursor - 1)
+            if skip:
+                # Drop the wake word's tail from the VAD mask as well as the bytes.
+                data = data[skip:]
+                if mask is not None:
+                    mask = mask[skip // (2 * audio.vad.subframe_len):]
+                skip = 0
+            state = endpointer.feed(mask) if next_cursor > armed_at else endpointer.state
+            cursor = next_cursor
+            captured.append(bytes(data))
+            if recognizer.AcceptWaveform(data):
+                local = vosk_result(recognizer.Result())
+                if local:
+                    break
+                captured = []   # a silent segment; keep only the speech for the remote
+            elif utterance is not None:
+                speculator.feed(utterance, json.loads(recognizer.PartialResult()).get('partial', ''))
+            if state in (Endpointer.END, Endpointer.TIMEOUT):
+                break
+        ended_at = time.perf_counter()
+        if not local:
+            local = vosk_result(recognizer.FinalResult())
+        # Only an unsure Vosk result sends the same audio to the remote recognizer.
+        result = speech_race.recognize(local, b"".join(captured), audio.samplerate, ended_at)
+        tracer.current().set(winner=result.engine, confidence=result.confidence)
+        set_gui_state('idle')
+        return result.text
 
     except Exception as e:
         print(f"Vosk recognition failed: {e}")
@@ -354,25 +545,146 @@ def recognize_speech_vosk(model_path="model"):
         return ""
 
 def recognize_speech_auto():
-    """Try Vosk first, fallback to Google if not available."""
+    """Vosk on the shared audio stream, raced against the remote recognizer
+    when unsure; Google's own microphone capture only when there is no audio engine."""
     model_path = "model"
-    if os.path.exists(model_path):
-        text = recognize_speech_vosk(model_path)
-        if text:
-            return text
-    # Fallback to Google Speech Recognition
+    if os.path.exists(model_path) and startup.result("audio") is not None:
+        return recognize_speech_vosk(model_path)
     return recognize_speech()
 
+# Follow-up questions (the learning flow) are asked from the dialogue thread
+# while the listener thread keeps spotting the wake word, so they listen on a
+# recognizer of their own, starting from the audio after the prompt. The wake
+# word cancels them through preempt().
+_followup_cancel = threading.Event()
+
+def listen_followup():
+    """Listen for an answer on the dialogue thread. Returns the text, or None
+    if the wake word pre-empted the question (since _followup_cancel was last
+    cleared)."""
+    if _followup_cancel.is_set():
+        return None
+    if os.path.exists("model") and startup.result("audio") is not None:
+        text = recognize_speech_vosk(name="followup", cancel_event=_followup_cancel)
+    else:
+        text = recognize_speech()
+    return None if _followup_cancel.is_set() else text
+
 # === Wake Word Detection Loop ===
+WAKE_SENSITIVITY = 0.5
+wake_spotter = None     # the listener's WakeWordSpotter, once audio is ready
+# Commands are handled one at a time off the listener thread, so the wake
+# word can still be heard (and pre-empt a slow skill) while one is running.
+_dialogue = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ego-dialogue")
+
+def handle_command(user_cmd, trace=None, utterance=None):
+    # ``trace`` is the utterance's root span, carried over from the listener
+    # thread; ``utterance`` is its speculator id.
+    with tracer.attach(trace):
+        try:
+            print("🗣️ You said:", user_cmd)
+            bus.publish("transcript", text=user_cmd)
+            intent_data = extract_intent(user_cmd)
+            perform_action(intent_data, user_cmd, utterance)
+        except Exception as e:
+            print(f"Error while handling command: {e}")
+            set_gui_state('idle')
+        finally:
+            if utterance is not None:
+                speculator.discard(utterance)
+            if trace:
+                trace.finish()
+
 def wake_word_listener():
+    # Starts as soon as the audio engine is ready; TTS and the LLM may still be loading.
+    global wake_spotter
+    audio = startup.result("audio")
+    spotter = wake_spotter = WakeWordSpotter(audio, sensitivity=WAKE_SENSITIVITY) if audio else None
     while True:
         set_gui_state('idle')
         print("🔁 Waiting for wake word 'EGO'...")
-        text = recognize_speech_auto().lower()
-        if "ego" in text:
-            speak("Yes?")
+        if spotter is not None:
+            detection = spotter.listen()
+            if detection is None:
+                continue
+            print(f"Wake word detected: {detection}")
+            bus.publish("wake", word=detection.word, confidence=detection.confidence)
+            # The utterance starts when the wake word ended, not when Vosk reported it.
+            trace = tracer.begin("utterance", start=time.perf_counter() - detection.latency)
+            tracer.span("wake", start=trace.start if trace else None,
+                        confidence=detection.confidence).finish()
+            preempt()
+            # The stream keeps buffering while "Yes?" plays, so nothing said
+            # right after the wake word is lost.
+            with tracer.span("ack"):
+                speak("Yes?").wait()
             set_gui_state('listening')
+            utterance = speculator.begin()
+            user_cmd = recognize_speech_vosk(detection=detection, utterance=utterance)
+        else:
+            text = recognize_speech_auto().lower()
+            if "ego" not in text:
+                continue
+            bus.publish("wake", word="ego", confidence=None)
+            trace = tracer.begin("utterance")
+            preempt()
+            with tracer.span("ack"):
+                speak("Yes?").wait()
+            set_gui_state('listening')
+            utterance = None
             user_cmd = recognize_speech_auto()
-            print("🗣️ You said:", user_cmd)
-            intent_data = extract_intent(user_cmd)
-            perform_action(intent_data, user_cmd)
+        _dialogue.submit(handle_command, user_cmd, trace, utterance)
+        tracer.detach()
+
+# === Stats ===
+def _ms(value):
+    return "n/a" if value is None else f"{value:.0f} ms"
+
+def stats_lines():
+    """One human-readable line per stage, for ``ego_gui.py --stats``."""
+    intents = intent_stats()
+    counts = intents["counts"]
+    lines = []
+    if wake_spotter is not None:
+        wake = wake_spotter.stats()
+        lines.append(f"wake word: {wake['detections']} detections, {wake['rejections']} rejected below "
+                     f"confidence, latency mean {_ms(wake['mean_latency_ms'])}, "
+                     f"last {_ms(wake['last_latency_ms'])}")
+    lines.append(f"intents: {', '.join(f'{k} {v}' for k, v in sorted(counts.items())) or 'none yet'} "
+             f"(LLM rate {intents['llm_rate']:.0%})")
+    tts = tts_stats()
+    if tts:
+        lines.append(f"speech: {tts['spoken']} spoken, {tts['cancelled']} cut short, time to first audio "
+                     f"mean {_ms(tts['mean_time_to_first_audio_ms'])}, "
+                     f"last {_ms(tts['last_time_to_first_audio_ms'])}")
+    used = {name: s for name, s in skill_registry.stats().items() if s["dispatches"] or s["errors"]}
+    lines.append("skills: " + (", ".join(f"{name} {s['dispatches']} runs/{s['errors']} errors"
+                                         for name, s in sorted(used.items())) or "none run yet"))
+    cache = response_cache.stats()
+    lines.append(f"cache: {cache.get('hits', 0)} hits, {cache.get('stale_hits', 0)} stale, "
+                 f"{cache.get('misses', 0)} misses, {cache['entries']} entries")
+    return lines
+
+# === Startup ===
+def load_audio(model_path="model"):
+    if not os.path.exists(model_path):
+        return None
+    from ego_audio import get_audio_engine
+    return get_audio_engine(model_path)
+
+startup.register("tts", load_tts)
+startup.register("audio", load_audio)
+startup.register("llm", load_llm)
+startup.register("skills", load_skills)
+
+# Seconds between refreshes of the most frequently asked network queries
+# (weather, news...), or None to only refresh on demand.
+CACHE_PREFETCH_INTERVAL = None
+
+def start():
+    """Begin loading every component in the background."""
+    startup.start()
+    connectivity.start()
+    metrics.start()
+    if CACHE_PREFETCH_INTERVAL:
+        response_cache.start_prefetch(CACHE_PREFETCH_INTERVAL)
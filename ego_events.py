@@ -0,0 +1,113 @@
+# ego_events.py
+#
+# In-process publish/subscribe bus. ego_core publishes assistant state
+# transitions ("state") and pipeline events (wake word, transcript, intent,
+# skill, speech) here; the GUI and anything else interested subscribe.
+# Every event is timestamped on publication so consumers can measure how
+# long it took them to react (e.g. state change to rendered frame).
+
+import collections
+import threading
+import time
+
+HISTORY = 256               # events kept for inspection
+LATENCY_SAMPLES = 512       # samples kept per recorded latency metric
+
+
+class Event:
+    __slots__ = ("topic", "data", "time")
+
+    def __init__(self, topic, data, time):
+        self.topic = topic
+        self.data = data
+        self.time = time    # time.perf_counter() at publication
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __repr__(self):
+        return f"Event({self.topic!r}, {self.data!r})"
+
+
+def _percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class EventBus:
+    def __init__(self, history=HISTORY):
+        self._subscribers = collections.defaultdict(list)   # topic -> [callback], "*" for all
+        self._lock = threading.Lock()
+        self.history = collections.deque(maxlen=history)
+        self.counts = collections.Counter()
+        self.state = 'idle'
+        self.state_changed_at = time.perf_counter()
+        self._latencies = collections.defaultdict(lambda: collections.deque(maxlen=LATENCY_SAMPLES))
+
+    def subscribe(self, topic, callback):
+        """Call ``callback(event)`` for every event on ``topic`` ("*" for all).
+        Callbacks run on the publishing thread and must not block; GUI code
+        should hand the event to its own loop (Tk's ``after``)."""
+        with self._lock:
+            self._subscribers[topic].append(callback)
+        return callback
+
+    def unsubscribe(self, topic, callback):
+        with self._lock:
+            try:
+                self._subscribers[topic].remove(callback)
+            except ValueError:
+                pass
+
+    def publish(self, topic, **data):
+        event = Event(topic, data, time.perf_counter())
+        with self._lock:
+            self.history.append(event)
+            self.counts[topic] += 1
+            callbacks = self._subscribers.get(topic, []) + self._subscribers.get("*", [])
+        for callback in callbacks:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"Event subscriber for '{topic}' failed: {e}")
+        return event
+
+    # --- assistant state ---
+    def set_state(self, state):
+        """Publish a "state" transition (idle, listening, speaking, processing).
+        Repeating the current state is not a transition and publishes nothing."""
+        with self._lock:
+            if state == self.state:
+                return None
+            previous, self.state = self.state, state
+        event = self.publish("state", state=state, previous=previous)
+        self.state_changed_at = event.time
+        return event
+
+    def transitions(self):
+        """Recent state transitions as ``(state, time.perf_counter() timestamp)``."""
+        with self._lock:
+            return [(e.data["state"], e.time) for e in self.history if e.topic == "state"]
+
+    # --- latency metrics ---
+    def record_latency(self, name, seconds):
+        self._latencies[name].append(seconds)
+
+    def latency_stats(self):
+        stats = {}
+        for name, samples in list(self._latencies.items()):
+            values = sorted(samples)
+            if not values:
+                continue
+            stats[name] = {
+                "count": len(values),
+                "p50_ms": _percentile(values, 0.50) * 1000,
+                "p95_ms": _percentile(values, 0.95) * 1000,
+                "max_ms": values[-1] * 1000,
+            }
+        return stats
+
+    def stats(self):
+        return {"state": self.state, "counts": dict(self.counts), "latency": self.latency_stats()}
+
+
+bus = EventBus()
@@ -1,111 +1,218 @@
+import argparse
 import tkinter as tk
 import threading
 import random
+import time
+from ego_events import bus
+from ego_startup import startup
+from ego_trace import tracer
+import ego_core
 from ego_core import wake_word_listener, speak
 
-# Shared state for orb animation
-class OrbState:
+startup.mark("core_imported")
+
+# === Rendering ===
+# Canvas items are created once and moved/recoloured in place each frame.
+# While idle both canvases drop to IDLE_FPS; motion is scaled by the real
+# time between frames so it looks the same at either rate. State changes
+# arrive from ego_core over the event bus and are handed to the Tk loop
+# with after().
+ACTIVE_FPS = 60
+IDLE_FPS = 15
+BG_RGB = (26, 26, 42)  # approx. #00001a
+
+def alpha_to_hex(hex_color, alpha, bg=BG_RGB):
+    # A simple way to simulate alpha by blending with background
+    fg = (int(hex_color[1:3], 16), int(hex_color[3:5], 16), int(hex_color[5:7], 16))
+    r, g, b = (int(f * alpha + k * (1 - alpha)) for f, k in zip(fg, bg))
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+class FrameTimer:
+    """Time spent producing each frame (Tk calls plus redraw), per canvas."""
     def __init__(self):
-        self.state = 'idle'  # idle, listening, speaking, processing
-        self.lock = threading.Lock()
-    def set_state(self, new_state):
-        with self.lock:
-            self.state = new_state
-    def get_state(self):
-        with self.lock:
-            return self.state
+        self.frames = 0
+        self.busy = 0.0
+        self.worst = 0.0
+        self.started = time.perf_counter()
+
+    def record(self, seconds):
+        self.frames += 1
+        self.busy += seconds
+        self.worst = max(self.worst, seconds)
 
-global_orb_state = OrbState()
+    def stats(self, reset=True):
+        wall = time.perf_counter() - self.started
+        stats = {
+            "fps": self.frames / wall if wall else 0.0,
+            "mean_ms": self.busy / self.frames * 1000 if self.frames else None,
+            "worst_ms": self.worst * 1000,
+            "cpu_share": self.busy / wall if wall else 0.0,  # fraction of one core
+        }
+        if reset:
+            self.__init__()
+        return stats
 
-def set_gui_state(state):
-    global_orb_state.set_state(state)
+class AnimatedCanvas(tk.Canvas):
+    """Base for the animated canvases: runs draw(state, dt) at a state-dependent rate."""
+    redraw_on_state = False  # draw a frame as soon as the state changes
 
-# Starfield background
-class Starfield(tk.Canvas):
     def __init__(self, master, **kwargs):
         super().__init__(master, bg='#00001a', highlightthickness=0, **kwargs)
+        self.state = bus.state
+        self.timer = FrameTimer()
+        self._last = time.perf_counter()
+        self._next = self.after(0, self.animate)
+        bus.subscribe("state", self._on_state)
+
+    def _on_state(self, event):
+        # Runs on whichever thread published; Tk is only touched from its loop.
+        self.after(0, self.show_state, event)
+
+    def show_state(self, event):
+        self.state = event["state"]
+        if self.redraw_on_state:
+            self.after_cancel(self._next)
+            self.animate()
+            bus.record_latency("state_to_render", time.perf_counter() - event.time)
+
+    def animate(self):
+        start = time.perf_counter()
+        dt, self._last = start - self._last, start
+        self.draw(self.state, dt)
+        self.update_idletasks()
+        self.timer.record(time.perf_counter() - start)
+        fps = IDLE_FPS if self.state == 'idle' else ACTIVE_FPS
+        self._next = self.after(int(1000 / fps), self.animate)
+
+    def draw(self, state, dt):
+        raise NotImplementedError
+
+# Starfield background
+class Starfield(AnimatedCanvas):
+    WIDTH, HEIGHT = 1920, 1080
+    VELOCITY = (-16.7, 8.3)  # pixels per second
+
+    def __init__(self, master, **kwargs):
         self.stars = []
+        self.positions = []  # [x, y] of each star's top-left corner
+        super().__init__(master, **kwargs)
         for _ in range(200):
-            x = random.randint(0, 1920)
-            y = random.randint(0, 1080)
+            x = random.randint(0, self.WIDTH)
+            y = random.randint(0, self.HEIGHT)
             size = random.uniform(0.5, 2.5)
-            self.stars.append(self.create_oval(x, y, x+size, y+size, fill='white', outline=''))
-        self.after(0, self.animate)
+            self.stars.append(self.create_oval(x, y, x+size, y+size, fill='white', outline='', tags='star'))
+            self.positions.append([x, y])
 
-    def animate(self):
-        for star in self.stars:
-            self.move(star, -0.5, 0.25)
-            x1, y1, _, _ = self.coords(star)
-            if x1 < 0 or y1 > 1080:
-                self.move(star, 1920, -random.randint(0, 1080))
-        self.after(30, self.animate)
+    def draw(self, state, dt):
+        dx, dy = self.VELOCITY[0] * dt, self.VELOCITY[1] * dt
+        # One Tk call moves every star; positions are tracked here instead of
+        # being read back with coords().
+        self.move('star', dx, dy)
+        for star, pos in zip(self.stars, self.positions):
+            pos[0] += dx
+            pos[1] += dy
+            if pos[0] < 0 or pos[1] > self.HEIGHT:
+                jump_x, jump_y = self.WIDTH, -random.randint(0, self.HEIGHT)
+                pos[0] += jump_x
+                pos[1] += jump_y
+                self.move(star, jump_x, jump_y)
 
 # Animated orb on canvas
-class AnimatedOrb(tk.Canvas):
-    def __init__(self, master, orb_state, **kwargs):
-        super().__init__(master, bg='#00001a', highlightthickness=0, **kwargs)
-        self.orb_state = orb_state
+ORB_COLORS = {
+    'idle': '#00bfff',       # DeepSkyBlue
+    'listening': '#00ffea',   # Aqua
+    'speaking': '#ffc700',    # Gold
+    'processing': '#ff4d4d',  # Light Coral
+}
+GLOW_LAYERS = 15
+
+def glow_palette(color, layers=GLOW_LAYERS):
+    """Glow colours for one orb colour, outermost layer first."""
+    return [alpha_to_hex(color, (1 - i / layers) * 0.5) for i in range(layers, 0, -1)]
+
+class AnimatedOrb(AnimatedCanvas):
+    CENTER = 256
+    color_map = ORB_COLORS
+    palettes = {state: glow_palette(color) for state, color in ORB_COLORS.items()}
+    redraw_on_state = True
+    # (pulse speed in units per second, pulse amplitude) per activity level
+    PULSE = {'idle': (18, 10), 'active': (90, 25)}
+    SPIN = 30  # ring rotation in degrees per second
+
+    def __init__(self, master, **kwargs):
+        super().__init__(master, **kwargs)
         self.radius = 150
         self.pulse = 0
         self.pulse_dir = 1
         self.rotation = 0
-        self.color_map = {
-            'idle': '#00bfff',       # DeepSkyBlue
-            'listening': '#00ffea',   # Aqua
-            'speaking': '#ffc700',    # Gold
-            'processing': '#ff4d4d',  # Light Coral
-        }
-        self.after(0, self.animate)
+        self.shown_state = None
+        c = self.CENTER
+        self.rings = [self.create_arc(c, c, c, c, extent=60, width=2, style=tk.ARC) for _ in range(3)]
+        self.glow = [self.create_oval(c, c, c, c, outline='') for _ in range(GLOW_LAYERS)]
+        self.core = self.create_oval(c, c, c, c, outline='white', width=3)
+
+    def draw(self, state, dt):
+        if state not in self.color_map:
+            state = 'idle'
+        if state != self.shown_state:
+            self.shown_state = state
+            color = self.color_map[state]
+            for ring in self.rings:
+                self.itemconfigure(ring, outline=color)
+            for item, glow_color in zip(self.glow, self.palettes[state]):
+                self.itemconfigure(item, fill=glow_color)
+            self.itemconfigure(self.core, fill=color)
 
-    def animate(self):
-        state = self.orb_state.get_state()
-        color = self.color_map.get(state, '#00bfff')
-        
         # More dynamic pulsing
-        if state == 'idle':
-            self.pulse += self.pulse_dir * 0.3
-            if not -10 < self.pulse < 10:
-                self.pulse_dir *= -1
-        else:
-            self.pulse += self.pulse_dir * 1.5
-            if not -25 < self.pulse < 25:
-                self.pulse_dir *= -1
+        speed, amplitude = self.PULSE['idle' if state == 'idle' else 'active']
+        self.pulse += self.pulse_dir * speed * dt
+        if not -amplitude < self.pulse < amplitude:
+            self.pulse = max(-amplitude, min(amplitude, self.pulse))
+            self.pulse_dir *= -1
 
+        c = self.CENTER
         r = self.radius + self.pulse
-        self.delete('all')
-
-        # Draw outer rings
-        self.rotation = (self.rotation + 0.5) % 360
-        for i in range(3):
-            self.create_arc(256-r-i*20, 256-r-i*20, 256+r+i*20, 256+r+i*20,
-                            start=self.rotation + i*120, extent=60, 
-                            outline=color, width=2, style=tk.ARC)
-
-        # Draw main orb glow
-        for i in range(15, 0, -1):
-            alpha = 1 - (i / 15)
-            glow_color = self._alpha_to_hex(color, alpha * 0.5)
-            self.create_oval(256 - r - i*2, 256 - r - i*2, 256 + r + i*2, 256 + r + i*2,
-                             fill=glow_color, outline='')
-
-        # Draw main orb
-        self.create_oval(256 - r, 256 - r, 256 + r, 256 + r,
-                         fill=color, outline='white', width=3)
-
-        self.after(16, self.animate) # ~60 FPS
-
-    def _alpha_to_hex(self, hex_color, alpha):
-        # A simple way to simulate alpha by blending with background
-        bg_r, bg_g, bg_b = 26, 26, 42 # approx. #00001a
-        fg_r = int(hex_color[1:3], 16)
-        fg_g = int(hex_color[3:5], 16)
-        fg_b = int(hex_color[5:7], 16)
-        r = int(fg_r * alpha + bg_r * (1 - alpha))
-        g = int(fg_g * alpha + bg_g * (1 - alpha))
-        b = int(fg_b * alpha + bg_b * (1 - alpha))
-        return f"#{r:02x}{g:02x}{b:02x}"
-
-def launch_gui():
+        self.rotation = (self.rotation + self.SPIN * dt) % 360
+        for i, ring in enumerate(self.rings):
+            d = r + i*20
+            self.coords(ring, c - d, c - d, c + d, c + d)
+            self.itemconfigure(ring, start=self.rotation + i*120)
+        for i, item in zip(range(GLOW_LAYERS, 0, -1), self.glow):
+            d = r + i*2
+            self.coords(item, c - d, c - d, c + d, c + d)
+        self.coords(self.core, c - r, c - r, c + r, c + r)
+
+GREETING_TIMEOUT = 10  # seconds the wake-word listener waits for the greeting
+
+def greet_then_listen():
+    # The greeting says "EGO"; spotting while it plays would wake on our own voice.
+    speak("EGO online and listening...").wait(timeout=GREETING_TIMEOUT)
+    wake_word_listener()
+
+def print_startup_profile():
+    startup.wait_all()
+    print(startup.report())
+
+FRAME_STATS_INTERVAL = 10  # seconds
+STATS_INTERVAL = 60        # seconds between --stats reports
+
+def print_frame_stats(root, canvases):
+    for name, canvas in canvases.items():
+        s = canvas.timer.stats()
+        print(f"[GUI] {name}: {s['fps']:.1f} fps, {s['mean_ms'] or 0:.2f} ms/frame "
+              f"(worst {s['worst_ms']:.2f} ms), {s['cpu_share']:.1%} of a core")
+    latency = bus.latency_stats().get("state_to_render")
+    if latency:
+        print(f"[GUI] state change to render: p50 {latency['p50_ms']:.1f} ms, "
+              f"p95 {latency['p95_ms']:.1f} ms over {latency['count']} transitions")
+    root.after(FRAME_STATS_INTERVAL * 1000, print_frame_stats, root, canvases)
+
+def print_stats(root):
+    for line in ego_core.stats_lines():
+        print(f"[EGO] {line}")
+    root.after(STATS_INTERVAL * 1000, print_stats, root)
+
+def launch_gui(startup_profile=False, frame_stats=False, stats=False):
     root = tk.Tk()
     root.title("EGO - Your Personal AI")
     root.geometry("512x512")
@@ -118,14 +225,38 @@ def launch_gui():
     starfield = Starfield(container)
     starfield.place(relwidth=1, relheight=1)
 
-    orb = AnimatedOrb(container, global_orb_state)
+    orb = AnimatedOrb(container)
     orb.place(relwidth=1, relheight=1)
 
-    # Start wake-word listener in the background
-    threading.Thread(target=wake_word_listener, daemon=True).start()
+    # Draw the first frame before any heavy component starts loading
+    root.update()
+    startup.mark("first_frame")
+
+    # Load TTS, LLM, audio and skills in the background. The wake-word
+    # listener waits for the greeting and the audio engine, not the LLM.
+    ego_core.start()
+    threading.Thread(target=greet_then_listen, daemon=True).start()
+    if startup_profile:
+        threading.Thread(target=print_startup_profile, daemon=True).start()
+    if frame_stats:
+        root.after(FRAME_STATS_INTERVAL * 1000, print_frame_stats, root,
+                   {"orb": orb, "starfield": starfield})
+    if stats:
+        root.after(STATS_INTERVAL * 1000, print_stats, root)
 
     root.mainloop()
 
 if __name__ == "__main__":
-    speak("EGO online and listening...")
-    launch_gui()
+    parser = argparse.ArgumentParser(description="EGO - Your Personal AI")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="print a per-component breakdown of startup time once everything is loaded")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="write a per-utterance latency trace to FILE (JSONL); summarize with ego_trace.py")
+    parser.add_argument("--frame-stats", action="store_true",
+                        help=f"print frame rate and per-frame render time every {FRAME_STATS_INTERVAL} seconds")
+    parser.add_argument("--stats", action="store_true",
+                        help=f"print wake word, intent tier, speech, skill and cache counters every {STATS_INTERVAL} seconds")
+    args = parser.parse_args()
+    if args.trace:
+        tracer.enable(args.trace)
+    launch_gui(startup_profile=args.startup_profile, frame_stats=args.frame_stats, stats=args.stats)
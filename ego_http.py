@@ -0,0 +1,113 @@
+# ego_http.py
+#
+# Shared HTTP client for skills: one keep-alive connection pool, default
+# timeouts, bounded retries with backoff, per-host concurrency limits and
+# per-host request timing.
+
+import threading
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_TIMEOUT = (3.05, 5)     # (connect, read) seconds
+MAX_RETRIES = 2
+BACKOFF_FACTOR = 0.3
+PER_HOST_LIMIT = 4
+POOL_SIZE = 10
+
+
+class HostStats:
+    __slots__ = ("hostname", "requests", "errors", "retries", "total_time")
+
+    def __init__(self, hostname=None):
+        self.hostname = hostname
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_time = 0.0
+
+
+class HttpClient:
+    def __init__(self, timeout=DEFAULT_TIMEOUT, retries=MAX_RETRIES, backoff=BACKOFF_FACTOR,
+                 per_host_limit=PER_HOST_LIMIT, pool_size=POOL_SIZE):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self.timeout = timeout
+        self.session = requests.Session()
+        retry = Retry(total=retries, backoff_factor=backoff,
+                      status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=frozenset({"GET", "HEAD"}))
+        self._adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", self._adapter)
+        self.session.mount("https://", self._adapter)
+        self.per_host_limit = per_host_limit
+        self._limits = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _limit(self, host):
+        with self._lock:
+            sem = self._limits.get(host)
+            if sem is None:
+                sem = self._limits[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return sem
+
+    def _open_connections(self, hostname):
+        """Connections opened so far by the pools serving ``hostname``."""
+        pools = self._adapter.poolmanager.pools
+        total = 0
+        for key in list(pools.keys()):
+            try:
+                pool = pools[key]
+            except KeyError:
+                continue
+            if pool.host == hostname:
+                total += pool.num_connections
+        return total
+
+    def request(self, method, url, **kwargs):
+        """Like ``requests.Session.request`` with the client's defaults applied.
+        Raises for HTTP error statuses."""
+        kwargs.setdefault("timeout", self.timeout)
+        parts = urlsplit(url)
+        host = parts.netloc
+        stats = self._stats.get(host)
+        if stats is None:
+            stats = self._stats.setdefault(host, HostStats(parts.hostname))
+        with self._limit(host):
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+                response.raise_for_status()
+            except Exception:
+                stats.errors += 1
+                raise
+            finally:
+                stats.requests += 1
+                stats.total_time += time.perf_counter() - start
+        retries = getattr(response.raw, "retries", None)
+        if retries is not None:
+            stats.retries += len(retries.history)
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def get_json(self, url, **kwargs):
+        return self.get(url, **kwargs).json()
+
+    def stats(self):
+        return {
+            host: {
+                "requests": s.requests,
+                "errors": s.errors,
+                "retries": s.retries,
+                "connections_opened": self._open_connections(s.hostname),
+                "mean_ms": s.total_time / s.requests * 1000 if s.requests else None,
+            }
+            for host, s in list(self._stats.items())
+        }
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,438 @@
+# ego_intents.py
+#
+# Intent matching tiers that run before the LLM:
+#
+# * IntentIndex: compiled matcher for learned commands and keyword intents.
+#   Phrases are normalized once and stored in a word-level trie, so matching
+#   an utterance costs O(words * longest phrase) no matter how many phrases
+#   are learned.
+# * IntentClassifier: character n-gram TF-IDF nearest-neighbour model over
+#   example utterances, used when no phrase matches exactly.
+
+import math
+import re
+import threading
+import time
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+# Higher priority wins before phrase length is considered. Learned commands
+# come first, then the keyword rules in the order extract_intent used to
+# check them.
+PRIORITY_LEARNED = 30
+PRIORITY_WEATHER = 20
+PRIORITY_SYSTEM_INFO = 15   # "what is the cpu usage" is not a Wikipedia question
+PRIORITY_WIKIPEDIA = 10
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+_END = None  # trie key marking the end of a phrase; never a valid token
+
+
+def normalize(text):
+    """Lower-case ``text`` and split it into word tokens."""
+    return _WORD_RE.findall((text or "").lower())
+
+
+def char_ngrams(text, n=3):
+    padded = f" {text} "
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+# === Built-in keyword intents ===
+def weather_intent(user_input):
+    parts = re.split(r"\bin\b", user_input, flags=re.IGNORECASE)
+    target = parts[-1].strip() if len(parts) > 1 else None
+    return {"intent": "get_weather", "target": target or None}
+
+
+def wikipedia_intent(user_input):
+    topic = re.sub(r"wikipedia|who is|what is", "", user_input, flags=re.IGNORECASE)
+    return {"intent": "get_wikipedia", "target": topic.strip()}
+
+
+_WINDOW_RE = re.compile(r"\b(?:last|past)\s+(.+?)[\s?.!]*$", re.IGNORECASE)
+
+
+def system_info_intent(intent):
+    """Keyword action for a system_info intent. Averages take the time
+    window ("the last 5 minutes") as their target."""
+    def action(user_input):
+        m = _WINDOW_RE.search(user_input) if intent.endswith("_average") else None
+        return {"intent": intent, "target": m.group(1) if m else None}
+    return action
+
+
+SYSTEM_INFO_PHRASES = {
+    "get_cpu_usage": ["cpu usage", "processor load"],
+    "get_memory_usage": ["memory usage", "ram usage"],
+    "get_battery_status": ["battery status", "battery level"],
+    "get_cpu_average": ["average cpu", "average cpu usage", "average processor load"],
+    "get_memory_average": ["average memory", "average memory usage", "average ram", "average ram usage"],
+    "get_top_cpu": ["using the most cpu", "slowing down my computer"],
+    "get_top_memory": ["using the most memory", "using the most ram", "eating my memory"],
+}
+
+KEYWORD_INTENTS = [
+    ("weather", weather_intent, PRIORITY_WEATHER),
+    *((phrase, system_info_intent(intent), PRIORITY_SYSTEM_INFO)
+      for intent, phrases in SYSTEM_INFO_PHRASES.items() for phrase in phrases),
+    ("wikipedia", wikipedia_intent, PRIORITY_WIKIPEDIA),
+    ("who is", wikipedia_intent, PRIORITY_WIKIPEDIA),
+    ("what is", wikipedia_intent, PRIORITY_WIKIPEDIA),
+]
+
+
+class IntentIndex:
+    """Trie over normalized phrases with an optional character n-gram fuzzy tier.
+
+    An action is either an intent dict (returned as a copy) or a callable
+    that builds the intent dict from the raw utterance.
+    """
+
+    def __init__(self, fuzzy=False, fuzzy_threshold=0.8, ngram=3, max_postings=1000,
+                 min_fuzzy_ngrams=8):
+        self.fuzzy = fuzzy
+        self.fuzzy_threshold = fuzzy_threshold
+        self.ngram = ngram
+        self.max_postings = max_postings
+        self.min_fuzzy_ngrams = min_fuzzy_ngrams
+        self._root = {}
+        self._entries = []          # [key, action, priority, ngram count]
+        self._ids = {}              # normalized phrase -> entry id
+        self._postings = defaultdict(list)
+        self.exact_hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, phrase, action, priority=PRIORITY_LEARNED, fuzzy=True):
+        """Insert or replace a phrase. ``fuzzy=False`` keeps it exact-match only,
+        which is what short keyword triggers like "what is" need."""
+        tokens = normalize(phrase)
+        if not tokens:
+            return
+        key = " ".join(tokens)
+        entry_id = self._ids.get(key)
+        if entry_id is not None:
+            self._entries[entry_id][1] = action
+            self._entries[entry_id][2] = priority
+            return
+        entry_id = len(self._entries)
+        grams = char_ngrams(key, self.ngram)
+        self._entries.append([key, action, priority, len(grams)])
+        self._ids[key] = entry_id
+        node = self._root
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node[_END] = entry_id
+        if fuzzy and len(grams) >= self.min_fuzzy_ngrams:
+            for gram in grams:
+                self._postings[gram].append(entry_id)
+
+    def update(self, phrases, priority=PRIORITY_LEARNED):
+        for phrase, action in phrases.items():
+            self.add(phrase, action, priority)
+
+    def match(self, user_input):
+        """Return the intent dict for the best matching phrase, or None."""
+        tokens = normalize(user_input)
+        entry_id = self._match_exact(tokens)
+        if entry_id is not None:
+            self.exact_hits += 1
+        elif self.fuzzy and tokens:
+            entry_id = self._match_fuzzy(" ".join(tokens))
+            if entry_id is not None:
+                self.fuzzy_hits += 1
+        if entry_id is None:
+            self.misses += 1
+            return None
+        action = self._entries[entry_id][1]
+        return action(user_input) if callable(action) else dict(action)
+
+    def _match_exact(self, tokens):
+        best, best_score = None, None
+        for i in range(len(tokens)):
+            node = self._root
+            for j in range(i, len(tokens)):
+                node = node.get(tokens[j])
+                if node is None:
+                    break
+                entry_id = node.get(_END)
+                if entry_id is not None:
+                    score = (self._entries[entry_id][2], j - i + 1, -i)
+                    if best_score is None or score > best_score:
+                        best, best_score = entry_id, score
+        return best
+
+    def _match_fuzzy(self, text):
+        # Share of each phrase's n-grams that also occur in the utterance.
+        # Very common n-grams are skipped so lookup cost stays bounded.
+        counts = defaultdict(int)
+        for gram in char_ngrams(text, self.ngram):
+            postings = self._postings.get(gram)
+            if not postings or len(postings) > self.max_postings:
+                continue
+            for entry_id in postings:
+                counts[entry_id] += 1
+        best, best_score = None, None
+        for entry_id, shared in counts.items():
+            _, _, priority, total = self._entries[entry_id]
+            ratio = shared / total
+            if ratio < self.fuzzy_threshold:
+                continue
+            score = (ratio, priority, total)
+            if best_score is None or score > best_score:
+                best, best_score = entry_id, score
+        return best
+
+    def stats(self):
+        return {
+            "phrases": len(self._entries),
+            "exact_hits": self.exact_hits,
+            "fuzzy_hits": self.fuzzy_hits,
+            "misses": self.misses,
+        }
+
+
+def build_intent_index(learned_commands, fuzzy=True):
+    index = IntentIndex(fuzzy=fuzzy)
+    for phrase, action, priority in KEYWORD_INTENTS:
+        index.add(phrase, action, priority, fuzzy=False)
+    index.update(learned_commands)
+    return index
+
+
+# === Nearest-neighbour intent classifier ===
+# Example utterances for the built-in commands and the intents handled by the
+# skills in /skills. "{target}" marks the slot the target is taken from.
+INTENT_EXAMPLES = {
+    "open_app": ["open {target}", "launch {target}", "open the {target} app"],
+    "web_search": ["search for {target}", "search the web for {target}", "google {target}",
+                   "look up {target} online"],
+    "get_time": ["what time is it", "what's the time", "tell me the time", "current time"],
+    "screenshot": ["take a screenshot", "capture the screen", "grab a screenshot"],
+    "exit": ["goodbye", "exit", "quit", "shut down", "stop listening"],
+    "open_website": ["go to {target}", "open the website {target}", "visit {target}",
+                     "browse to {target}"],
+    "get_cpu_usage": ["what's my cpu usage", "cpu usage", "how busy is the processor",
+                      "processor load"],
+    "get_memory_usage": ["what's my memory usage", "memory usage", "how much ram am i using",
+                         "ram usage"],
+    "get_battery_status": ["battery status", "how much battery do i have", "battery level",
+                           "is my laptop charging"],
+    "get_cpu_average": ["average cpu over the last {target}", "average cpu usage over the last {target}",
+                        "how busy was the cpu over the last {target}", "average cpu usage",
+                        "what was the average cpu usage over the last {target}",
+                        "what's the average cpu over the last {target}"],
+    "get_memory_average": ["average memory usage over the last {target}", "average ram over the last {target}",
+                           "average memory usage",
+                           "what was the average memory usage over the last {target}"],
+    "get_top_cpu": ["what's using the most cpu", "which process is using the cpu",
+                    "what's slowing down my computer", "top cpu process"],
+    "get_top_memory": ["what's using the most memory", "which app is using the most ram",
+                       "what's eating my memory", "top memory process"],
+    "tell_joke": ["tell me a joke", "make me laugh", "say something funny", "know any jokes"],
+    "get_news": ["what's the latest news", "news headlines", "read me the news",
+                 "top headlines"],
+    "get_weather": ["what's the weather in {target}", "weather forecast for {target}",
+                    "is it raining in {target}", "how hot is it in {target}"],
+    "get_wikipedia": ["who is {target}", "what is {target}", "tell me about {target}",
+                      "search wikipedia for {target}"],
+}
+
+MAX_LEARNED_EXAMPLES = 2000   # learned commands beyond this are left to IntentIndex
+
+# Intents that act on the machine. A near miss ("never google anything",
+# "stop listening to me please") must not fire them, so they only match when
+# the utterance is one of their examples, give or take LEAD_IN words.
+EXACT_INTENTS = {"exit", "open_app", "open_website", "web_search", "screenshot"}
+LEAD_IN = ("please", "hey", "ego", "can you", "could you", "would you")
+_LEAD_IN_WORDS = {w for phrase in LEAD_IN for w in phrase.split()}
+_LEAD_IN_RE = r"^\s*(?:(?:" + "|".join(LEAD_IN) + r")[\s,]+)*"
+
+
+def _content_tokens(text):
+    return [t for t in normalize(text) if t not in _LEAD_IN_WORDS]
+
+
+def _template_regex(template):
+    before, _, after = template.partition("{target}")
+    pattern = _LEAD_IN_RE + re.escape(before.strip()) + r"\s+(?P<target>.+?)"
+    if after.strip():
+        pattern += r"\s+" + re.escape(after.strip())
+    return re.compile(pattern + r"[\s?.!]*$", re.IGNORECASE)
+
+
+class _Fitted:
+    """One immutable fit of IntentClassifier: the examples it covers and
+    their inverted index. Swapped in whole, so readers never see a mix."""
+    __slots__ = ("examples", "idf", "unseen_idf", "postings", "templated")
+
+    def __init__(self, examples, idf, unseen_idf, postings, templated):
+        self.examples = examples
+        self.idf = idf
+        self.unseen_idf = unseen_idf
+        self.postings = postings
+        self.templated = templated
+
+
+class IntentClassifier:
+    """Character n-gram TF-IDF nearest-neighbour classifier.
+
+    Example vectors are stored as an inverted index of NumPy arrays, so
+    scoring an utterance is a couple of ``np.bincount`` calls over the
+    postings of its n-grams. Each example is scored by a blend of cosine
+    similarity and how much of the example's weight the utterance covers;
+    templated examples use coverage alone, since the target adds words the
+    example can't contain. ``classify`` then scales the top candidates down
+    by the share of utterance words neither the example nor its target slot
+    accounts for, and holds EXACT_INTENTS to an exact match.
+
+    Examples may be added from one thread (command learning) while another
+    classifies (the listener's speculator): fitting happens under a lock and
+    each call scores against a single fitted snapshot.
+    """
+
+    def __init__(self, ngram_range=(3, 4)):
+        self.ngram_range = ngram_range
+        self._examples = []     # (text, action, template regex or None)
+        self._fitted = None
+        self._dirty = True
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.confident = 0
+        self.total_time = 0.0
+
+    def _grams(self, text):
+        key = " ".join(normalize(text))
+        grams = set()
+        for n in range(self.ngram_range[0], self.ngram_range[1] + 1):
+            grams |= char_ngrams(key, n)
+        return {zlib.crc32(g.encode()) for g in grams}
+
+    def add_example(self, text, action):
+        """Add an utterance. ``action`` is an intent dict; a "{target}" in
+        ``text`` makes it a template whose slot fills the dict's target."""
+        template = _template_regex(text) if "{target}" in text else None
+        with self._lock:
+            self._examples.append((text.replace("{target}", " "), action, template))
+            self._dirty = True
+
+    def fit(self):
+        with self._lock:
+            return self._fit()
+
+    def _fit(self):
+        examples = tuple(self._examples)
+        docs = [self._grams(text) for text, _, _ in examples]
+        n = len(docs)
+        df = defaultdict(int)
+        for doc in docs:
+            for g in doc:
+                df[g] += 1
+        idf = {g: math.log((1 + n) / (1 + c)) + 1 for g, c in df.items()}
+        postings = defaultdict(lambda: ([], [], []))
+        for i, doc in enumerate(docs):
+            weights = {g: idf[g] for g in doc}
+            l2 = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+            l1 = sum(weights.values()) or 1.0
+            for g, w in weights.items():
+                rows, cos_w, cover_w = postings[g]
+                rows.append(i)
+                cos_w.append(w / l2)
+                cover_w.append(w / l1)
+        postings = {g: (np.array(r, dtype=np.int32), np.array(c, dtype=np.float32),
+                        np.array(v, dtype=np.float32))
+                    for g, (r, c, v) in postings.items()}
+        templated = np.array([t is not None for _, _, t in examples], dtype=bool)
+        self._fitted = _Fitted(examples, idf, math.log(1 + n) + 1, postings, templated)
+        self._dirty = False
+        return self._fitted
+
+    def _current(self):
+        """The latest fit, refitting first if examples were added since."""
+        with self._lock:
+            return self._fit() if self._dirty else self._fitted
+
+    def scores(self, user_input, fitted=None):
+        fitted = fitted or self._current()
+        n = len(fitted.examples)
+        grams = self._grams(user_input)
+        if not n or not grams:
+            return np.zeros(n, dtype=np.float32)
+        q_norm = math.sqrt(sum(fitted.idf.get(g, fitted.unseen_idf) ** 2 for g in grams))
+        hits = [(fitted.postings[g], fitted.idf[g]) for g in grams if g in fitted.postings]
+        if not hits:
+            return np.zeros(n, dtype=np.float32)
+        rows = np.concatenate([p[0] for p, _ in hits])
+        cos_w = np.concatenate([p[1] * (w / q_norm) for p, w in hits])
+        cover_w = np.concatenate([p[2] for p, _ in hits])
+        cos = np.bincount(rows, weights=cos_w, minlength=n)
+        cover = np.bincount(rows, weights=cover_w, minlength=n)
+        return np.where(fitted.templated, cover, 0.5 * (cos + cover))
+
+    def classify(self, user_input, threshold=0.0, top_k=3):
+        """Return ``(intent dict, confidence)``, or ``(None, best score)``
+        if nothing clears ``threshold``."""
+        start = time.perf_counter()
+        self.calls += 1
+        result, confidence = None, 0.0
+        fitted = self._current()
+        scores = self.scores(user_input, fitted)
+        tokens = _content_tokens(user_input)
+        if scores.size:
+            for i in np.argsort(scores)[::-1][:top_k]:
+                score = float(scores[i])
+                if score < threshold:
+                    confidence = max(confidence, score)
+                    break
+                text, action, template = fitted.examples[i]
+                target = None
+                if template is not None:
+                    m = template.search(user_input)
+                    if not m:
+                        continue
+                    target = m.group("target").strip()
+                elif action.get("intent") in EXACT_INTENTS and tokens != _content_tokens(text):
+                    continue
+                score *= self._covered(tokens, text, target)
+                confidence = max(confidence, score)
+                if score >= threshold and (result is None or score > result[1]):
+                    result = (dict(action, target=target) if template is not None else dict(action), score)
+        if result is not None:
+            result, confidence = result
+            self.confident += 1
+        self.total_time += time.perf_counter() - start
+        return result, confidence
+
+    @staticmethod
+    def _covered(tokens, text, target):
+        """Score factor: 0.6, plus 0.4 times the share of ``tokens`` found in
+        the example ``text`` or its ``target``."""
+        if not tokens:
+            return 1.0
+        known = set(normalize(text)) | set(normalize(target))
+        return 0.6 + 0.4 * sum(t in known for t in tokens) / len(tokens)
+
+    def stats(self):
+        return {
+            "examples": len(self._examples),
+            "calls": self.calls,
+            "confident": self.confident,
+            "mean_us": (self.total_time / self.calls * 1e6) if self.calls else None,
+        }
+
+
+def build_intent_classifier(learned_commands, examples=INTENT_EXAMPLES):
+    classifier = IntentClassifier()
+    for intent, utterances in examples.items():
+        for text in utterances:
+            classifier.add_example(text, {"intent": intent, "target": None})
+    for phrase, action in list(learned_commands.items())[-MAX_LEARNED_EXAMPLES:]:
+        classifier.add_example(phrase, action)
+    classifier.fit()
+    return classifier
@@ -0,0 +1,289 @@
+# ego_llm.py
+#
+# GPT-2 intent extraction with a cached few-shot prefix. The fixed part of
+# the prompt is encoded once per device and its past_key_values reused, so
+# each request only runs the model over the user's line. Decoding is greedy,
+# constrained to a single-line {...} object, and stops at the closing brace.
+#
+# generate_batch() decodes several commands in one batched forward pass per
+# step, for callers (ego_server) that collect concurrent requests.
+#
+# load_intent_llm() builds the model for a named inference profile (fp32 or
+# dynamic int8), pins torch's thread counts and runs a warm-up pass so the
+# first real command isn't the slow one.
+
+import copy
+import json
+import re
+import threading
+import time
+
+import torch
+
+PROMPT_PREFIX = (
+    "Extract the intent and target from the following user command. "
+    "Reply in JSON with keys 'intent' and 'target'.\n"
+    "User: Open Spotify\n{'intent': 'open_app', 'target': 'Spotify'}\n"
+    "User: Search for Python tutorials\n{'intent': 'web_search', 'target': 'Python tutorials'}\n"
+    "User: What time is it?\n{'intent': 'get_time', 'target': null}\n"
+)
+MAX_NEW_TOKENS = 60
+MODEL_NAME = "gpt2"
+
+# Inference profiles: "quantize" applies dynamic int8 quantization to the
+# linear layers (CPU only), "threads" pins torch's intra-op thread count
+# (None keeps torch's default).
+INFERENCE_PROFILES = {
+    "fp32": {"quantize": False, "threads": None},
+    "int8": {"quantize": True, "threads": None},
+    "int8-1t": {"quantize": True, "threads": 1},
+}
+WARMUP_INPUT = "Open Spotify"
+
+_FIELD_RE = re.compile(r"""['"](intent|target)['"]\s*:\s*(?:['"]([^'"]*)['"]|(null|None))""")
+
+
+def build_prompt(user_input):
+    """The full prompt, as the uncached path would encode it."""
+    return PROMPT_PREFIX + f"User: {user_input}\n"
+
+
+def parse_intent(text):
+    """Turn a generated ``{...}`` object into an intent dict, or None."""
+    match = re.search(r'\{.*?\}', text, re.DOTALL)
+    if not match:
+        return None
+    try:
+        data = json.loads(match.group(0).replace("'", '"'))
+        if isinstance(data, dict):
+            return {"intent": data.get("intent"), "target": data.get("target")}
+    except Exception:
+        pass
+    fields = {key: value for key, value, _ in _FIELD_RE.findall(match.group(0))}
+    if fields.get("intent"):
+        return {"intent": fields["intent"], "target": fields.get("target") or None}
+    return None
+
+
+class IntentLLM:
+    def __init__(self, model, tokenizer, device):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.device = device
+        self._prefix_cache = {}     # str(device) -> past_key_values for PROMPT_PREFIX
+        self._prefix_len = None
+        self._lock = threading.Lock()
+        self._masks = None
+        self.profile = None
+        self.load_time = None
+        self.rss_bytes = None
+        self.calls = 0
+        self.batches = 0
+        self.tokens_generated = 0
+        self.total_time = 0.0
+
+    # --- cached prefix ---
+    def _prefix(self):
+        key = str(self.device)
+        past = self._prefix_cache.get(key)
+        if past is None:
+            with self._lock:
+                past = self._prefix_cache.get(key)
+                if past is None:
+                    ids = self.tokenizer(PROMPT_PREFIX, return_tensors="pt").input_ids.to(self.device)
+                    with torch.no_grad():
+                        past = self.model(input_ids=ids, use_cache=True).past_key_values
+                    self._prefix_len = ids.shape[1]
+                    self._prefix_cache[key] = past
+        # Cache objects are extended in place by the forward pass; tuples are not.
+        return copy.deepcopy(past) if hasattr(past, "crop") else past
+
+    def _prefix_batch(self, n):
+        """The cached prefix repeated for a batch of ``n`` sequences."""
+        past = self._prefix()
+        if hasattr(past, "batch_repeat_interleave"):
+            past.batch_repeat_interleave(n)
+            return past
+        return tuple(tuple(t.expand(n, *t.shape[1:]).contiguous() for t in layer) for layer in past)
+
+    # --- constrained decoding ---
+    def _token_masks(self):
+        """Boolean vocab masks: tokens that may open the object, and tokens
+        allowed inside it (single line, no nested braces)."""
+        if self._masks is None:
+            vocab_size = self.model.get_output_embeddings().weight.shape[0]
+            texts = self.tokenizer.batch_decode([[i] for i in range(vocab_size)])
+            opening = torch.tensor([t.lstrip().startswith("{") and "}" not in t for t in texts],
+                                   dtype=torch.bool)
+            inner = torch.tensor([t != "" and "\n" not in t and "{" not in t for t in texts],
+                                 dtype=torch.bool)
+            self._masks = (opening.to(self.device), inner.to(self.device))
+        return self._masks
+
+    def generate(self, user_input, max_new_tokens=MAX_NEW_TOKENS):
+        """Return ``(generated text, tokens generated)`` for one command."""
+        start = time.perf_counter()
+        opening, inner = self._token_masks()
+        past = self._prefix()
+        ids = self.tokenizer(f"User: {user_input}\n", return_tensors="pt").input_ids.to(self.device)
+        text, started, steps = "", False, 0
+        with torch.no_grad():
+            while steps < max_new_tokens:
+                out = self.model(input_ids=ids, past_key_values=past, use_cache=True)
+                past = out.past_key_values
+                logits = out.logits[0, -1]
+                allowed = inner if started else opening
+                token = int(torch.argmax(logits.masked_fill(~allowed, float("-inf"))))
+                steps += 1
+                text, done = self._append(text, token, started)
+                started = True
+                if done:
+                    break
+                ids = torch.tensor([[token]], device=self.device)
+        self.calls += 1
+        self.tokens_generated += steps
+        self.total_time += time.perf_counter() - start
+        return text, steps
+
+    def _append(self, text, token, started):
+        """Add a generated token to ``text``; returns ``(text, finished)``."""
+        piece = self.tokenizer.decode([token])
+        if not started:
+            piece = piece[piece.index("{"):]
+        if "}" in piece:
+            return text + piece[:piece.index("}") + 1], True
+        return text + piece, False
+
+    def generate_batch(self, user_inputs, max_new_tokens=MAX_NEW_TOKENS):
+        """Like generate() for several commands at once: one forward pass per
+        step for the whole batch. Returns a ``(text, tokens)`` pair per input."""
+        if len(user_inputs) == 1:
+            return [self.generate(user_inputs[0], max_new_tokens)]
+        start = time.perf_counter()
+        opening, inner = self._token_masks()
+        n = len(user_inputs)
+        past = self._prefix_batch(n)
+        # User lines differ in length: left-pad them after the shared prefix,
+        # mask the padding out and give real tokens contiguous positions.
+        encoded = [self.tokenizer(f"User: {u}\n").input_ids for u in user_inputs]
+        width = max(len(e) for e in encoded)
+        pad = self.tokenizer.eos_token_id
+        ids = torch.tensor([[pad] * (width - len(e)) + e for e in encoded], device=self.device)
+        real = torch.tensor([[0] * (width - len(e)) + [1] * len(e) for e in encoded], device=self.device)
+        attention = torch.cat([torch.ones(n, self._prefix_len, dtype=real.dtype, device=self.device), real], dim=1)
+        positions = self._prefix_len + (real.cumsum(1) - 1).clamp(min=0)
+        texts, steps = [""] * n, [0] * n
+        started = torch.zeros(n, dtype=torch.bool, device=self.device)
+        finished = [False] * n
+        with torch.no_grad():
+            for _ in range(max_new_tokens):
+                out = self.model(input_ids=ids, past_key_values=past, attention_mask=attention,
+                                 position_ids=positions, use_cache=True)
+                past = out.past_key_values
+                allowed = torch.where(started[:, None], inner[None, :], opening[None, :])
+                tokens = out.logits[:, -1].masked_fill(~allowed, float("-inf")).argmax(-1)
+                for i, token in enumerate(tokens.tolist()):
+                    if finished[i]:
+                        continue
+                    steps[i] += 1
+                    texts[i], finished[i] = self._append(texts[i], token, bool(started[i]))
+                if all(finished):
+                    break
+                started[:] = True
+                ids = tokens[:, None]
+                positions = positions[:, -1:] + 1
+                attention = torch.cat([attention, attention.new_ones(n, 1)], dim=1)
+        self.calls += n
+        self.batches += 1
+        self.tokens_generated += sum(steps)
+        self.total_time += time.perf_counter() - start
+        return list(zip(texts, steps))
+
+    def extract(self, user_input):
+        text, _ = self.generate(user_input)
+        return parse_intent(text)
+
+    def extract_batch(self, user_inputs):
+        return [parse_intent(text) for text, _ in self.generate_batch(user_inputs)]
+
+    def stats(self):
+        return {
+            "profile": self.profile,
+            "load_time_s": self.load_time,
+            "rss_mb": self.rss_bytes / 2**20 if self.rss_bytes else None,
+            "calls": self.calls,
+            "batches": self.batches,
+            "mean_tokens": self.tokens_generated / self.calls if self.calls else None,
+            "mean_latency_ms": self.total_time / self.calls * 1000 if self.calls else None,
+            "cached_devices": list(self._prefix_cache),
+        }
+
+
+# === Inference profiles ===
+def _rss():
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return None
+
+
+def _conv1d_to_linear(model):
+    """GPT-2 implements its projections as transformers' Conv1D, which dynamic
+    quantization doesn't recognize. Swap them for equivalent nn.Linear layers."""
+    from transformers.pytorch_utils import Conv1D
+    for parent in list(model.modules()):
+        for name, child in list(parent.named_children()):
+            if isinstance(child, Conv1D):
+                n_in, n_out = child.weight.shape
+                linear = torch.nn.Linear(n_in, n_out)
+                linear.weight.data = child.weight.data.t().contiguous()
+                linear.bias.data = child.bias.data
+                setattr(parent, name, linear)
+    return model
+
+
+def quantize_int8(model):
+    """Dynamic int8 quantization of every linear layer except the LM head."""
+    model = _conv1d_to_linear(model)
+    spec = {name: torch.quantization.default_dynamic_qconfig
+            for name, module in model.named_modules()
+            if isinstance(module, torch.nn.Linear) and not name.endswith("lm_head")}
+    return torch.quantization.quantize_dynamic(model, spec, dtype=torch.qint8)
+
+
+def set_threads(threads):
+    if threads:
+        torch.set_num_threads(threads)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            pass  # can only be set before any parallel work has started
+
+
+def load_intent_llm(model_name=MODEL_NAME, profile="fp32", threads=None, warmup=True):
+    """Load the intent model under an inference profile and return an IntentLLM
+    with its load time and resident memory recorded."""
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+
+    settings = INFERENCE_PROFILES[profile]
+    set_threads(threads or settings["threads"])
+    rss_before = _rss()
+    start = time.perf_counter()
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForCausalLM.from_pretrained(model_name)
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    if settings["quantize"]:
+        device = torch.device("cpu")  # dynamic quantization only has CPU kernels
+        model = quantize_int8(model)
+    model = model.to(device).eval()
+    llm = IntentLLM(model, tokenizer, device)
+    if warmup:
+        llm.generate(WARMUP_INPUT)
+        llm.calls, llm.tokens_generated, llm.total_time = 0, 0, 0.0
+    llm.profile = profile
+    llm.load_time = time.perf_counter() - start
+    rss_after = _rss()
+    if rss_before is not None and rss_after is not None:
+        llm.rss_bytes = rss_after - rss_before
+    return llm
@@ -0,0 +1,248 @@
+# ego_metrics.py
+#
+# Background system-metrics sampler. A daemon thread reads CPU, memory and
+# battery every SAMPLE_INTERVAL seconds into fixed-size array-backed ring
+# buffers, and scans per-process CPU/memory every PROCESS_EVERY samples into
+# a ring of the same kind.
+# The system_info skill answers from the latest sample instead of blocking
+# on psutil.cpu_percent(interval=1), and can answer trend questions
+# ("average CPU over the last 5 minutes", "what's using the most memory").
+#
+# The sampler times its own work with thread CPU time; if its samples cost
+# more than MAX_CPU_SHARE of a core on average, it stretches the interval.
+
+import math
+import threading
+import time
+from array import array
+
+SAMPLE_INTERVAL = 5.0       # seconds between samples
+HISTORY_SECONDS = 60 * 60   # how far back the ring buffers reach
+PROCESS_EVERY = 6           # samples between per-process scans (the expensive part)
+TOP_PROCESSES = 5
+MAX_CPU_SHARE = 0.005       # fraction of one core the sampler may spend
+
+
+class RingBuffer:
+    """Fixed-capacity float ring buffer over an ``array('d')``."""
+    __slots__ = ("_data", "_next", "count")
+
+    def __init__(self, capacity):
+        self._data = array("d", [math.nan]) * capacity
+        self._next = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, value):
+        self._data[self._next] = math.nan if value is None else value
+        self._next = (self._next + 1) % len(self._data)
+        self.count = min(self.count + 1, len(self._data))
+
+    def last(self):
+        return self._data[self._next - 1] if self.count else None
+
+    def values(self):
+        """Oldest to newest."""
+        if self.count < len(self._data):
+            return self._data[:self.count]
+        return self._data[self._next:] + self._data[:self._next]
+
+
+class ProcessRing:
+    """Fixed-capacity ring of process scans, each holding the top ``n``
+    processes by CPU and by memory. Pids, CPU and RSS live in ``array``s laid
+    out scan by scan (CPU ranking, then memory ranking); names sit in a
+    preallocated list with the same layout."""
+    RANKINGS = ("cpu", "memory")
+
+    def __init__(self, capacity, n=TOP_PROCESSES):
+        self.n = n
+        slots = capacity * n * len(self.RANKINGS)
+        self.times = array("d", [math.nan]) * capacity
+        self.pids = array("q", [-1]) * slots       # -1: empty slot
+        self.cpu = array("d", [0.0]) * slots
+        self.rss = array("d", [0.0]) * slots
+        self.names = [None] * slots
+        self._next = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, now, top):
+        """``top`` maps "cpu"/"memory" to ``[(name, pid, cpu percent, rss bytes), ...]``."""
+        scan = self._next
+        self.times[scan] = now
+        for r, by in enumerate(self.RANKINGS):
+            base = (scan * len(self.RANKINGS) + r) * self.n
+            rows = top[by][:self.n]
+            for i in range(self.n):
+                if i < len(rows):
+                    name, pid, cpu, rss = rows[i]
+                    self.names[base + i], self.pids[base + i] = name, pid
+                    self.cpu[base + i], self.rss[base + i] = cpu, rss
+                else:
+                    self.names[base + i], self.pids[base + i] = None, -1
+        self._next = (self._next + 1) % len(self.times)
+        self.count = min(self.count + 1, len(self.times))
+
+    def latest(self, by, n):
+        """``[(name, pid, cpu percent, rss bytes), ...]`` from the newest scan."""
+        if not self.count:
+            return []
+        scan = (self._next - 1) % len(self.times)
+        base = (scan * len(self.RANKINGS) + self.RANKINGS.index(by)) * self.n
+        return [(self.names[i], self.pids[i], self.cpu[i], int(self.rss[i]))
+                for i in range(base, base + min(n, self.n)) if self.pids[i] >= 0]
+
+
+class MetricsSampler:
+    def __init__(self, interval=SAMPLE_INTERVAL, history_seconds=HISTORY_SECONDS,
+                 process_every=PROCESS_EVERY, max_cpu_share=MAX_CPU_SHARE):
+        self.interval = interval
+        self.process_every = process_every
+        self.max_cpu_share = max_cpu_share
+        capacity = max(2, int(history_seconds / interval))
+        self.times = RingBuffer(capacity)       # time.monotonic() of each sample
+        self.cpu = RingBuffer(capacity)         # percent, whole system
+        self.memory = RingBuffer(capacity)      # percent used
+        self.battery = RingBuffer(capacity)     # percent, NaN without a battery
+        self.plugged = RingBuffer(capacity)     # 1.0 / 0.0, NaN without a battery
+        self.processes = ProcessRing(max(1, capacity // process_every))
+        self._psutil = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.current_interval = interval
+        self.samples = 0
+        self.process_scans = 0
+        self.busy_time = 0.0                    # sampler thread CPU seconds
+        self.started_at = None
+
+    # --- sampling ---
+    def start(self):
+        """Start sampling on a daemon thread. Returns False without psutil."""
+        if self._thread is not None:
+            return True
+        try:
+            import psutil
+        except ImportError:
+            print("System metrics unavailable: psutil is not installed.")
+            return False
+        self._psutil = psutil
+        psutil.cpu_percent(interval=None)       # the first reading only sets the baseline
+        self.started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._loop, args=(self._stop,), name="ego-metrics",
+                                        daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self, timeout=None):
+        """Stop sampling; start() may be called again afterwards."""
+        thread, stop = self._thread, self._stop
+        if thread is None:
+            return
+        stop.set()
+        thread.join(timeout)
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self):
+        return self._thread is not None and not self._stop.is_set()
+
+    def _loop(self, stop):
+        # A short first wait so there is something to answer with soon after start.
+        wait = min(self.interval, 1.0)
+        while not stop.wait(wait):
+            start = time.thread_time()
+            try:
+                self.sample()
+            except Exception as e:
+                print(f"Metrics sample failed: {e}")
+            self.busy_time += time.thread_time() - start
+            # Stretch the interval when samples (process scans included, on
+            # average) cost more than the budget allows.
+            mean_cost = self.busy_time / max(1, self.samples)
+            self.current_interval = max(self.interval, mean_cost / self.max_cpu_share)
+            wait = self.current_interval
+
+    def sample(self):
+        psutil = self._psutil
+        cpu = psutil.cpu_percent(interval=None)
+        memory = psutil.virtual_memory().percent
+        battery = psutil.sensors_battery() if hasattr(psutil, "sensors_battery") else None
+        now = time.monotonic()
+        with self._lock:
+            self.times.append(now)
+            self.cpu.append(cpu)
+            self.memory.append(memory)
+            self.battery.append(battery.percent if battery else None)
+            self.plugged.append(float(battery.power_plugged) if battery and battery.power_plugged is not None
+                                else None)
+            self.samples += 1
+        if (self.samples - 1) % self.process_every == 0:
+            self._scan_processes(now)
+
+    def _scan_processes(self, now):
+        procs = []
+        # process_iter() keeps Process objects between calls, so cpu_percent
+        # is measured since the previous scan without sleeping.
+        for p in self._psutil.process_iter(["pid", "name", "cpu_percent", "memory_info"]):
+            info = p.info
+            if info["memory_info"] is None:
+                continue
+            procs.append((info["name"] or str(info["pid"]), info["pid"],
+                          info["cpu_percent"] or 0.0, info["memory_info"].rss))
+        top = {
+            "cpu": sorted(procs, key=lambda p: p[2], reverse=True)[:TOP_PROCESSES],
+            "memory": sorted(procs, key=lambda p: p[3], reverse=True)[:TOP_PROCESSES],
+        }
+        with self._lock:
+            self.processes.append(now, top)
+            self.process_scans += 1
+
+    # --- queries ---
+    def latest(self):
+        """The newest sample as a dict, or None before the first one."""
+        with self._lock:
+            if not self.times:
+                return None
+            battery, plugged = self.battery.last(), self.plugged.last()
+            return {
+                "age_s": time.monotonic() - self.times.last(),
+                "cpu": self.cpu.last(),
+                "memory": self.memory.last(),
+                "battery": None if math.isnan(battery) else battery,
+                "plugged": None if math.isnan(plugged) else bool(plugged),
+            }
+
+    def average(self, metric, seconds):
+        """Mean, min and max of ``metric`` ("cpu", "memory", "battery") over the
+        last ``seconds``, as ``(mean, low, high, seconds covered)``, or None."""
+        series = getattr(self, metric)
+        cutoff = time.monotonic() - seconds
+        with self._lock:
+            values = [v for t, v in zip(self.times.values(), series.values())
+                      if t >= cutoff and not math.isnan(v)]
+            oldest = next((t for t in self.times.values() if t >= cutoff), None)
+        if not values:
+            return None
+        return sum(values) / len(values), min(values), max(values), time.monotonic() - oldest
+
+    def top_processes(self, by="memory", n=TOP_PROCESSES):
+        """``[(name, pid, cpu percent, rss bytes), ...]`` from the latest scan."""
+        with self._lock:
+            return self.processes.latest(by, n)
+
+    def stats(self):
+        elapsed = time.monotonic() - self.started_at if self.started_at else None
+        return {
+            "samples": self.samples,
+            "process_scans": self.process_scans,
+            "interval_s": self.current_interval,
+            "mean_sample_ms": self.busy_time / self.samples * 1000 if self.samples else None,
+            "cpu_share": self.busy_time / elapsed if elapsed else None,
+        }
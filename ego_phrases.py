@@ -0,0 +1,185 @@
+# ego_phrases.py
+#
+# Pre-rendered audio for phrases EGO says all the time ("Yes?", "Goodbye!",
+# "The time is" ...). Each phrase is rendered once through pyttsx3's
+# save_to_file, stored on disk keyed by text, voice and rate, and played
+# straight from memory through sounddevice, skipping the engine round-trip.
+# Sentences that miss the cache are spoken live and promoted into it once
+# they have been said often enough.
+
+import collections
+import hashlib
+import os
+import threading
+import wave
+
+PHRASE_CACHE_DIR = "phrase_cache"
+COMMON_PHRASES = (
+    "Yes?",
+    "Goodbye!",
+    "Screenshot saved.",
+    "Still working on it...",
+    "I didn't understand that.",
+    "Would you like to teach me what to do?",
+    "Okay, I've handled that.",
+    "Okay, let me know if you change your mind.",
+    "I've learned a new command!",
+    "Sorry, that's taking too long.",
+    "Please try again later.",
+    "EGO online and listening...",
+)
+# Rendered on their own so the live part of e.g. "The time is 14:05." is short.
+PHRASE_PREFIXES = ("The time is",)
+PROMOTE_AFTER = 3           # live renditions before a sentence is cached
+MAX_PHRASE_CHARS = 80       # longer sentences are too unlikely to repeat verbatim
+MAX_PHRASES = 256
+
+_SAMPLE_TYPES = {1: "u1", 2: "<i2", 4: "<i4"}
+
+
+def _load_wav(path):
+    import numpy as np
+
+    with wave.open(path, "rb") as f:
+        frames = f.readframes(f.getnframes())
+        pcm = np.frombuffer(frames, dtype=_SAMPLE_TYPES[f.getsampwidth()])
+        return pcm.reshape(-1, f.getnchannels()), f.getframerate()
+
+
+class PhraseAudioCache:
+    def __init__(self, cache_dir=PHRASE_CACHE_DIR, phrases=COMMON_PHRASES, prefixes=PHRASE_PREFIXES,
+                 promote_after=PROMOTE_AFTER, max_phrases=MAX_PHRASES):
+        try:
+            import sounddevice
+            self._sd = sounddevice
+        except Exception:
+            self._sd = None
+        self.cache_dir = cache_dir
+        self.prefixes = tuple(prefixes)
+        self.promote_after = promote_after
+        self.max_phrases = max_phrases
+        self.enabled = False
+        self._voice_key = ""
+        self._clips = {}                            # text -> (pcm, samplerate)
+        self._unrenderable = set()
+        self._pending = collections.deque(dict.fromkeys(tuple(phrases) + self.prefixes))
+        self._live = collections.Counter()          # text -> live renditions
+        self._lock = threading.Lock()
+        self.counters = collections.Counter()
+
+    def bind(self, engine):
+        """Attach to the TTS engine that renders clips. Must be called on the
+        thread that owns the engine. Leaves the cache disabled if the engine
+        can't render to a file or there is no sounddevice to play through."""
+        if self._sd is None or not hasattr(engine, "save_to_file"):
+            return self
+        try:
+            voice, rate = engine.getProperty("voice"), engine.getProperty("rate")
+        except Exception:
+            voice, rate = None, None
+        self._voice_key = f"{voice}|{rate}"
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.enabled = True
+        # Clips rendered by an earlier run are ready straight away.
+        for text in list(self._pending):
+            if self._load(text) is not None:
+                self._pending.remove(text)
+        return self
+
+    def _path(self, text):
+        digest = hashlib.sha1(f"{text}|{self._voice_key}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest + ".wav")
+
+    def _load(self, text):
+        path = self._path(text)
+        if not os.path.exists(path):
+            return None
+        try:
+            clip = _load_wav(path)
+        except Exception as e:
+            # Some drivers write AIFF or nothing at all; don't keep trying.
+            print(f"Could not load cached audio for {text!r}: {e}")
+            self._unrenderable.add(text)
+            return None
+        with self._lock:
+            self._clips[text] = clip
+        return clip
+
+    # --- lookup ---
+    def get(self, text):
+        """The cached ``(pcm, samplerate)`` for ``text``, or None."""
+        if not self.enabled:
+            return None
+        clip = self._clips.get(text)
+        if clip is None:
+            self.counters["misses"] += 1
+        else:
+            self.counters["hits"] += 1
+        return clip
+
+    def split(self, sentence):
+        """Split off a cached prefix: ``["The time is", "14:05."]``. Sentences
+        without one come back whole."""
+        if self.enabled:
+            for prefix in self.prefixes:
+                if sentence.startswith(prefix + " ") and prefix in self._clips:
+                    return [prefix, sentence[len(prefix) + 1:]]
+        return [sentence]
+
+    def note_live(self, text):
+        """Record that ``text`` was synthesized live; queue it for rendering
+        once it has come up ``promote_after`` times."""
+        if not self.enabled or text in self._clips or text in self._unrenderable:
+            return
+        if len(text) > MAX_PHRASE_CHARS or len(self._clips) >= self.max_phrases:
+            return
+        self._live[text] += 1
+        if self._live[text] == self.promote_after:
+            self._pending.append(text)
+            self.counters["promotions"] += 1
+
+    # --- rendering (TTS thread only) ---
+    def has_pending(self):
+        return self.enabled and bool(self._pending)
+
+    def render_next(self, engine):
+        """Render one queued phrase to disk. Returns False when there was nothing to do."""
+        try:
+            text = self._pending.popleft()
+        except IndexError:
+            return False
+        if text in self._clips or self._load(text) is not None:
+            return True
+        path = self._path(text)
+        tmp = path + ".tmp.wav"
+        try:
+            engine.save_to_file(text, tmp)
+            engine.runAndWait()
+            os.replace(tmp, path)
+        except Exception as e:
+            print(f"Could not render {text!r}: {e}")
+            self._unrenderable.add(text)
+            return True
+        if self._load(text) is not None:
+            self.counters["renders"] += 1
+        return True
+
+    # --- playback ---
+    def play(self, clip):
+        pcm, samplerate = clip
+        self._sd.play(pcm, samplerate)
+        self._sd.wait()
+
+    def stop(self):
+        if self.enabled:
+            try:
+                self._sd.stop()
+            except Exception:
+                pass
+
+    def stats(self):
+        stats = dict(self.counters)
+        stats["enabled"] = self.enabled
+        stats["phrases"] = len(self._clips)
+        stats["pending"] = len(self._pending)
+        return stats
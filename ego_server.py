@@ -0,0 +1,438 @@
+# ego_server.py
+#
+# Headless multi-session server. Thin clients stream PCM audio (16 kHz,
+# int16 mono) or send text over a local TCP socket, or optionally a
+# WebSocket, and get back the transcript, intent and reply. Each session has
+# its own Vosk recognizer and dialogue state (history, running skill); the
+# Vosk model, intent tiers, LLM and skills are loaded once and shared.
+# LLM requests from concurrent sessions are collected for a few milliseconds
+# and decoded as one batch.
+#
+# TCP framing: 1-byte kind + 4-byte big-endian length + payload.
+#   client -> server  T: text command (UTF-8)   A: audio chunk   E: end of utterance
+#   server -> client  R: JSON message ({"type": "hello" | "result" | "cancelled" | "error", ...})
+# WebSocket: binary messages are audio; text messages are JSON
+# {"text": "..."} or {"end": true}; replies are JSON text messages.
+# A session keeps reading frames while a command is being handled, and a
+# new command cancels the one still running ("cancelled" reply).
+#
+#     python ego_server.py --port 8765 --ws-port 8766 --llm
+
+import argparse
+import asyncio
+import collections
+import itertools
+import json
+import os
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import ego_core
+from ego_skills import SkillError, SkillTimeout, SkillCancelled
+from ego_startup import startup
+
+HOST = "127.0.0.1"
+PORT = 8765
+SAMPLE_RATE = 16000
+MAX_SESSIONS = 32           # further connections are turned away
+MAX_LLM_QUEUE = 64          # LLM requests waiting beyond this are shed to "unresolved"
+LLM_BATCH_SIZE = 8
+LLM_BATCH_WAIT_MS = 10      # how long the first request waits for company
+HISTORY_TURNS = 20
+STATS_INTERVAL = None       # seconds between stats lines, or None
+
+FRAME = struct.Struct("!cI")
+TEXT, AUDIO, END, REPLY = b"T", b"A", b"E", b"R"
+MAX_FRAME = 1 << 20
+
+# Built-ins that act on the machine they run on are left to the client.
+CLIENT_ACTIONS = {"open_app", "web_search", "screenshot", "open_website"}
+
+
+async def read_frame(reader):
+    kind, length = FRAME.unpack(await reader.readexactly(FRAME.size))
+    if length > MAX_FRAME:
+        raise ValueError(f"frame of {length} bytes exceeds {MAX_FRAME}")
+    return kind, await reader.readexactly(length)
+
+
+def write_frame(writer, kind, payload):
+    writer.write(FRAME.pack(kind, len(payload)) + payload)
+
+
+class Overloaded(Exception):
+    pass
+
+
+# === LLM micro-batching ===
+class IntentBatcher:
+    """Collects LLM intent requests and runs them through one generate_batch()."""
+
+    def __init__(self, llm, max_batch=LLM_BATCH_SIZE, max_wait=LLM_BATCH_WAIT_MS / 1000,
+                 max_queue=MAX_LLM_QUEUE):
+        self.llm = llm
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self._queue = asyncio.Queue()
+        # One decoding thread: batches run back to back, never concurrently.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ego-llm-batch")
+        self._task = None
+        self.requests = 0
+        self.batches = 0
+        self.shed = 0
+        self.largest_batch = 0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def extract(self, text):
+        if self._queue.qsize() >= self.max_queue:
+            self.shed += 1
+            raise Overloaded()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            batch = [(text, fut) for text, fut in batch if not fut.cancelled()]
+            if not batch:
+                continue
+            self.requests += len(batch)
+            self.batches += 1
+            self.largest_batch = max(self.largest_batch, len(batch))
+            try:
+                results = await loop.run_in_executor(self._executor, self.llm.extract_batch,
+                                                     [text for text, _ in batch])
+            except Exception as e:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+            for (_, fut), result in zip(batch, results):
+                if not fut.done():
+                    fut.set_result(result)
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch": self.requests / self.batches if self.batches else None,
+            "largest_batch": self.largest_batch,
+            "shed": self.shed,
+            "queued": self._queue.qsize(),
+        }
+
+
+# === Sessions ===
+class Session:
+    _ids = itertools.count(1)
+
+    def __init__(self, server, send):
+        self.id = next(self._ids)
+        self.server = server
+        self.send = send                    # coroutine function taking a dict
+        self.recognizer = None
+        self.history = collections.deque(maxlen=HISTORY_TURNS)
+        self.current_job = None
+        self.command = None                 # asyncio task handling the latest command
+        self.exited = asyncio.Event()
+        self.closed = False
+        self._parts = []
+
+    # --- audio ---
+    async def on_audio(self, chunk):
+        if self.recognizer is None:
+            self.recognizer = self.server.new_recognizer()
+        if await self.server.run_stt(self.recognizer.AcceptWaveform, bytes(chunk)):
+            self._parts.append(json.loads(self.recognizer.Result()).get("text", ""))
+
+    async def on_end(self):
+        if self.recognizer is None:
+            self.on_text("")
+            return
+        final = await self.server.run_stt(self.recognizer.FinalResult)
+        self._parts.append(json.loads(final).get("text", ""))
+        text = " ".join(p for p in self._parts if p)
+        self._parts = []
+        self.recognizer.Reset()
+        self.on_text(text)
+
+    # --- dialogue ---
+    def on_text(self, text):
+        """Handle a command in the background, cancelling the previous one."""
+        self.preempt()
+        self.command = asyncio.ensure_future(self.handle_command(text))
+
+    async def handle_command(self, text):
+        start = time.perf_counter()
+        try:
+            intent, tier = await self.server.resolve_intent(text) if text else ({"intent": None, "target": None}, None)
+            reply, client_action = await self.server.act(self, intent)
+        except asyncio.CancelledError:
+            if not self.closed:
+                await self.send({"type": "cancelled", "transcript": text})
+            raise
+        except Exception as e:
+            await self.send({"type": "error", "error": f"{type(e).__name__}: {e}"})
+            return
+        latency = time.perf_counter() - start
+        self.history.append({"text": text, "intent": intent.get("intent"), "target": intent.get("target"),
+                             "reply": reply})
+        self.server.record_latency(latency)
+        await self.send({"type": "result", "transcript": text, "intent": intent.get("intent"),
+                         "target": intent.get("target"), "tier": tier, "reply": reply,
+                         "client_action": client_action, "latency_ms": latency * 1000})
+        if intent.get("intent") == "exit":
+            self.exited.set()
+
+    def preempt(self):
+        """A new command from this session cancels the one still running,
+        and its skill."""
+        command = self.command
+        if command is not None and not command.done():
+            command.cancel()
+        job = self.current_job
+        if job is not None and not job.done():
+            job.cancel()
+
+    def close(self):
+        self.closed = True
+        self.preempt()
+
+
+# === Server ===
+class AssistantServer:
+    def __init__(self, model_path="model", max_sessions=MAX_SESSIONS, use_llm=False,
+                 stt_workers=None):
+        self.model_path = model_path
+        self.max_sessions = max_sessions
+        self.use_llm = use_llm
+        self.model = None
+        self.batcher = None
+        self.sessions = {}
+        self.rejected = 0
+        self.served = 0
+        self._latencies = collections.deque(maxlen=1000)
+        self._stt = ThreadPoolExecutor(max_workers=stt_workers or os.cpu_count(),
+                                       thread_name_prefix="ego-server-stt")
+
+    def load(self):
+        """Load the shared models once, before accepting sessions."""
+        try:
+            from ego_audio import AudioEngine
+            self.model = AudioEngine(self.model_path).load_model()
+        except Exception as e:
+            print(f"Audio disabled, text sessions only: {e}")
+        startup.result("skills")
+        if self.use_llm:
+            ego_core.load_llm()
+        return self
+
+    def new_recognizer(self):
+        if self.model is None:
+            raise RuntimeError("audio is not available on this server")
+        from vosk import KaldiRecognizer
+        return KaldiRecognizer(self.model, SAMPLE_RATE)
+
+    async def run_stt(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._stt, fn, *args)
+
+    async def resolve_intent(self, text):
+        """Rules and classifier inline, the LLM through the batcher. Returns ``(intent, tier)``."""
+        match, tier = ego_core.match_intent(text)
+        if match:
+            return match, tier
+        if self.batcher is None:
+            return {"intent": None, "target": None}, "unresolved"
+        try:
+            result = await self.batcher.extract(text)
+        except Overloaded:
+            return {"intent": None, "target": None}, "shed"
+        return result or {"intent": None, "target": None}, "llm"
+
+    async def act(self, session, intent_data):
+        """Returns ``(reply text or None, whether the client should act itself)``."""
+        intent, target = intent_data.get("intent"), intent_data.get("target")
+        if intent is None:
+            return "I didn't understand that.", False
+        if intent in CLIENT_ACTIONS:
+            return None, True
+        if intent == "get_time":
+            return f"The time is {datetime.now().strftime('%H:%M')}", False
+        if intent == "exit":
+            return "Goodbye!", False
+        job = session.current_job = ego_core.skill_executor.submit(ego_core.skill_registry, intent, target)
+        try:
+            _, result = await asyncio.get_running_loop().run_in_executor(None, ego_core.skill_executor.wait, job)
+            if job.cancelled:
+                raise SkillCancelled(intent)
+        except SkillError as e:
+            print(f"[session {session.id}] error in skill {e.skill_name}: {e.__cause__}")
+            return f"I encountered an error trying to use the {e.skill_name} skill.", False
+        except SkillTimeout:
+            return "Sorry, that's taking too long. Please try again later.", False
+        except SkillCancelled:
+            return None, False
+        if not result:
+            return f"I don't know how to handle the intent '{intent}'.", False
+        return (result if isinstance(result, str) else "Okay, I've handled that."), False
+
+    def record_latency(self, seconds):
+        self.served += 1
+        self._latencies.append(seconds)
+
+    # --- transports ---
+    def _admit(self):
+        if len(self.sessions) >= self.max_sessions:
+            self.rejected += 1
+            return False
+        return True
+
+    async def _handle(self, session, kind, payload):
+        if kind == AUDIO:
+            await session.on_audio(payload)
+        elif kind == END:
+            await session.on_end()
+        elif kind == TEXT:
+            session.on_text(payload.decode("utf-8"))
+        else:
+            await session.send({"type": "error", "error": f"unknown frame kind {kind!r}"})
+
+    async def _serve_session(self, send, frames):
+        if not self._admit():
+            await send({"type": "error", "error": "server busy"})
+            return
+        session = Session(self, send)
+        self.sessions[session.id] = session
+        try:
+            await send({"type": "hello", "session": session.id, "audio": self.model is not None})
+            reading = asyncio.ensure_future(self._read_frames(session, frames))
+            exited = asyncio.ensure_future(session.exited.wait())
+            await asyncio.wait((reading, exited), return_when=asyncio.FIRST_COMPLETED)
+            reading.cancel()
+            exited.cancel()
+        finally:
+            session.close()
+            del self.sessions[session.id]
+
+    async def _read_frames(self, session, frames):
+        async for kind, payload in frames:
+            try:
+                await self._handle(session, kind, payload)
+            except Exception as e:
+                await session.send({"type": "error", "error": f"{type(e).__name__}: {e}"})
+        # The client has stopped sending; let the last command answer first.
+        if session.command is not None:
+            await asyncio.wait((session.command,))
+
+    async def _tcp_client(self, reader, writer):
+        async def send(message):
+            write_frame(writer, REPLY, json.dumps(message).encode("utf-8"))
+            await writer.drain()
+
+        async def frames():
+            while True:
+                try:
+                    yield await read_frame(reader)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+
+        try:
+            await self._serve_session(send, frames())
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _ws_client(self, ws, path=None):
+        async def send(message):
+            await ws.send(json.dumps(message))
+
+        async def frames():
+            async for message in ws:
+                if isinstance(message, bytes):
+                    yield AUDIO, message
+                    continue
+                data = json.loads(message)
+                if data.get("end"):
+                    yield END, b""
+                elif "text" in data:
+                    yield TEXT, data["text"].encode("utf-8")
+
+        await self._serve_session(send, frames())
+
+    async def serve(self, host=HOST, port=PORT, ws_port=None, stats_interval=STATS_INTERVAL):
+        if self.use_llm and ego_core.intent_llm is not None:
+            self.batcher = IntentBatcher(ego_core.intent_llm)
+            self.batcher.start()
+        tcp = await asyncio.start_server(self._tcp_client, host, port)
+        print(f"EGO server listening on {host}:{port}")
+        if ws_port:
+            try:
+                import websockets
+            except ImportError:
+                print("WebSocket sessions need the 'websockets' package; serving TCP only.")
+            else:
+                await websockets.serve(self._ws_client, host, ws_port)
+                print(f"WebSocket sessions on ws://{host}:{ws_port}")
+        if stats_interval:
+            asyncio.get_running_loop().create_task(self._print_stats(stats_interval))
+        async with tcp:
+            await tcp.serve_forever()
+
+    async def _print_stats(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            print(f"[server] {json.dumps(self.stats())}")
+
+    def stats(self):
+        latencies = sorted(self._latencies)
+        p = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000  # noqa: E731
+        return {
+            "sessions": len(self.sessions),
+            "rejected": self.rejected,
+            "served": self.served,
+            "p50_ms": p(0.50) if latencies else None,
+            "p95_ms": p(0.95) if latencies else None,
+            "llm": self.batcher.stats() if self.batcher else None,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve EGO to several thin clients over a local socket.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--ws-port", type=int, help="also accept WebSocket sessions (needs the websockets package)")
+    parser.add_argument("--model", default="model", help="Vosk model directory")
+    parser.add_argument("--llm", action="store_true", help="load the LLM fallback and batch its requests")
+    parser.add_argument("--max-sessions", type=int, default=MAX_SESSIONS)
+    parser.add_argument("--stats-interval", type=float, default=STATS_INTERVAL,
+                        help="print server stats every N seconds")
+    args = parser.parse_args()
+
+    server = AssistantServer(args.model, max_sessions=args.max_sessions, use_llm=args.llm)
+    server.load()
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.ws_port, args.stats_interval))
+    except KeyboardInterrupt:
+        print(json.dumps(server.stats()))
+
+
+if __name__ == "__main__":
+    main()
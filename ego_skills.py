@@ -0,0 +1,368 @@
+# ego_skills.py
+#
+# Indexed skill registry. Each skill file declares the intents it handles in
+# a module-level ``INTENTS`` tuple (and optionally a ``DEADLINE`` in seconds,
+# and ``SPECULATE = True`` if it is read-only and may be started before the
+# user has finished speaking), which is read from the source with ``ast`` so
+# nothing is imported until one of those intents actually fires. Skills are
+# reloaded in place when their file changes on disk.
+#
+# SkillExecutor runs skills on a bounded thread pool with per-skill deadlines
+# so a slow network call never blocks the listener.
+
+import ast
+import glob
+import importlib.util
+import inspect
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_DEADLINE = 8.0      # seconds a skill may run unless it declares DEADLINE
+MANIFEST_FIELDS = ("INTENTS", "DEADLINE", "SPECULATE")
+
+
+def read_manifest(path):
+    """Return the skill's literal manifest fields (INTENTS, DEADLINE, SPECULATE) as a dict."""
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    manifest = {}
+    for node in tree.body:
+        if not isinstance(node, ast.Assign):
+            continue
+        for t in node.targets:
+            if isinstance(t, ast.Name) and t.id in MANIFEST_FIELDS:
+                manifest[t.id] = ast.literal_eval(node.value)
+    return manifest
+
+
+class SkillError(Exception):
+    """A skill's run() raised; the original exception is chained as __cause__."""
+
+    def __init__(self, skill_name):
+        super().__init__(skill_name)
+        self.skill_name = skill_name
+
+
+def _accepts_context(run):
+    """True if ``run`` takes a third (context) argument."""
+    if run is None:
+        return False
+    try:
+        params = inspect.signature(run).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    positional = [p for p in params if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD)]
+    return len(positional) >= 3 or any(p.kind == p.VAR_POSITIONAL for p in params)
+
+
+class SkillContext:
+    """What ego_core hands a skill's ``run(intent, target, context)``.
+
+    ``http`` is the shared pooled HttpClient, ``cache`` the shared
+    ResponseCache, ``metrics`` the background MetricsSampler. Long-running
+    skills can check ``cancelled`` and give up early once the job has been
+    pre-empted or has timed out.
+    """
+
+    def __init__(self, http=None, cache=None, cancel_event=None, metrics=None):
+        self._http = http
+        self.cache = cache
+        self.metrics = metrics
+        self.cancel_event = cancel_event or threading.Event()
+
+    @property
+    def http(self):
+        # Accept a factory so the HTTP stack is only imported by skills that use it.
+        if callable(self._http):
+            self._http = self._http()
+        return self._http
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+
+class Skill:
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+        self.intents = ()
+        self.deadline = DEFAULT_DEADLINE
+        self.speculate = False
+        self.module = None
+        self.accepts_context = False
+        self.mtime = None
+        self.import_time = None     # seconds spent executing the module, last load
+        self.dispatches = 0
+        self.errors = 0
+        self.reloads = 0
+
+    def load(self):
+        start = time.perf_counter()
+        spec = importlib.util.spec_from_file_location(self.name, self.path)
+        mod = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(mod)
+        self.import_time = time.perf_counter() - start
+        self.accepts_context = _accepts_context(getattr(mod, "run", None))
+        self.module = mod
+        return mod
+
+
+class SkillRegistry:
+    def __init__(self, skills_dir="skills"):
+        self.skills_dir = skills_dir
+        self.skills = {}            # name -> Skill
+        self._by_intent = {}        # intent -> Skill
+        self._unindexed = []        # skills without a manifest, tried in order
+        self._lock = threading.RLock()
+        self._watcher = None
+
+    # --- manifest ---
+    def scan(self):
+        """(Re)read every skill's manifest and rebuild the intent map."""
+        with self._lock:
+            seen = set()
+            for path in sorted(glob.glob(os.path.join(self.skills_dir, "*.py"))):
+                name = os.path.splitext(os.path.basename(path))[0]
+                seen.add(name)
+                skill = self.skills.get(name)
+                if skill is None:
+                    skill = self.skills[name] = Skill(name, path)
+                    self._read(skill)
+            for name in set(self.skills) - seen:
+                del self.skills[name]
+            self._rebuild_index()
+        return self
+
+    def _read(self, skill):
+        """Refresh ``skill``'s manifest. Returns the module if a skill without
+        a manifest had to be imported for it, else None."""
+        skill.mtime = os.path.getmtime(skill.path)
+        try:
+            manifest = read_manifest(skill.path)
+            intents = manifest.get("INTENTS")
+            skill.deadline = float(manifest.get("DEADLINE", DEFAULT_DEADLINE))
+            skill.speculate = bool(manifest.get("SPECULATE", False))
+        except Exception as e:
+            print(f"Could not read manifest of skill {skill.name}: {e}")
+            intents = skill.intents or None
+        skill.intents = tuple(intents or ())
+        if intents is None and skill.module is None:
+            # No manifest: it has to be imported to be asked, like before.
+            return self._import(skill)
+        return None
+
+    def _rebuild_index(self):
+        self._by_intent = {}
+        self._unindexed = []
+        for skill in self.skills.values():
+            for intent in skill.intents:
+                self._by_intent.setdefault(intent, skill)
+            if not skill.intents:
+                self._unindexed.append(skill)
+
+    def _import(self, skill):
+        try:
+            skill.load()
+        except Exception as e:
+            skill.errors += 1
+            print(f"Could not load skill {skill.name}: {e}")
+        return skill.module
+
+    # --- hot reload ---
+    def check_for_changes(self):
+        """Reload skills whose files changed, and pick up added or removed files."""
+        with self._lock:
+            for skill in list(self.skills.values()):
+                try:
+                    mtime = os.path.getmtime(skill.path)
+                except OSError:
+                    continue  # removed; scan() below drops it
+                if mtime == skill.mtime:
+                    continue
+                old = skill.module
+                # _read() may already have imported the new code; don't do it twice.
+                if self._read(skill) is None and old is not None:
+                    self._import(skill)
+                if old is not None and skill.module is not old:
+                    skill.reloads += 1
+                    print(f"Reloaded skill {skill.name}")
+            self.scan()
+
+    def watch(self, interval=1.0):
+        """Poll the skills directory for changes on a daemon thread."""
+        if self._watcher is not None:
+            return
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.check_for_changes()
+                except Exception as e:
+                    print(f"Skill watcher error: {e}")
+
+        self._watcher = threading.Thread(target=loop, name="ego-skill-watcher", daemon=True)
+        self._watcher.start()
+
+    # --- dispatch ---
+    def skill_for(self, intent):
+        return self._by_intent.get(intent)
+
+    def handles(self, intent):
+        return intent in self._by_intent
+
+    def deadline_for(self, intent):
+        skill = self._by_intent.get(intent)
+        return skill.deadline if skill else DEFAULT_DEADLINE
+
+    def can_speculate(self, intent):
+        skill = self._by_intent.get(intent)
+        return skill is not None and skill.speculate
+
+    def dispatch(self, intent, target, context=None):
+        """Run the skill for ``intent``. Returns ``(skill name, result)``, or
+        ``(None, None)`` if no skill produced a result.
+
+        If the skill raises, its error count is bumped and a SkillError naming
+        it is raised from the original exception.
+        """
+        with self._lock:
+            skill = self._by_intent.get(intent)
+            candidates = ([skill] if skill else []) + list(self._unindexed)
+        for skill in candidates:
+            with self._lock:
+                mod = skill.module or self._import(skill)
+            if mod is None or not hasattr(mod, "run"):
+                continue
+            skill.dispatches += 1
+            try:
+                if skill.accepts_context:
+                    result = mod.run(intent, target, context or SkillContext())
+                else:
+                    result = mod.run(intent, target)
+            except Exception as e:
+                skill.errors += 1
+                raise SkillError(skill.name) from e
+            if result:
+                return skill.name, result
+        return None, None
+
+    def stats(self):
+        with self._lock:
+            return {
+                name: {
+                    "intents": list(s.intents),
+                    "deadline_s": s.deadline,
+                    "speculate": s.speculate,
+                    "loaded": s.module is not None,
+                    "import_ms": s.import_time * 1000 if s.import_time is not None else None,
+                    "dispatches": s.dispatches,
+                    "errors": s.errors,
+                    "reloads": s.reloads,
+                }
+                for name, s in self.skills.items()
+            }
+
+
+# === Concurrent execution ===
+class SkillTimeout(Exception):
+    pass
+
+
+class SkillCancelled(Exception):
+    pass
+
+
+class SkillJob:
+    """One skill invocation running on the executor's pool."""
+
+    def __init__(self, intent, deadline):
+        self.intent = intent
+        self.deadline = deadline
+        self.started = time.monotonic()
+        self.future = None
+        self.cancel_event = threading.Event()
+        self._wake = threading.Event()
+
+    def done(self):
+        return self.future is not None and self.future.done()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def cancel(self):
+        """Stop waiting for this job. A job that hasn't started won't run; one
+        that has keeps its worker until it returns, but its result is dropped."""
+        self.cancel_event.set()
+        if self.future is not None:
+            self.future.cancel()
+        self._wake.set()
+
+    def wait(self, on_interim=None, interim_after=0.5):
+        """Block for the skill's ``(name, result)``.
+
+        ``on_interim`` is called once when ``interim_after`` of the deadline has
+        passed without an answer. Raises SkillTimeout when the deadline expires,
+        SkillCancelled if the job was cancelled, or SkillError from the skill.
+        """
+        end = self.started + self.deadline
+        interim_at = self.started + self.deadline * interim_after if on_interim else None
+        while True:
+            if self.cancelled:
+                raise SkillCancelled(self.intent)
+            if self.future.done():
+                return self.future.result()
+            now = time.monotonic()
+            if now >= end:
+                self.cancel()
+                raise SkillTimeout(self.intent)
+            if interim_at is not None and now >= interim_at:
+                interim_at = None
+                on_interim()
+                continue
+            self._wake.wait(min(end, interim_at or end) - now)
+            self._wake.clear()
+
+
+class SkillExecutor:
+    def __init__(self, max_workers=4, make_context=None):
+        """``make_context(job)`` builds the SkillContext passed to each skill."""
+        self.make_context = make_context
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ego-skill")
+        self.submitted = 0
+        self.timeouts = 0
+        self.cancellations = 0
+
+    def submit(self, registry, intent, target, deadline=None):
+        job = SkillJob(intent, deadline or registry.deadline_for(intent))
+        job.future = self._pool.submit(self._run, job, registry, intent, target)
+        job.future.add_done_callback(lambda _: job._wake.set())
+        self.submitted += 1
+        return job
+
+    def _run(self, job, registry, intent, target):
+        if job.cancelled:
+            raise SkillCancelled(intent)
+        context = self.make_context(job) if self.make_context else SkillContext(cancel_event=job.cancel_event)
+        return registry.dispatch(intent, target, context)
+
+    def wait(self, job, on_interim=None, interim_after=0.5):
+        try:
+            return job.wait(on_interim, interim_after)
+        except SkillTimeout:
+            self.timeouts += 1
+            raise
+        except SkillCancelled:
+            self.cancellations += 1
+            raise
+
+    def stats(self):
+        return {
+            "submitted": self.submitted,
+            "timeouts": self.timeouts,
+            "cancellations": self.cancellations,
+        }
@@ -0,0 +1,183 @@
+# ego_speculate.py
+#
+# Speculative skill execution from partial transcripts. While the user is
+# still talking, Vosk's partial hypotheses go through the cheap intent tiers;
+# once the same intent and target have held for STABLE_PARTIALS partials in
+# a row, the skill is started early, as long as it is marked SPECULATE = True
+# (read-only and harmless to run for nothing). When the final transcript has
+# been resolved, run_skill() adopts the job if it matches and the job is
+# cancelled otherwise.
+#
+# Speculations are keyed by the utterance id begin() hands out, so finishing
+# off one command can never cancel a skill started for the next.
+
+import threading
+import time
+
+STABLE_PARTIALS = 2         # identical matches in a row before a skill is started
+MIN_PARTIAL_WORDS = 2       # ignore one-word partials, they match too eagerly
+MAX_SPECULATIONS = 2        # skill starts per utterance (a changed target restarts it)
+MIN_TARGET_CHARS = 3        # a target needs a content word at least this long
+# Words a partial transcript is often cut off after ("what is the", "weather
+# in"); a partial ending in one, or a target made only of them, is not
+# worth a network fetch.
+STOPWORDS = {"a", "an", "the", "of", "in", "on", "at", "for", "to", "about", "and", "or",
+             "is", "are", "was", "what", "what's", "who", "who's", "me", "my", "this", "that"}
+
+
+def _key(intent, target):
+    return intent, (target or "").strip().lower()
+
+
+def plausible(partial, target):
+    """False for a partial that looks cut off mid-phrase, or whose target
+    is empty or made only of stopwords."""
+    words = partial.lower().split()
+    if not words or words[-1] in STOPWORDS:
+        return False
+    if target is None:
+        return True
+    return any(len(w) >= MIN_TARGET_CHARS and w not in STOPWORDS for w in target.lower().split())
+
+
+class Speculation:
+    __slots__ = ("key", "job", "started_at", "finished_at")
+
+    def __init__(self, key, job):
+        self.key = key
+        self.job = job
+        self.started_at = time.perf_counter()
+        self.finished_at = None
+
+
+class _Utterance:
+    __slots__ = ("candidate", "seen", "started", "last", "current")
+
+    def __init__(self):
+        self.candidate = None
+        self.seen = 0
+        self.started = 0
+        self.last = (None, None)    # last partial and its match
+        self.current = None         # the running Speculation
+
+
+class Speculator:
+    def __init__(self, match, submit, can_speculate):
+        """``match(text)`` returns ``(intent dict, source)`` or ``(None, None)``;
+        ``submit(intent, target)`` starts a SkillJob; ``can_speculate(intent)``
+        says whether that intent's skill may be started early."""
+        self.match = match
+        self.submit = submit
+        self.can_speculate = can_speculate
+        self._lock = threading.Lock()
+        self._utterances = {}       # utterance id -> _Utterance
+        self._next_id = 0
+        self.partials = 0
+        self.speculations = 0
+        self.hits = 0
+        self.misses = 0
+        self.saved = 0.0
+
+    def begin(self):
+        """Start a new utterance and return its id."""
+        with self._lock:
+            self._next_id += 1
+            self._utterances[self._next_id] = _Utterance()
+            return self._next_id
+
+    def feed(self, utterance, partial):
+        """Look at one partial hypothesis of ``utterance``; may start or
+        restart a skill. Vosk repeats an unchanged partial every chunk, which
+        is what counts as stable."""
+        state = self._utterances.get(utterance)
+        if state is None or len(partial.split()) < MIN_PARTIAL_WORDS:
+            return
+        if partial == state.last[0]:
+            match = state.last[1]
+        else:
+            self.partials += 1
+            match, _ = self.match(partial)
+            state.last = (partial, match)
+        if not match or not match.get("intent") or not self.can_speculate(match["intent"]) \
+                or not plausible(partial, match.get("target")):
+            return
+        key = _key(match["intent"], match.get("target"))
+        with self._lock:
+            if key == state.candidate:
+                state.seen += 1
+            else:
+                state.candidate, state.seen = key, 1
+            current = state.current
+            if state.seen < STABLE_PARTIALS or (current and current.key == key) \
+                    or state.started >= MAX_SPECULATIONS:
+                return
+            state.started += 1
+            state.current = None
+        if current is not None:
+            self._miss(current, "target changed")
+        speculation = Speculation(key, self.submit(match["intent"], match.get("target")))
+        speculation.job.future.add_done_callback(
+            lambda _: setattr(speculation, "finished_at", time.perf_counter()))
+        self.speculations += 1
+        print(f"Speculatively starting '{key[0]}' ({key[1] or 'no target'}) from: {partial!r}")
+        with self._lock:
+            if self._utterances.get(utterance) is state:
+                state.current = speculation
+                return
+        self._miss(speculation, "utterance finished")   # discarded while it was being submitted
+
+    def take(self, utterance, intent, target):
+        """The speculative job ``utterance`` started for ``(intent, target)``,
+        or None. A speculation for anything else is cancelled."""
+        with self._lock:
+            state = self._utterances.pop(utterance, None)
+        speculation = state and state.current
+        if speculation is None:
+            return None
+        if speculation.key != _key(intent, target) or speculation.job.cancelled:
+            self._miss(speculation, f"final intent was '{intent}'")
+            return None
+        now = time.perf_counter()
+        saved = min(speculation.finished_at or now, now) - speculation.started_at
+        self.hits += 1
+        self.saved += saved
+        print(f"Speculation hit for '{intent}', saved {saved * 1000:.0f} ms "
+              f"(hit rate {self.hits / (self.hits + self.misses):.0%})")
+        return speculation.job
+
+    def discard(self, utterance):
+        """Forget ``utterance``, cancelling a speculation nobody claimed (e.g.
+        the final intent was a built-in)."""
+        with self._lock:
+            states = [self._utterances.pop(utterance, None)]
+        self._discard(states)
+
+    def discard_all(self):
+        """Forget every utterance, e.g. because the user interrupted."""
+        with self._lock:
+            states = list(self._utterances.values())
+            self._utterances.clear()
+        self._discard(states)
+
+    def _discard(self, states):
+        for state in states:
+            if state is not None and state.current is not None:
+                self._miss(state.current, "not used")
+
+    def _miss(self, speculation, reason):
+        speculation.job.cancel()
+        self.misses += 1
+        print(f"Speculation for '{speculation.key[0]}' discarded: {reason} "
+              f"(hit rate {self.hits / (self.hits + self.misses):.0%})")
+
+    def stats(self):
+        resolved = self.hits + self.misses
+        return {
+            "partials": self.partials,
+            "speculations": self.speculations,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / resolved if resolved else None,
+            "saved_ms_total": self.saved * 1000,
+            "saved_ms_per_hit": self.saved / self.hits * 1000 if self.hits else None,
+        }
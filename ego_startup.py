@@ -0,0 +1,103 @@
+# ego_startup.py
+#
+# Startup orchestrator. Heavy components (TTS engine, LLM, Vosk audio
+# engine, skills) are registered as loaders and built on background threads;
+# callers wait on a readiness future only for the component they need.
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+_T0 = time.perf_counter()
+
+
+class StartupOrchestrator:
+    def __init__(self, max_workers=4):
+        self.t0 = _T0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ego-startup")
+        self._loaders = {}
+        self._futures = {}
+        self._spans = {}        # name -> [start, end, error]
+        self._marks = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, loader):
+        """Declare how to build a component. Nothing runs until it's started or needed."""
+        self._loaders[name] = loader
+
+    def start(self, *names):
+        """Start loading the named components (all registered ones by default)."""
+        for name in names or list(self._loaders):
+            self.future(name)
+
+    def future(self, name):
+        """Readiness future for ``name``, starting its loader if it hasn't run yet."""
+        with self._lock:
+            fut = self._futures.get(name)
+            if fut is None:
+                fut = self._executor.submit(self._run, name, self._loaders[name])
+                self._futures[name] = fut
+            return fut
+
+    def _run(self, name, loader):
+        span = self._spans[name] = [self.elapsed(), None, None]
+        try:
+            return loader()
+        except Exception as e:
+            span[2] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span[1] = self.elapsed()
+
+    def loading(self, name):
+        """True while ``name``'s loader is running. Never starts it."""
+        with self._lock:
+            fut = self._futures.get(name)
+        return fut is not None and not fut.done()
+
+    def ready(self, name):
+        with self._lock:
+            fut = self._futures.get(name)
+        return fut is not None and fut.done() and fut.exception() is None
+
+    def result(self, name, timeout=None, default=None):
+        """Wait for ``name`` and return its value, or ``default`` if it failed."""
+        try:
+            return self.future(name).result(timeout)
+        except Exception:
+            return default
+
+    def elapsed(self):
+        return time.perf_counter() - self.t0
+
+    def mark(self, name):
+        """Record a one-off milestone, e.g. "first_frame"."""
+        self._marks.setdefault(name, self.elapsed())
+
+    def wait_all(self, timeout=None):
+        with self._lock:
+            futures = list(self._futures.values())
+        for fut in futures:
+            try:
+                fut.result(timeout)
+            except Exception:
+                pass
+
+    def report(self):
+        lines = ["Startup profile (seconds since process start):"]
+        for name, at in sorted(self._marks.items(), key=lambda kv: kv[1]):
+            lines.append(f"  {name:<18} {at:7.3f}")
+        lines.append(f"  {'component':<18} {'start':>7} {'ready':>7} {'took':>7}")
+        for name, (start, end, error) in sorted(self._spans.items(), key=lambda kv: kv[1][0]):
+            if end is None:
+                lines.append(f"  {name:<18} {start:7.3f} {'...':>7}")
+                continue
+            status = f"  FAILED: {error}" if error else ""
+            lines.append(f"  {name:<18} {start:7.3f} {end:7.3f} {end - start:7.3f}{status}")
+        ends = [span[1] for span in self._spans.values() if span[1] is not None]
+        if ends:
+            lines.append(f"  {'time_to_ready':<18} {max(ends):7.3f}")
+        return "\n".join(lines)
+
+
+startup = StartupOrchestrator()
@@ -0,0 +1,228 @@
+# ego_stt.py
+#
+# Local/remote speech recognition racing. The audio Vosk consumed for a
+# command is kept, and when Vosk's per-word confidence comes out below
+# LOCAL_ACCEPT_CONFIDENCE it is sent to a remote recognizer (Google by
+# default; anything callable as ``remote(pcm, samplerate) -> (text,
+# confidence)`` can stand in). The answer is picked from the confidences,
+# a deadline and the cached connectivity state, so a failed local pass
+# never means listening a second time, and confident commands never leave
+# the machine.
+#
+# ConnectivityMonitor replaces the blocking has_internet() probe: a daemon
+# thread re-checks every CONNECTIVITY_INTERVAL seconds and callers read the
+# cached answer.
+
+import json
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+PROBE_ADDRESS = ("8.8.8.8", 53)
+PROBE_TIMEOUT = 1.5
+CONNECTIVITY_INTERVAL = 30      # seconds between background probes
+REMOTE_DEADLINE = 2.0           # seconds after end of speech the remote result may take
+LOCAL_ACCEPT_CONFIDENCE = 0.85  # mean Vosk word confidence at which the remote isn't asked
+REMOTE_DEFAULT_CONFIDENCE = 0.8 # Google leaves out the confidence now and then
+
+
+class SttResult:
+    __slots__ = ("engine", "text", "confidence", "latency")
+
+    def __init__(self, engine, text, confidence=None, latency=None):
+        self.engine = engine
+        self.text = text
+        self.confidence = confidence
+        self.latency = latency
+
+    def __bool__(self):
+        return bool(self.text)
+
+    def __repr__(self):
+        conf = f"{self.confidence:.2f}" if self.confidence is not None else "?"
+        return f"{self.engine}({self.text!r}, conf={conf})"
+
+
+def vosk_result(result_json):
+    """An SttResult from a Vosk Result()/FinalResult() with SetWords(True):
+    confidence is the mean per-word confidence."""
+    data = json.loads(result_json)
+    words = data.get("result") or []
+    confidence = sum(w.get("conf", 0.0) for w in words) / len(words) if words else None
+    return SttResult("vosk", data.get("text", ""), confidence)
+
+
+# === Connectivity ===
+class ConnectivityMonitor:
+    def __init__(self, address=PROBE_ADDRESS, interval=CONNECTIVITY_INTERVAL, timeout=PROBE_TIMEOUT):
+        self.address = address
+        self.interval = interval
+        self.timeout = timeout
+        self.online = None          # unknown until the first probe
+        self.checked_at = None
+        self.probes = 0
+        self.changes = 0
+        self._wake = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def probe(self):
+        try:
+            socket.create_connection(self.address, timeout=self.timeout).close()
+            online = True
+        except OSError:
+            online = False
+        self.probes += 1
+        self.checked_at = time.monotonic()
+        if online != self.online:
+            if self.online is not None:
+                self.changes += 1
+                print(f"Network {'available' if online else 'unavailable'}")
+            self.online = online
+        return online
+
+    def start(self):
+        """Probe now and every ``interval`` seconds on a daemon thread."""
+        with self._lock:
+            if self._thread is not None:
+                return
+
+            def loop():
+                while True:
+                    self.probe()
+                    self._wake.wait(self.interval)
+                    self._wake.clear()
+
+            self._thread = threading.Thread(target=loop, name="ego-connectivity", daemon=True)
+            self._thread.start()
+
+    def is_online(self):
+        """The cached state, never blocking. Unknown counts as online; the
+        remote deadline bounds the cost of being wrong."""
+        self.start()
+        return self.online is not False
+
+    def report_failure(self):
+        """A remote call failed: assume offline and re-probe straight away."""
+        self.online = False
+        self._wake.set()
+
+    def stats(self):
+        return {
+            "online": self.online,
+            "probes": self.probes,
+            "changes": self.changes,
+            "age_s": time.monotonic() - self.checked_at if self.checked_at is not None else None,
+        }
+
+
+# === Remote recognizer ===
+class GoogleRecognizer:
+    """Google Web Speech API through speech_recognition, on raw PCM."""
+
+    def __init__(self, language="en-US"):
+        self.language = language
+        self._recognizer = None
+
+    def __call__(self, pcm, samplerate):
+        import speech_recognition as sr
+        if self._recognizer is None:
+            self._recognizer = sr.Recognizer()
+        audio = sr.AudioData(pcm, samplerate, 2)
+        try:
+            response = self._recognizer.recognize_google(audio, language=self.language, show_all=True)
+        except sr.UnknownValueError:
+            return "", None
+        alternatives = response.get("alternative") if isinstance(response, dict) else None
+        if not alternatives:
+            return "", None
+        best = alternatives[0]
+        return best.get("transcript", "").lower(), best.get("confidence")
+
+
+# === Racing ===
+class SpeechRace:
+    def __init__(self, remote=None, connectivity=None, deadline=REMOTE_DEADLINE,
+                 local_accept=LOCAL_ACCEPT_CONFIDENCE):
+        """``connectivity`` is a ConnectivityMonitor, or None to always try the remote."""
+        self.remote = remote
+        self.connectivity = connectivity
+        self.deadline = deadline
+        self.local_accept = local_accept
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ego-stt-remote")
+        self.races = 0
+        self.local_accepted = 0
+        self.wins = {"vosk": 0, "remote": 0}
+        self.skipped_offline = 0
+        self.remote_timeouts = 0
+        self.remote_errors = 0
+
+    def recognize(self, local, pcm, samplerate, ended_at):
+        """The result for a command Vosk heard as ``local`` in ``pcm``.
+
+        A confident local result is used as is and nothing is uploaded.
+        Otherwise ``pcm`` goes to the remote recognizer, whose answer is
+        awaited until ``deadline`` seconds after ``ended_at`` (a
+        ``time.perf_counter()`` value); the non-empty result with the higher
+        confidence wins, and the local one stands if the remote is late,
+        fails or has nothing.
+        """
+        if local and local.confidence is not None and local.confidence >= self.local_accept:
+            self.local_accepted += 1
+            return local
+        return self.arbitrate(local, self.start_remote(pcm, samplerate), ended_at)
+
+    def start_remote(self, pcm, samplerate):
+        """Send ``pcm`` to the remote recognizer in the background. Returns a
+        future, or None when there is no remote or no network. A request
+        that has started runs to completion; late answers are ignored."""
+        if self.remote is None or not pcm:
+            return None
+        if self.connectivity is not None and not self.connectivity.is_online():
+            self.skipped_offline += 1
+            return None
+        return self._pool.submit(self._run_remote, pcm, samplerate)
+
+    def _run_remote(self, pcm, samplerate):
+        start = time.perf_counter()
+        text, confidence = self.remote(pcm, samplerate)
+        return SttResult("remote", text, confidence, time.perf_counter() - start)
+
+    def arbitrate(self, local, remote_future, ended_at):
+        """Pick between the local result and the remote one (see recognize)."""
+        if remote_future is None:
+            return local
+        self.races += 1
+        try:
+            remote = remote_future.result(timeout=max(0.0, ended_at + self.deadline - time.perf_counter()))
+        except FutureTimeout:
+            self.remote_timeouts += 1
+            return self._won(local)
+        except Exception as e:
+            print(f"Remote speech recognition failed: {e}")
+            self.remote_errors += 1
+            if self.connectivity is not None:
+                self.connectivity.report_failure()
+            return self._won(local)
+        if not remote:
+            return self._won(local)
+        if not local:
+            return self._won(remote)
+        remote_confidence = REMOTE_DEFAULT_CONFIDENCE if remote.confidence is None else remote.confidence
+        return self._won(remote if remote_confidence > (local.confidence or 0.0) else local)
+
+    def _won(self, result):
+        self.wins["remote" if result.engine == "remote" else "vosk"] += 1
+        return result
+
+    def stats(self):
+        return {
+            "races": self.races,
+            "local_accepted": self.local_accepted,
+            "wins": dict(self.wins),
+            "skipped_offline": self.skipped_offline,
+            "remote_timeouts": self.remote_timeouts,
+            "remote_errors": self.remote_errors,
+            "connectivity": self.connectivity.stats() if self.connectivity else None,
+        }
@@ -0,0 +1,269 @@
+# ego_trace.py
+#
+# Per-utterance latency tracing. Each utterance gets a span tree (wake, STT,
+# intent extraction, action, skill, speech) with monotonic timings, written
+# as one JSON line to a rotating trace file once every span has finished.
+# Tracing is off unless enabled (EGO_TRACE=<path> or ``--trace``); while off,
+# span() returns a shared no-op span.
+#
+# Summarize a trace file:
+#     python ego_trace.py traces.jsonl
+
+import argparse
+import functools
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+TRACE_FILE = os.environ.get("EGO_TRACE")    # path, or None to disable tracing
+MAX_BYTES = 5 * 1024 * 1024
+BACKUP_COUNT = 3
+
+
+class _NullSpan:
+    """Stands in for a span when tracing is off or there is no active trace."""
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+    def finish(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __bool__(self):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    __slots__ = ("trace", "name", "parent", "start", "end", "attrs", "children", "_saved")
+
+    def __init__(self, trace, name, parent, attrs, start=None):
+        self.trace = trace
+        self.name = name
+        self.parent = parent
+        self.start = time.perf_counter() if start is None else start
+        self.end = None
+        self.attrs = attrs
+        self.children = []
+        self._saved = None
+        if parent is not None:
+            parent.children.append(self)
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def finish(self):
+        """End the span. Safe to call from any thread, and more than once."""
+        if self.end is None:
+            self.end = time.perf_counter()
+            self.trace._closed(self)
+
+    def __enter__(self):
+        self._saved = self.trace.tracer._swap(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.trace.tracer._swap(self._saved)
+        self.finish()
+        return False
+
+    def to_dict(self, t0):
+        return {
+            "name": self.name,
+            "start_ms": round((self.start - t0) * 1000, 3),
+            "duration_ms": round((self.end - self.start) * 1000, 3),
+            "attrs": self.attrs,
+            "children": [c.to_dict(t0) for c in self.children],
+        }
+
+
+class Trace:
+    _ids = itertools.count(1)
+
+    def __init__(self, tracer):
+        self.tracer = tracer
+        self.id = next(self._ids)
+        self.wall_time = time.time()
+        self.root = None
+        self._open = 0
+        self._lock = threading.Lock()
+
+    def _opened(self):
+        with self._lock:
+            self._open += 1
+
+    def _closed(self, span):
+        with self._lock:
+            self._open -= 1
+            complete = self._open == 0 and self.root.end is not None
+        if complete:
+            self.tracer._write(self)
+
+
+class Tracer:
+    def __init__(self, path=TRACE_FILE):
+        self.enabled = False
+        self._local = threading.local()
+        self._logger = None
+        if path:
+            self.enable(path)
+
+    def enable(self, path, max_bytes=MAX_BYTES, backup_count=BACKUP_COUNT):
+        handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes,
+                                                       backupCount=backup_count, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self._logger = logging.getLogger(f"ego.trace.{id(self)}")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        self._logger.handlers = [handler]
+        self.enabled = True
+        print(f"Tracing utterances to {path}")
+
+    # --- spans ---
+    def begin(self, name, start=None, **attrs):
+        """Start a new trace whose root span becomes current on this thread.
+        ``start`` backdates it (a ``time.perf_counter()`` value)."""
+        if not self.enabled:
+            return NULL_SPAN
+        trace = Trace(self)
+        trace._opened()
+        trace.root = Span(trace, name, None, attrs, start)
+        self._local.span = trace.root
+        return trace.root
+
+    def span(self, name, start=None, **attrs):
+        """A child of this thread's current span, or NULL_SPAN outside a trace.
+        Use it as a context manager, or call finish() (from any thread)."""
+        if not self.enabled:
+            return NULL_SPAN
+        parent = getattr(self._local, "span", None)
+        if parent is None or parent.trace.root.end is not None:
+            return NULL_SPAN
+        parent.trace._opened()
+        return Span(parent.trace, name, parent, attrs, start)
+
+    def traced(self, name, **attrs):
+        """Decorator: run each call of the function inside ``span(name, **attrs)``."""
+        def decorate(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with self.span(name, **attrs):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def current(self):
+        return getattr(self._local, "span", None) or NULL_SPAN
+
+    def _swap(self, span):
+        previous = getattr(self._local, "span", None)
+        self._local.span = span
+        return previous
+
+    @contextmanager
+    def attach(self, span):
+        """Make ``span`` current on this thread, e.g. on a worker that carries
+        on an utterance started elsewhere."""
+        if not span:
+            yield span
+            return
+        previous = self._swap(span)
+        try:
+            yield span
+        finally:
+            self._swap(previous)
+
+    def detach(self):
+        self._local.span = None
+
+    def _write(self, trace):
+        root = trace.root
+        record = {"trace": trace.id, "time": trace.wall_time}
+        record.update(root.to_dict(root.start))
+        # Speech queued by the action usually outlives the root span.
+        last_end = max(span.end for span in _walk_spans(root))
+        record["complete_ms"] = round((last_end - root.start) * 1000, 3)
+        try:
+            self._logger.info(json.dumps(record))
+        except Exception as e:
+            print(f"Could not write trace: {e}")
+
+
+def _walk_spans(span):
+    yield span
+    for child in span.children:
+        yield from _walk_spans(child)
+
+
+tracer = Tracer()
+
+
+# === Summary CLI ===
+def _walk(span):
+    yield span
+    for child in span["children"]:
+        yield from _walk(child)
+
+
+def read_traces(paths):
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+
+def summarize(traces):
+    """Durations per stage, keyed by span name, plus ``name:path`` for spans
+    that record which path they took (e.g. extract_intent:rules), and
+    ``complete`` for wake-to-last-word."""
+    stages = {}
+    for trace in traces:
+        if "complete_ms" in trace:
+            stages.setdefault("complete", []).append(trace["complete_ms"])
+        for span in _walk(trace):
+            stages.setdefault(span["name"], []).append(span["duration_ms"])
+            path = span["attrs"].get("path")
+            if path is not None:
+                stages.setdefault(f"{span['name']}:{path}", []).append(span["duration_ms"])
+    return stages
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize EGO utterance traces (per-stage latency percentiles).")
+    parser.add_argument("files", nargs="+", help="trace files (JSONL), e.g. traces.jsonl traces.jsonl.1")
+    args = parser.parse_args()
+
+    stages = summarize(read_traces(args.files))
+    print(f"{'stage':<26} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, durations in sorted(stages.items()):
+        durations.sort()
+        print(f"{name:<26} {len(durations):>6} {percentile(durations, 0.50):9.1f} "
+              f"{percentile(durations, 0.95):9.1f} {percentile(durations, 0.99):9.1f}")
+
+
+if __name__ == "__main__":
+    main()
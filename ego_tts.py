@@ -0,0 +1,210 @@
+# ego_tts.py
+#
+# Dedicated text-to-speech worker. speak() only queues text; a single thread
+# owns the pyttsx3 engine, splits each response into sentences and speaks
+# them one at a time, so the first sentence is heard while the rest is still
+# queued (or still being produced by a generator) and anything can be cut
+# short when the user barges in. With a PhraseAudioCache attached, sentences
+# that have been pre-rendered are played from memory instead.
+
+import queue
+import re
+import threading
+import time
+
+_SENTENCE_END = re.compile(r"(?<=[.!?;])\s+")
+RENDER_WHEN_IDLE_AFTER = 1.0    # seconds of silence before rendering queued phrases
+
+
+def split_sentences(text):
+    return [s for s in (p.strip() for p in _SENTENCE_END.split(text)) if s]
+
+
+def iter_sentences(chunks):
+    """Yield complete sentences from a string or an iterable of text chunks."""
+    if isinstance(chunks, str):
+        yield from split_sentences(chunks)
+        return
+    pending = ""
+    for chunk in chunks:
+        # Everything before the last sentence break is complete; the tail may
+        # still be growing.
+        *complete, pending = _SENTENCE_END.split(pending + chunk)
+        for sentence in complete:
+            if sentence.strip():
+                yield sentence.strip()
+    if pending.strip():
+        yield pending.strip()
+
+
+class SpeechHandle:
+    """Returned by TTSWorker.say(); lets callers wait for or cancel one response."""
+
+    def __init__(self, text):
+        self.text = text
+        self.queued_at = time.perf_counter()
+        self.first_audio_at = None
+        self.cancelled = False
+        self._done = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def add_done_callback(self, fn):
+        """Call ``fn(handle)`` once the response is spoken or dropped (at once if it already is)."""
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(fn)
+                return
+        fn(self)
+
+    def _finish(self):
+        with self._lock:
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for fn in callbacks:
+            try:
+                fn(self)
+            except Exception as e:
+                print(f"Speech callback failed: {e}")
+
+    def wait(self, timeout=None):
+        """Block until the response has been spoken (or dropped). Returns False on timeout."""
+        return self._done.wait(timeout)
+
+    def done(self):
+        return self._done.is_set()
+
+    def cancel(self):
+        self.cancelled = True
+
+    @property
+    def time_to_first_audio(self):
+        if self.first_audio_at is None:
+            return None
+        return self.first_audio_at - self.queued_at
+
+
+class TTSWorker:
+    def __init__(self, init_engine, on_start=None, on_idle=None, phrases=None):
+        """``init_engine()`` is called on the worker thread, since some pyttsx3
+        drivers must be used from the thread that created them. ``phrases`` is
+        an optional PhraseAudioCache, rendered into while the worker is idle."""
+        self._init_engine = init_engine
+        self.phrases = phrases
+        self.on_start = on_start
+        self.on_idle = on_idle
+        self.engine = None
+        self._queue = queue.Queue()
+        self._current = None
+        self._ready = threading.Event()
+        self.spoken = 0
+        self.cancelled = 0
+        self.total_first_audio = 0.0
+        self.last_first_audio = None
+        self._thread = threading.Thread(target=self._loop, name="ego-tts", daemon=True)
+        self._thread.start()
+
+    def wait_ready(self, timeout=None):
+        self._ready.wait(timeout)
+        return self.engine
+
+    # --- public API ---
+    def say(self, text):
+        """Queue ``text`` (a string or an iterable of chunks) and return at once."""
+        handle = SpeechHandle(text)
+        self._queue.put(handle)
+        return handle
+
+    def cancel_all(self):
+        """Barge-in: drop everything queued and stop the current utterance."""
+        while True:
+            try:
+                handle = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            handle.cancel()
+            handle._finish()
+            self.cancelled += 1
+        current = self._current
+        if current is not None and not current.done():
+            current.cancel()
+            self.cancelled += 1
+            try:
+                self.engine.stop()
+            except Exception:
+                pass
+            if self.phrases is not None:
+                self.phrases.stop()
+
+    def busy(self):
+        return self._current is not None or not self._queue.empty()
+
+    # --- worker thread ---
+    def _loop(self):
+        try:
+            self.engine = self._init_engine()
+            if self.phrases is not None:
+                self.phrases.bind(self.engine)
+        finally:
+            self._ready.set()
+        while True:
+            idle_for = RENDER_WHEN_IDLE_AFTER if self.phrases is not None and self.phrases.has_pending() else None
+            try:
+                handle = self._queue.get(timeout=idle_for)
+            except queue.Empty:
+                self.phrases.render_next(self.engine)
+                continue
+            self._current = handle
+            try:
+                self._speak(handle)
+            except Exception as e:
+                print(f"TTS error: {e}")
+            finally:
+                self._current = None
+                try:
+                    # Before releasing waiters, so a caller that sets its own
+                    # state after wait() isn't overwritten by "idle".
+                    if self._queue.empty() and self.on_idle:
+                        self.on_idle()
+                finally:
+                    handle._finish()
+
+    def _speak(self, handle):
+        for sentence in iter_sentences(handle.text):
+            if handle.cancelled:
+                return
+            if handle.first_audio_at is None:
+                handle.first_audio_at = time.perf_counter()
+                self.last_first_audio = handle.time_to_first_audio
+                self.total_first_audio += self.last_first_audio
+                self.spoken += 1
+                if self.on_start:
+                    self.on_start()
+            self._say(sentence, handle)
+
+    def _say(self, sentence, handle):
+        if self.phrases is None:
+            self.engine.say(sentence)
+            self.engine.runAndWait()
+            return
+        for part in self.phrases.split(sentence):
+            if handle.cancelled:
+                return
+            clip = self.phrases.get(part)
+            if clip is not None:
+                self.phrases.play(clip)
+                continue
+            self.engine.say(part)
+            self.engine.runAndWait()
+            self.phrases.note_live(part)
+
+    def stats(self):
+        return {
+            "spoken": self.spoken,
+            "cancelled": self.cancelled,
+            "last_time_to_first_audio_ms": (self.last_first_audio * 1000
+                                            if self.last_first_audio is not None else None),
+            "mean_time_to_first_audio_ms": (self.total_first_audio / self.spoken * 1000
+                                            if self.spoken else None),
+            "phrases": self.phrases.stats() if self.phrases is not None else None,
+        }
@@ -0,0 +1,115 @@
+# ego_vad.py
+#
+# Energy-based voice activity detection over int16 PCM. The noise floor is
+# tracked continuously from the shared audio stream, so listening never has
+# to stop and recalibrate, and commands are closed as soon as the speaker
+# goes quiet instead of after a fixed window.
+
+import numpy as np
+
+SUBFRAME_MS = 20          # analysis resolution
+THRESHOLD_DB = 10.0       # how far above the noise floor counts as speech
+NOISE_ADAPT = 0.05        # EMA weight per quiet subframe
+NOISE_RISE_DB_S = 1.0     # drift the floor up when no quiet subframes are seen
+END_SILENCE_MS = 700      # silence after speech that closes the utterance
+MIN_SPEECH_MS = 100       # shorter bursts are treated as clicks, not speech
+START_TIMEOUT_MS = 5000   # give up if nobody starts talking
+MAX_SPEECH_MS = 10000     # hard cap on a single command
+
+
+class VoiceActivityDetector:
+    """Classifies each 20 ms subframe of a block as speech or not.
+
+    Energies for a whole block are computed in one vectorized pass, and the
+    noise floor is updated from the quiet subframes with a closed-form EMA so
+    no per-sample Python loop is involved.
+    """
+
+    def __init__(self, samplerate=16000, subframe_ms=SUBFRAME_MS, threshold_db=THRESHOLD_DB,
+                 noise_adapt=NOISE_ADAPT, noise_rise_db_s=NOISE_RISE_DB_S):
+        self.samplerate = samplerate
+        self.subframe_ms = subframe_ms
+        self.subframe_len = int(samplerate * subframe_ms / 1000)
+        self.threshold_db = threshold_db
+        self.noise_adapt = noise_adapt
+        self.noise_rise_db = noise_rise_db_s * subframe_ms / 1000
+        self.noise_floor_db = None
+
+    def energies_db(self, pcm):
+        x = np.frombuffer(pcm, dtype=np.int16)
+        n = len(x) // self.subframe_len
+        if n == 0:
+            return np.empty(0, dtype=np.float32)
+        frames = x[:n * self.subframe_len].reshape(n, self.subframe_len).astype(np.float32)
+        power = np.einsum('ij,ij->i', frames, frames) / self.subframe_len
+        return 10.0 * np.log10(power + 1e-6)
+
+    def analyse(self, pcm):
+        """Return a boolean speech mask, one entry per subframe of ``pcm``."""
+        db = self.energies_db(pcm)
+        if db.size == 0:
+            return np.zeros(0, dtype=bool)
+        if self.noise_floor_db is None:
+            self.noise_floor_db = float(db.min())
+        mask = db > self.noise_floor_db + self.threshold_db
+        self._update_floor(db[~mask], db.size)
+        return mask
+
+    def _update_floor(self, quiet, total):
+        floor = self.noise_floor_db
+        k = quiet.size
+        if k:
+            a = self.noise_adapt
+            weights = a * (1.0 - a) ** np.arange(k - 1, -1, -1)
+            floor = (1.0 - a) ** k * floor + float(weights @ quiet)
+            floor = min(floor, float(quiet.min()))
+        else:
+            # Everything looked like speech; let the floor creep up so a
+            # permanent rise in background noise is eventually absorbed.
+            floor += self.noise_rise_db * total
+        self.noise_floor_db = floor
+
+
+class Endpointer:
+    """Turns a stream of speech masks into start/end-of-utterance decisions."""
+
+    WAITING, SPEECH, END, TIMEOUT = "waiting", "speech", "end", "timeout"
+
+    def __init__(self, subframe_ms=SUBFRAME_MS, end_silence_ms=END_SILENCE_MS,
+                 min_speech_ms=MIN_SPEECH_MS, start_timeout_ms=START_TIMEOUT_MS,
+                 max_speech_ms=MAX_SPEECH_MS):
+        self.subframe_ms = subframe_ms
+        self.end_silence_ms = end_silence_ms
+        self.min_speech_ms = min_speech_ms
+        self.start_timeout_ms = start_timeout_ms
+        self.max_speech_ms = max_speech_ms
+        self.state = self.WAITING
+        self.elapsed_ms = 0
+        self.speech_ms = 0
+        self.silence_ms = 0
+
+    def feed(self, mask):
+        """Consume one block's speech mask and return the new state."""
+        if self.state in (self.END, self.TIMEOUT) or mask is None or len(mask) == 0:
+            return self.state
+        n = len(mask)
+        self.elapsed_ms += n * self.subframe_ms
+        voiced = np.flatnonzero(mask)
+        if voiced.size:
+            self.speech_ms += voiced.size * self.subframe_ms
+            # silence after the last voiced subframe in this block
+            self.silence_ms = (n - 1 - int(voiced[-1])) * self.subframe_ms
+        else:
+            self.silence_ms += n * self.subframe_ms
+
+        if self.state == self.WAITING:
+            if self.speech_ms >= self.min_speech_ms:
+                self.state = self.SPEECH
+            elif self.elapsed_ms >= self.start_timeout_ms:
+                self.state = self.TIMEOUT
+            elif not voiced.size:
+                self.speech_ms = 0  # isolated click, forget it
+        if self.state == self.SPEECH:
+            if self.silence_ms >= self.end_silence_ms or self.elapsed_ms >= self.max_speech_ms:
+                self.state = self.END
+        return self.state
@@ -0,0 +1,110 @@
+# ego_wake.py
+#
+# Always-on wake word spotter. Runs a grammar-restricted Kaldi recognizer on
+# the shared audio stream, which is far cheaper than full large-vocabulary
+# transcription and never touches the network.
+
+import json
+import time
+
+WAKE_WORDS = ("ego",)
+DEFAULT_SENSITIVITY = 0.5   # 0 = only very confident matches, 1 = accept anything
+
+
+class WakeDetection:
+    """A wake word hit and where the command audio starts in the stream."""
+
+    def __init__(self, word, confidence, latency, cursor, offset):
+        self.word = word
+        self.confidence = confidence
+        self.latency = latency      # seconds from end of the wake word to detection
+        self.cursor = cursor        # frame holding the first sample after the wake word
+        self.offset = offset        # byte offset of that sample inside the frame
+
+    def __repr__(self):
+        return (f"WakeDetection({self.word!r}, conf={self.confidence:.2f}, "
+                f"latency={self.latency * 1000:.0f}ms)")
+
+
+class WakeWordSpotter:
+    def __init__(self, audio, wake_words=WAKE_WORDS, sensitivity=DEFAULT_SENSITIVITY):
+        self.audio = audio
+        self.wake_words = tuple(w.lower() for w in wake_words)
+        self.sensitivity = sensitivity
+        self.grammar = json.dumps(list(self.wake_words) + ["[unk]"])
+        self.detections = 0
+        self.rejections = 0
+        self.total_latency = 0.0
+        self.last_latency = None
+
+    @property
+    def min_confidence(self):
+        return max(0.0, min(1.0, 1.0 - self.sensitivity))
+
+    def _recognizer(self):
+        rec = self.audio.recognizer("wake", grammar=self.grammar)
+        rec.SetWords(True)
+        return rec
+
+    def listen(self, timeout=None, stop_event=None):
+        """Block until the wake word is heard and return a WakeDetection.
+
+        Returns None on timeout, when ``stop_event`` is set, or when the audio
+        stream stops.
+        """
+        rec = self._recognizer()
+        start = cursor = self.audio.cursor()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if stop_event is not None and stop_event.is_set():
+                return None
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            data, next_cursor = self.audio.read(cursor, timeout=0.5)
+            if data is None:
+                if not self.audio.running:
+                    return None
+                continue
+            if next_cursor != cursor + 1:
+                # Fell behind the ring buffer; word timings would be off, so start over.
+                rec = self._recognizer()
+                start = next_cursor - 1
+            cursor = next_cursor
+            if rec.AcceptWaveform(data):
+                detection = self._match(json.loads(rec.Result()), start)
+                if detection:
+                    return detection
+
+    def _match(self, result, start):
+        for word in result.get('result', []):
+            if word.get('word') not in self.wake_words:
+                continue
+            conf = word.get('conf', 1.0)
+            if conf < self.min_confidence:
+                self.rejections += 1
+                continue
+            samples = int(word['end'] * self.audio.samplerate)
+            blocksize = self.audio.blocksize
+            cursor = start + samples // blocksize
+            offset = (samples % blocksize) * 2  # int16 mono
+            captured = self.audio.frame_time(cursor)
+            if captured is not None:
+                # frame_time is when the frame finished; back off to the word's end
+                captured -= (blocksize - samples % blocksize) / self.audio.samplerate
+                latency = max(0.0, time.monotonic() - captured)
+            else:
+                latency = 0.0
+            self.detections += 1
+            self.total_latency += latency
+            self.last_latency = latency
+            return WakeDetection(word['word'], conf, latency, cursor, offset)
+        return None
+
+    def stats(self):
+        return {
+            "detections": self.detections,
+            "rejections": self.rejections,
+            "sensitivity": self.sensitivity,
+            "last_latency_ms": None if self.last_latency is None else self.last_latency * 1000,
+            "mean_latency_ms": (self.total_latency / self.detections * 1000) if self.detections else None,
+        }
@@ -1,26 +1,40 @@
-from newsapi import NewsApiClient
+INTENTS = ("get_news",)
+DEADLINE = 6.0
+SPECULATE = True
 
 # IMPORTANT: Replace with your own News API key
 NEWS_API_KEY = 'YOUR_API_KEY'
 
-def run(intent, target):
+# Headlines are cached to stay inside the NewsAPI quota.
+CACHE_TTL = 30 * 60
+CACHE_STALE_TTL = 2 * 60 * 60
+
+API_URL = "https://newsapi.org/v2/top-headlines"
+
+class NoHeadlines(Exception):
+    pass
+
+def fetch_headlines(http):
+    top_headlines = http.get_json(API_URL, params={"language": "en", "country": "us"},
+                                  headers={"X-Api-Key": NEWS_API_KEY})
+    if top_headlines['status'] != 'ok' or not top_headlines['articles']:
+        raise NoHeadlines()
+    articles = top_headlines['articles'][:5] # Read top 5
+    headlines = "Here are the top headlines: "
+    for article in articles:
+        headlines += article['title'] + ". "
+    return headlines
+
+def run(intent, target, context):
     if intent == "get_news":
         if NEWS_API_KEY == 'YOUR_API_KEY':
             return "Please set your News API key in the news.py skill file."
         
         try:
-            newsapi = NewsApiClient(api_key=NEWS_API_KEY)
-            top_headlines = newsapi.get_top_headlines(language='en', country='us')
-            
-            if top_headlines['status'] == 'ok' and top_headlines['articles']:
-                articles = top_headlines['articles'][:5] # Read top 5
-                headlines = "Here are the top headlines: "
-                for article in articles:
-                    headlines += article['title'] + ". "
-                return headlines
-            else:
-                return "I couldn't fetch the news at the moment."
-
+            return context.cache.get_or_fetch("news", "top-us", lambda: fetch_headlines(context.http),
+                                              ttl=CACHE_TTL, stale_ttl=CACHE_STALE_TTL)
+        except NoHeadlines:
+            return "I couldn't fetch the news at the moment."
         except Exception as e:
             return f"I encountered an error trying to fetch the news: {e}"
             
@@ -1,5 +1,7 @@
 import webbrowser
 
+INTENTS = ("open_website",)
+
 def run(intent, target):
     if intent == "open_website":
         if target:
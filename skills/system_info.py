@@ -1,19 +1,94 @@
+import re
+
 import psutil
 
-def run(intent, target):
+INTENTS = ("get_cpu_usage", "get_memory_usage", "get_battery_status",
+           "get_cpu_average", "get_memory_average", "get_top_cpu", "get_top_memory")
+
+# Answers come from the background sampler (context.metrics); psutil is only
+# read directly when the sampler has nothing yet.
+DEFAULT_WINDOW = 5 * 60
+_UNITS = {"second": 1, "minute": 60, "hour": 60 * 60}
+_NUMBERS = {"a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "five": 5, "ten": 10,
+            "fifteen": 15, "twenty": 20, "thirty": 30, "few": 3, "couple": 2}
+
+def parse_window(target):
+    """Seconds in "5 minutes", "an hour", "ten minutes"...; DEFAULT_WINDOW if none."""
+    m = re.search(r"(\d+|[a-z]+)?\s*(second|minute|hour)s?\b", (target or "").lower())
+    if not m:
+        return DEFAULT_WINDOW
+    count = m.group(1)
+    count = int(count) if count and count.isdigit() else _NUMBERS.get(count, 1)
+    return count * _UNITS[m.group(2)]
+
+def describe_window(seconds):
+    for unit, size in (("hour", 3600), ("minute", 60), ("second", 1)):
+        if seconds >= size:
+            n = round(seconds / size)
+            return unit if n == 1 else f"{n} {unit}s"
+    return "second"
+
+def format_bytes(n):
+    return f"{n / 2**30:.1f} GB" if n >= 2**30 else f"{n / 2**20:.0f} MB"
+
+def _sampler(context):
+    metrics = getattr(context, "metrics", None)
+    if metrics is not None and (metrics.running or metrics.start()):
+        return metrics
+    return None
+
+def _trend(metrics, metric, label, target):
+    window = parse_window(target)
+    result = metrics.average(metric, window) if metrics else None
+    if result is None:
+        return f"I don't have any {label} history yet."
+    mean, low, high, covered = result
+    span = describe_window(max(1, min(window, covered)))
+    return f"Over the last {span}, {label} averaged {mean:.0f}%, ranging from {low:.0f}% to {high:.0f}%."
+
+def run(intent, target, context=None):
+    metrics = _sampler(context)
+    latest = metrics.latest() if metrics else None
+
     if intent == "get_cpu_usage":
-        usage = psutil.cpu_percent(interval=1)
+        usage = latest["cpu"] if latest else psutil.cpu_percent(interval=0.2)
         return f"The CPU is at {usage}% usage."
-    
+
     if intent == "get_memory_usage":
-        memory = psutil.virtual_memory()
-        return f"Your system has {memory.percent}% memory usage."
+        percent = latest["memory"] if latest else psutil.virtual_memory().percent
+        return f"Your system has {percent}% memory usage."
 
     if intent == "get_battery_status":
-        battery = psutil.sensors_battery()
-        if battery:
-            return f"The battery is at {battery.percent}% and charging status is {battery.power_plugged}."
+        if latest:
+            percent, plugged = latest["battery"], latest["plugged"]
+        else:
+            battery = psutil.sensors_battery()
+            percent, plugged = (battery.percent, battery.power_plugged) if battery else (None, None)
+        if percent is not None:
+            return f"The battery is at {percent:.0f}% and charging status is {plugged}."
         else:
             return "I couldn't find a battery on this system."
 
+    if intent == "get_cpu_average":
+        return _trend(metrics, "cpu", "the CPU", target)
+
+    if intent == "get_memory_average":
+        return _trend(metrics, "memory", "memory usage", target)
+
+    if intent == "get_top_memory":
+        top = metrics.top_processes("memory", 3) if metrics else []
+        if not top:
+            return "I haven't looked at the running processes yet."
+        name, _, _, rss = top[0]
+        others = ", ".join(f"{n} with {format_bytes(r)}" for n, _, _, r in top[1:])
+        return f"{name} is using the most memory, {format_bytes(rss)}" + (f", followed by {others}." if others else ".")
+
+    if intent == "get_top_cpu":
+        top = metrics.top_processes("cpu", 3) if metrics else []
+        if not top or top[0][2] <= 0:
+            return "I haven't measured process CPU usage yet."
+        name, _, cpu, _ = top[0]
+        others = ", ".join(f"{n} at {c:.0f}%" for n, _, c, _ in top[1:] if c > 0)
+        return f"{name} is using the most CPU, {cpu:.0f}% of a core" + (f", followed by {others}." if others else ".")
+
     return None
@@ -1,3 +1,5 @@
+INTENTS = ("tell_joke",)
+
 def run(intent, target):
     if intent == "tell_joke":
         return "Why did the computer show up at work late? It had a hard drive!"
@@ -1,12 +1,22 @@
-import requests
+INTENTS = ("get_weather",)
+DEADLINE = 6.0
+SPECULATE = True    # read-only lookup, safe to start from a partial transcript
 
-def run(intent, target):
+# Weather doesn't change by the minute; serve stale answers for up to 3 hours
+# while a fresh one is fetched in the background.
+CACHE_TTL = 15 * 60
+CACHE_STALE_TTL = 3 * 60 * 60
+
+def fetch_weather(http, city):
+    return http.get(f"https://wttr.in/{city}?format=3").text
+
+def run(intent, target, context):
     if intent == "get_weather":
         city = target or ""
         try:
-            url = f"https://wttr.in/{city}?format=3"
-            response = requests.get(url)
-            return response.text
+            return context.cache.get_or_fetch("weather", city.lower(),
+                                              lambda: fetch_weather(context.http, city),
+                                              ttl=CACHE_TTL, stale_ttl=CACHE_STALE_TTL)
         except Exception as e:
             return f"Could not fetch weather: {e}"
-    return None 
\ No newline at end of file
+    return None
@@ -1,10 +1,32 @@
-import wikipedia
+INTENTS = ("get_wikipedia",)
+DEADLINE = 6.0
+SPECULATE = True
 
-def run(intent, target):
+CACHE_TTL = 24 * 60 * 60
+CACHE_STALE_TTL = 7 * 24 * 60 * 60
+
+API_URL = "https://en.wikipedia.org/w/api.php"
+
+def fetch_summary(http, topic):
+    # Search for the best matching article and return the first two
+    # sentences of its intro in a single request.
+    params = {
+        "action": "query", "format": "json", "redirects": 1,
+        "generator": "search", "gsrsearch": topic, "gsrlimit": 1,
+        "prop": "extracts", "exintro": 1, "explaintext": 1, "exsentences": 2,
+    }
+    pages = http.get_json(API_URL, params=params).get("query", {}).get("pages", {})
+    for page in pages.values():
+        if page.get("extract"):
+            return page["extract"]
+    raise LookupError(f"no article found for '{topic}'")
+
+def run(intent, target, context):
     if intent == "get_wikipedia":
         try:
-            summary = wikipedia.summary(target, sentences=2)
-            return summary
+            return context.cache.get_or_fetch("wikipedia", (target or "").lower(),
+                                              lambda: fetch_summary(context.http, target),
+                                              ttl=CACHE_TTL, stale_ttl=CACHE_STALE_TTL)
         except Exception as e:
             return f"Could not fetch Wikipedia summary: {e}"
-    return None 
\ No newline at end of file
+    return None
@@ -0,0 +1,16 @@
+import ego_batch
+import ego_core
+
+
+def test_worker_without_llm_never_loads_it(monkeypatch):
+    def load_llm():
+        raise AssertionError("LLM loaded without --llm")
+
+    monkeypatch.setattr(ego_core, "load_llm", load_llm)
+    monkeypatch.setitem(ego_core.startup._loaders, "llm", load_llm)
+    ego_batch._init_intents(False)
+
+    assert ego_batch._extract_intent("open spotify") == {"intent": "open_app", "target": "spotify"}
+    assert ego_batch._extract_intent("compose a sonnet about rust") == {"intent": None, "target": None}
+    assert not ego_core.startup.loading("llm")
+    assert "llm" not in ego_core.startup._futures
@@ -0,0 +1,24 @@
+import ego_core
+
+
+def test_stats_lines_report_the_intent_tiers():
+    ego_core.extract_intent("tell me a joke")
+
+    lines = ego_core.stats_lines()
+
+    intents = next(line for line in lines if line.startswith("intents: "))
+    assert "classifier" in intents and "LLM rate" in intents
+    assert any(line.startswith("cache: ") for line in lines)
+
+
+def test_stats_lines_report_wake_word_latency(monkeypatch):
+    class Spotter:
+        def stats(self):
+            return {"detections": 3, "rejections": 1, "sensitivity": 0.5,
+                    "last_latency_ms": 140.0, "mean_latency_ms": 180.0}
+
+    monkeypatch.setattr(ego_core, "wake_spotter", Spotter())
+
+    line = ego_core.stats_lines()[0]
+
+    assert line == "wake word: 3 detections, 1 rejected below confidence, latency mean 180 ms, last 140 ms"
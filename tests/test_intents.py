@@ -0,0 +1,89 @@
+import threading
+
+import pytest
+
+from ego_intents import EXACT_INTENTS, build_intent_classifier, build_intent_index
+
+THRESHOLD = 0.7  # ego_core.INTENT_CONFIDENCE_THRESHOLD
+
+
+@pytest.fixture(scope="module")
+def classifier():
+    return build_intent_classifier({})
+
+
+@pytest.fixture(scope="module")
+def index():
+    return build_intent_index({})
+
+
+@pytest.mark.parametrize("utterance", [
+    "is the store open today",
+    "i will visit grandma tomorrow",
+    "never google anything",
+    "stop listening to me please",
+    "don't take a screenshot of this",
+])
+def test_near_misses_do_not_fire_side_effects(classifier, utterance):
+    match, _ = classifier.classify(utterance, THRESHOLD)
+    assert match is None or match["intent"] not in EXACT_INTENTS
+
+
+@pytest.mark.parametrize("utterance, intent, target", [
+    ("open spotify", "open_app", "spotify"),
+    ("please open spotify", "open_app", "spotify"),
+    ("go to github.com", "open_website", "github.com"),
+    ("search the web for pasta recipes", "web_search", "pasta recipes"),
+    ("goodbye", "exit", None),
+    ("stop listening", "exit", None),
+    ("can you take a screenshot", "screenshot", None),
+    ("what's the weather in london", "get_weather", "london"),
+    ("what was the average cpu usage over the last ten minutes", "get_cpu_average", "ten minutes"),
+])
+def test_matches(classifier, utterance, intent, target):
+    match, confidence = classifier.classify(utterance, THRESHOLD)
+    assert match == {"intent": intent, "target": target}
+    assert confidence >= THRESHOLD
+
+
+def test_uncovered_words_lower_confidence(classifier):
+    _, plain = classifier.classify("tell me a joke")
+    _, padded = classifier.classify("tell me a joke about the weather tomorrow")
+    assert padded < plain
+
+
+@pytest.mark.parametrize("utterance, intent, target", [
+    ("what is the average cpu over the last 5 minutes", "get_cpu_average", "5 minutes"),
+    ("what is the average memory usage over the past hour", "get_memory_average", "hour"),
+    ("what is using the most memory", "get_top_memory", None),
+    ("what is the cpu usage", "get_cpu_usage", None),
+    ("what is the eiffel tower", "get_wikipedia", "the eiffel tower"),
+    ("who is albert einstein", "get_wikipedia", "albert einstein"),
+])
+def test_system_info_questions_beat_the_wikipedia_rule(index, utterance, intent, target):
+    assert index.match(utterance) == {"intent": intent, "target": target}
+
+
+def test_learning_while_classifying_is_safe():
+    classifier = build_intent_classifier({})
+    errors = []
+    done = threading.Event()
+
+    def classify():
+        while not done.is_set():
+            try:
+                classifier.classify("what's the weather in london", THRESHOLD)
+            except Exception as e:
+                errors.append(e)
+                return
+
+    reader = threading.Thread(target=classify)
+    reader.start()
+    for i in range(50):
+        classifier.add_example(f"custom phrase number {i}", {"intent": f"custom_{i}", "target": None})
+        classifier.classify(f"custom phrase number {i}")
+    done.set()
+    reader.join()
+
+    assert not errors
+    assert classifier.classify("custom phrase number 49", THRESHOLD)[0]["intent"] == "custom_49"
@@ -0,0 +1,44 @@
+import sys
+import time
+import types
+
+from ego_metrics import MetricsSampler, ProcessRing
+
+
+def fake_psutil():
+    proc = types.SimpleNamespace(info={"pid": 42, "name": "editor", "cpu_percent": 12.5,
+                                       "memory_info": types.SimpleNamespace(rss=300 * 2**20)})
+    return types.SimpleNamespace(
+        cpu_percent=lambda interval=None: 30.0,
+        virtual_memory=lambda: types.SimpleNamespace(percent=55.0),
+        sensors_battery=lambda: None,
+        process_iter=lambda attrs: [proc],
+    )
+
+
+def test_process_ring_keeps_the_latest_scans():
+    ring = ProcessRing(capacity=2, n=2)
+    for i in range(3):
+        ring.append(float(i), {"cpu": [(f"p{i}", i, 10.0 * i, 100)], "memory": [("big", 7, 0.0, 2**30)]})
+
+    assert len(ring) == 2
+    assert ring.latest("cpu", 5) == [("p2", 2, 20.0, 100)]
+    assert ring.latest("memory", 1) == [("big", 7, 0.0, 2**30)]
+
+
+def test_sampler_can_be_restarted(monkeypatch):
+    monkeypatch.setitem(sys.modules, "psutil", fake_psutil())
+    sampler = MetricsSampler(interval=0.01)
+    assert sampler.start()
+    sampler.stop(timeout=2)
+    assert not sampler.running
+
+    assert sampler.start()
+    assert sampler.running
+    deadline = time.monotonic() + 3
+    while sampler.latest() is None and time.monotonic() < deadline:
+        time.sleep(0.05)
+    sampler.stop(timeout=2)
+
+    assert sampler.latest()["cpu"] == 30.0
+    assert sampler.top_processes("memory") == [("editor", 42, 12.5, 300 * 2**20)]
@@ -0,0 +1,44 @@
+import asyncio
+
+from ego_server import TEXT, AssistantServer
+
+
+def run_session(server, commands, gap=0.05):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def frames():
+        for text in commands:
+            yield TEXT, text.encode("utf-8")
+            await asyncio.sleep(gap)
+
+    asyncio.run(server._serve_session(send, frames()))
+    return sent
+
+
+def test_new_command_cancels_the_running_one(monkeypatch):
+    server = AssistantServer()
+    act = server.act
+
+    async def slow_act(session, intent):
+        if intent.get("target") == "slow":
+            await asyncio.sleep(10)
+        return await act(session, intent)
+
+    monkeypatch.setattr(server, "act", slow_act)
+    sent = run_session(server, ["open slow", "what time is it"])
+
+    assert [m["type"] for m in sent] == ["hello", "cancelled", "result"]
+    assert sent[1]["transcript"] == "open slow"
+    assert sent[2]["intent"] == "get_time"
+    assert not server.sessions
+
+
+def test_exit_ends_the_session():
+    server = AssistantServer()
+    sent = run_session(server, ["goodbye", "what time is it"], gap=0.2)
+
+    assert [m["type"] for m in sent] == ["hello", "result"]
+    assert sent[1]["intent"] == "exit"
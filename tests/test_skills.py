@@ -0,0 +1,53 @@
+import os
+
+from ego_skills import SkillRegistry
+
+SKILL = """
+LOADS = __import__("builtins").__dict__.setdefault("_ego_test_loads", [])
+LOADS.append({version})
+
+def run(intent, target):
+    return "v{version}" if intent == "ping" else None
+"""
+
+
+def write_skill(path, version, mtime):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(SKILL.format(version=version))
+    os.utime(path, (mtime, mtime))
+
+
+def test_changed_skill_without_manifest_is_imported_once(tmp_path):
+    import builtins
+    loads = builtins.__dict__.setdefault("_ego_test_loads", [])
+    loads.clear()
+    path = tmp_path / "ping.py"
+    write_skill(path, 1, 1_000_000)
+    registry = SkillRegistry(str(tmp_path)).scan()
+    assert loads == [1]
+    assert registry.dispatch("ping", None) == ("ping", "v1")
+
+    write_skill(path, 2, 1_000_100)
+    registry.check_for_changes()
+
+    assert loads == [1, 2]
+    assert registry.dispatch("ping", None) == ("ping", "v2")
+    assert registry.stats()["ping"]["reloads"] == 1
+
+
+def test_broken_skill_without_manifest_is_imported_once_when_fixed(tmp_path):
+    import builtins
+    loads = builtins.__dict__.setdefault("_ego_test_loads", [])
+    loads.clear()
+    path = tmp_path / "ping.py"
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(SKILL.format(version=1) + "raise RuntimeError('broken')\n")
+    os.utime(path, (1_000_000, 1_000_000))
+    registry = SkillRegistry(str(tmp_path)).scan()
+    assert registry.skills["ping"].module is None
+
+    write_skill(path, 2, 1_000_100)
+    registry.check_for_changes()
+
+    assert loads == [1, 2]
+    assert registry.dispatch("ping", None) == ("ping", "v2")
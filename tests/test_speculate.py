@@ -0,0 +1,78 @@
+from concurrent.futures import Future
+
+from ego_speculate import STABLE_PARTIALS, Speculator
+
+
+class FakeJob:
+    def __init__(self, intent, target):
+        self.intent, self.target = intent, target
+        self.future = Future()
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+def make_speculator():
+    def match(text):
+        return {"intent": "get_weather", "target": text.split()[-1]}, "rules"
+
+    return Speculator(match=match, submit=FakeJob, can_speculate=lambda intent: True)
+
+
+def speculate(speculator, utterance, partial):
+    for _ in range(STABLE_PARTIALS):
+        speculator.feed(utterance, partial)
+
+
+def test_finishing_one_utterance_keeps_the_next_ones_speculation():
+    speculator = make_speculator()
+    first = speculator.begin()
+    speculate(speculator, first, "weather in paris")
+    second = speculator.begin()
+    speculate(speculator, second, "weather in london")
+
+    speculator.discard(first)
+    job = speculator.take(second, "get_weather", "london")
+
+    assert job is not None and not job.cancelled
+    assert speculator.stats()["hits"] == 1
+
+
+def test_take_cancels_a_mismatched_speculation():
+    speculator = make_speculator()
+    utterance = speculator.begin()
+    speculate(speculator, utterance, "weather in paris")
+    job = speculator._utterances[utterance].current.job
+
+    assert speculator.take(utterance, "get_weather", "rome") is None
+    assert job.cancelled
+
+
+def test_discard_all_cancels_every_utterance():
+    speculator = make_speculator()
+    jobs = []
+    for city in ("paris", "london"):
+        utterance = speculator.begin()
+        speculate(speculator, utterance, f"weather in {city}")
+        jobs.append(speculator._utterances[utterance].current.job)
+
+    speculator.discard_all()
+
+    assert all(job.cancelled for job in jobs)
+
+
+def test_truncated_or_stopword_targets_are_not_speculated():
+    def match(text):
+        return {"intent": "get_wikipedia", "target": text.split(" ", 2)[-1]}, "rules"
+
+    started = []
+    speculator = Speculator(match=match, submit=lambda i, t: started.append(t) or FakeJob(i, t),
+                            can_speculate=lambda intent: True)
+    utterance = speculator.begin()
+    for partial in ("what is the", "what is a", "what is it"):
+        speculate(speculator, utterance, partial)
+    assert started == []
+
+    speculate(speculator, utterance, "what is the eiffel tower")
+    assert started == ["the eiffel tower"]
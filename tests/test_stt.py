@@ -0,0 +1,34 @@
+import time
+
+from ego_stt import SpeechRace, SttResult
+
+
+class FakeRemote:
+    def __init__(self, text="turn on the lights", confidence=0.95):
+        self.text, self.confidence = text, confidence
+        self.calls = 0
+
+    def __call__(self, pcm, samplerate):
+        self.calls += 1
+        return self.text, self.confidence
+
+
+def test_confident_local_result_is_not_uploaded():
+    remote = FakeRemote()
+    race = SpeechRace(remote=remote)
+    local = SttResult("vosk", "what time is it", 0.97)
+
+    assert race.recognize(local, b"\0" * 3200, 16000, time.perf_counter()) is local
+    assert remote.calls == 0
+    assert race.stats()["local_accepted"] == 1
+
+
+def test_unsure_local_result_races_the_remote():
+    remote = FakeRemote()
+    race = SpeechRace(remote=remote)
+    local = SttResult("vosk", "turn on the lie", 0.4)
+
+    result = race.recognize(local, b"\0" * 3200, 16000, time.perf_counter())
+
+    assert remote.calls == 1
+    assert result.engine == "remote" and result.text == "turn on the lights"